@@ -0,0 +1,7 @@
+"""Run the hook with `python -m main`, without the console script wrapper."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,374 @@
+"""Audit the history of a repository incrementally.
+
+    commit-msg-hook audit main --since 2024-01-01
+
+The results are indexed in the result store of the repository. The last audited commit
+of the ref is kept, so an audit lists and validates only the commits made since the previous one,
+and answers from the index how many commits of the ref failed every rule. A rewritten ref
+(e.g. force pushed) is listed again from scratch, its results are still taken from the index.
+
+A checkpoint is stored with every chunk of results, an interrupted audit resumes
+after the last stored chunk, no commit is validated twice nor skipped.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from . import backends
+from .colors import OFF, RED
+from .history import check_revisions, git_command, open_store
+from .reports import add_results, new_report, write
+from .sample import DEFAULT_CONFIDENCE, STRATA, estimate
+from .shards import Shard, parse_shard
+from .stats import TOP_K, collect
+from .store import Checkpoint, fingerprint
+
+# the seconds between the progress lines
+PROGRESS_INTERVAL = 1.0
+
+
+class Progress:
+    """
+    Report the progress and the throughput of an audit on stderr.
+
+    Attributes:
+        total (int): The number of the listed commits, None if unknown.
+        done (int): The number of the processed commits.
+        stream (file): The stream to report to.
+    """
+
+    def __init__(self, total: int = None, done: int = 0, stream=None):
+        self.total = total
+        self.done = done
+        self.stream = stream or sys.stderr
+        self._start = time.monotonic()
+        self._started_at = done
+        self._reported = self._start
+
+    def update(self, count: int = 1):
+        """
+        Count processed commits, report at most once per `PROGRESS_INTERVAL`.
+
+        Args:
+            count (int, optional): The number of the processed commits. Defaults to 1.
+        """
+        self.done += count
+        now = time.monotonic()
+        if now - self._reported >= PROGRESS_INTERVAL:
+            self._reported = now
+            self._report(now, "\r")
+
+    def finish(self):
+        """Report the final line."""
+        self._report(time.monotonic(), "\r")
+        self.stream.write("\n")
+        self.stream.flush()
+
+    def _report(self, now: float, start: str):
+        rate = (self.done - self._started_at) / max(now - self._start, 1e-6)
+        total = f" of {self.total}" if self.total is not None else ""
+        percent = f" ({100 * self.done // max(self.total, 1)}%)" if self.total is not None else ""
+        self.stream.write(f"{start}audited {self.done}{total} commits{percent}, {rate:.0f} commits/s")
+        self.stream.flush()
+
+
+def resolve(revision: str, git_dir: str = None) -> tuple:
+    """
+    Resolve a revision to a commit.
+
+    Args:
+        revision (str): The revision, e.g. `main` or `HEAD`.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+
+    Raises:
+        subprocess.CalledProcessError: If the revision is unknown.
+
+    Returns:
+        tuple: The full name of the ref(the revision itself if it isn't a ref) and the object name of the commit.
+    """
+    command = git_command(git_dir, "rev-parse", f"{revision}^{{commit}}", "--symbolic-full-name", revision)
+    output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            check=True).stdout.decode("utf-8").split()
+    return (output[1] if len(output) > 1 else revision), output[0]
+
+
+def count_commits(revisions: list, git_dir: str = None) -> int:
+    """
+    Count the commits of the given revisions.
+
+    Args:
+        revisions (list): The `git rev-list` arguments.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+
+    Raises:
+        subprocess.CalledProcessError: If git failed, e.g. a revision is unknown.
+
+    Returns:
+        int: The number of the commits.
+    """
+    command = git_command(git_dir, "rev-list", "--count", *revisions, "--")
+    return int(subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout)
+
+
+def is_ancestor(commit: str, descendant: str, git_dir: str = None) -> bool:
+    """
+    Check whether a commit is an ancestor of another one.
+
+    Args:
+        commit (str): The object name of the commit.
+        descendant (str): The object name of the other commit.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+
+    Returns:
+        bool: True if the commit is reachable from the other one, False if not or if it's gone.
+    """
+    command = git_command(git_dir, "merge-base", "--is-ancestor", commit, descendant)
+    return subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+
+
+def store_key(ref: str, shard: Shard = None) -> str:
+    """
+    Get the key the audits of a ref are tracked by in the store.
+
+    Args:
+        ref (str): The full name of the ref.
+        shard (Shard, optional): The audited shard. Defaults to None.
+
+    Returns:
+        str: The key, the audits of the shards of a ref are tracked apart.
+    """
+    # a space can't be in a ref name
+    return ref if shard is None else f"{ref} {shard.spec}"
+
+
+def audit(revision: str, validator, store, git_dir: str = None, shard: Shard = None, progress: bool = False) -> dict:
+    """
+    Index the commits of a revision not indexed yet.
+
+    Only the commits since the last indexed tip of the ref are listed, the commits indexed
+    through another ref or by `check-range` aren't validated again.
+    If the previous audit of the ref was interrupted and the ref hasn't moved since,
+    the listing resumes after its checkpoint. If the ref was rewritten, its whole history is listed again.
+    The listed commits are recorded as commits of the ref, see `summarize`.
+    The audits of the shards of a ref are tracked apart.
+
+    Args:
+        revision (str): The revision to audit.
+        validator (Validator): The validator.
+        store (ResultStore): The result store.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+        shard (Shard, optional): Audit only the commits of the shard. Defaults to None.
+        progress (bool, optional): Report the progress on stderr. Defaults to False.
+
+    Returns:
+        dict: The partial report of the listed commits, see `reports`.
+    """
+    ref, tip = resolve(revision, git_dir)
+    rule_set = fingerprint(validator)
+    key = store_key(ref, shard)
+    last = store.get_tip(key, rule_set)
+    if last == tip:
+        return new_report(rule_set, [tip, f"^{last}"], shard and shard.spec)
+    checkpoint = store.get_checkpoint(key, rule_set)
+    # the recorded commits of the ref are those of the last tip and of the checkpointed run,
+    # if one of them isn't in the history anymore(e.g. a force push) the whole history is listed again
+    if (last and not is_ancestor(last, tip, git_dir)) or \
+            (checkpoint is not None and not is_ancestor(checkpoint.tip, tip, git_dir)):
+        store.reset(key, rule_set)
+        last = None
+    if checkpoint is not None and (checkpoint.tip, checkpoint.base) == (tip, last or ""):
+        try:
+            return _run(key, tip, last, checkpoint, validator, store, git_dir, shard, progress)
+        except ValueError:
+            # the listing changed since the checkpoint, start over
+            pass
+    return _run(key, tip, last, None, validator, store, git_dir, shard, progress)
+
+
+def summarize(revision: str, validator, store, git_dir: str = None, shard: Shard = None, since: int = None) -> tuple:
+    """
+    Count the indexed commits of an audited revision.
+
+    Args:
+        revision (str): The audited revision.
+        validator (Validator): The validator.
+        store (ResultStore): The result store.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+        shard (Shard, optional): The audited shard. Defaults to None.
+        since (int, optional): Count only the commits authored since the unix timestamp. Defaults to None.
+
+    Raises:
+        subprocess.CalledProcessError: If the revision is unknown.
+
+    Returns:
+        tuple: The number of the indexed commits, of the failed ones and the failed commits by rule.
+    """
+    key = store_key(resolve(revision, git_dir)[0], shard)
+    rule_set = fingerprint(validator)
+    indexed, failed = store.count(rule_set, since, key)
+    return indexed, failed, store.violations_by_rule(rule_set, since, key)
+
+
+def _run(key: str, tip: str, last: str, checkpoint: Checkpoint, validator, store, git_dir: str, shard: Shard,
+         progress: bool) -> dict:
+    revisions = [tip] + ([f"^{last}"] if last else [])
+    rule_set = fingerprint(validator)
+    report = checkpoint.aggregates if checkpoint is not None else new_report(rule_set, revisions, shard and shard.spec)
+    done = checkpoint.processed if checkpoint is not None else 0
+    total = count_commits(revisions, git_dir) if progress and shard is None else None
+    reporter = Progress(total, done) if progress else None
+
+    def save(results):
+        nonlocal done
+        done += len(results)
+        add_results(report, results)
+        return Checkpoint(key, tip, last or "", done, results[-1].sha, report)
+
+    results = check_revisions(revisions, validator, store, git_dir, shard, skip=done,
+                              skip_to=checkpoint.last_sha if checkpoint is not None else None, checkpoint=save)
+    for _ in results:
+        if reporter is not None:
+            reporter.update()
+    if reporter is not None:
+        reporter.finish()
+    store.set_tip(key, rule_set, tip)
+    return report
+
+
+def describe(estimated: dict) -> str:
+    """
+    Describe a sampled estimate.
+
+    Args:
+        estimated (dict): The estimate, see `sample.estimate`.
+
+    Returns:
+        str: The failure rates with their intervals, a line per rule.
+    """
+    def rate(interval):
+        return f"{interval['rate']:.1%} ({interval['low']:.1%} - {interval['high']:.1%})"
+
+    lines = [f"sampled {estimated['sampled']} of {estimated['commits']} commits, "
+             f"{rate(estimated['failed'])} failed at {estimated['confidence']:.0%} confidence"]
+    lines += [f"  {rule:<14} {rate(interval)}" for rule, interval in estimated["rules"].items()]
+    return "\n".join(lines)
+
+
+def parse_date(value: str) -> int:
+    """
+    Parse the `--since` date.
+
+    Args:
+        value (str): The date in the ISO format, e.g. `2024-01-01`, UTC if no offset is given.
+
+    Raises:
+        argparse.ArgumentTypeError: If the date is invalid.
+
+    Returns:
+        int: The unix timestamp.
+    """
+    try:
+        date = datetime.strptime(value, "%Y-%m-%d") if len(value) == 10 else datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {value}, use YYYY-MM-DD")
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return int(date.timestamp())
+
+
+def main(argv: list = None):
+    """
+    Extract arguments from command line, index the new commits and report the violations.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    from . import cli
+    from .config import ConfigError, load_policy
+    parser = argparse.ArgumentParser(prog="commit-msg-hook audit",
+                                     description="index the commit messages of the history and report the violations")
+    parser.add_argument("revision", nargs="?", default="HEAD", help="the revision to audit(default HEAD)")
+    parser.add_argument("--since", type=parse_date, help="report the commits authored since the date(YYYY-MM-DD)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS),
+                        help="the imperative mood detection backend(overrides the repository config)")
+    parser.add_argument("--shard", type=parse_shard,
+                        help="audit only a shard of the commits, K/N or a range of object name prefixes, e.g. 00-3f")
+    parser.add_argument("--report", help="write the partial report of the listed commits to the path(- for stdout)")
+    parser.add_argument("--stats", action="store_true",
+                        help="print the violation rates per week and the top non-imperative words and offending paths")
+    parser.add_argument("--csv", action="store_true", help="print the stats as CSV instead of JSON")
+    parser.add_argument("--top", type=int, default=TOP_K, help=f"the number of the top words and paths(default {TOP_K})")
+    parser.add_argument("--sample", type=int, metavar="SIZE",
+                        help="estimate the failure rates from a random sample of the commits of the given size")
+    parser.add_argument("--stratify", choices=STRATA, help="sample every week, month or year of the history in proportion")
+    parser.add_argument("--seed", type=int, help="the seed of the sample, for a reproducible estimate")
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE,
+                        help=f"the confidence level of the intervals(default {DEFAULT_CONFIDENCE})")
+    parser.add_argument("--no-progress", action="store_true",
+                        help="don't report the progress on stderr(reported if stderr is a terminal)")
+    args = parser.parse_args(argv)
+    try:
+        settings = load_policy().resolve()
+    except ConfigError as error:
+        parser.error(str(error))
+    backend = cli.select_backend(args.backend or settings.get("backend"))
+    validator = cli.select_validator(backend, cli.select_rules(settings.get("rules")), settings)
+    store = open_store()
+    if store is None:
+        print(f"\n{RED}error:\tcan't open the index, run the audit in a writable git repository{OFF}\n")
+        sys.exit(2)
+    if args.sample is not None and args.sample < 1:
+        parser.error("argument --sample: the size must be positive")
+    if not 0 < args.confidence < 1:
+        parser.error("argument --confidence: the level must be between 0 and 1")
+    if args.sample:
+        try:
+            estimated = estimate([args.revision], args.sample, validator, store, period=args.stratify, seed=args.seed,
+                                 shard=args.shard, since=args.since, confidence=args.confidence)
+        except subprocess.CalledProcessError as error:
+            print(f"\n{RED}error:\tgit failed: {' '.join(error.cmd)}{OFF}\n")
+            sys.exit(2)
+        finally:
+            store.close()
+        print(json.dumps(estimated) if args.json else describe(estimated))
+        sys.exit(0)
+    if args.stats:
+        try:
+            stats = collect([args.revision], validator, store, shard=args.shard, since=args.since)
+        except (subprocess.CalledProcessError, ValueError) as error:
+            print(f"\n{RED}error:\tgit failed: {error}{OFF}\n")
+            sys.exit(2)
+        finally:
+            store.close()
+        if args.csv:
+            sys.stdout.write(stats.to_csv(args.top))
+        else:
+            print(json.dumps(stats.to_dict(args.top)))
+        sys.exit(0)
+    try:
+        audited = audit(args.revision, validator, store, shard=args.shard,
+                        progress=not args.no_progress and sys.stderr.isatty())
+        indexed, failed, by_rule = summarize(args.revision, validator, store, shard=args.shard, since=args.since)
+    except subprocess.CalledProcessError as error:
+        print(f"\n{RED}error:\tgit failed: {' '.join(error.cmd)}{OFF}\n")
+        sys.exit(2)
+    finally:
+        store.close()
+    if args.report:
+        write(audited, args.report)
+        if args.report == "-":
+            sys.exit(0)
+    if args.json:
+        print(json.dumps({"listed": audited["commits"], "listed_failed": audited["failed"], "commits": indexed,
+                          "failed": failed, "violations": by_rule}))
+    else:
+        print(f"listed {audited['commits']} new commits({audited['failed']} failed), "
+              f"{failed} of {indexed} indexed commits failed")
+        for rule, count in by_rule.items():
+            print(f"  {rule:<14} {count}")
+    sys.exit(0)
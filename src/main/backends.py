@@ -0,0 +1,546 @@
+"""Imperative mood detection backends.
+
+Every backend tags the words of a message as if it was preceded by the pronoun `I`,
+so a verb in the imperative mood gets the `VB`/`VBP` tag and the other forms
+get `VBZ`, `VBD` or `VBG`.
+The backends trade accuracy for latency and memory:
+
+* `nltk` - the full NLTK tokenizer and averaged perceptron tagger
+* `pruned` - the NLTK tagger weights pruned to the features the check uses, loaded without NLTK
+* `lexicon` - the compact lexicon with suffix rules
+* `heuristic` - the suffix rules only
+"""
+
+import os
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
+
+from . import lexicon
+from .config import cache_dir
+from .resources import read_text
+
+WORD_PATTERN = re.compile(r"\w+(?:'\w+)?|[^\w\s]")
+
+REFERENCE_FILE = "data/reference.txt"
+PRUNED_MODEL_FILE = "pruned-tagger.json"
+
+# features of the perceptron tagger that depend on the context of the first word of `I <message>`
+PRUNED_FEATURES = {"bias", "i-1 tag PRP", "i-2 tag -START-", "i tag+i-2 tag PRP -START-",
+                   "i-1 word i", "i-1 suffix i", "i-2 word -START2-"}
+PRUNED_PREFIXES = ("i suffix ", "i pref1 ", "i word ", "i-1 tag+i word PRP ",
+                   "i+1 word ", "i+1 suffix ", "i+2 word ")
+
+_nltk = None
+
+
+def import_nltk():
+    """
+    Import NLTK.
+
+    The import is deferred to the first use of the `nltk` backend,
+    so the other backends never pay for it.
+
+    Returns:
+        module: The imported `nltk` module.
+    """
+    global _nltk
+    if _nltk is None:
+        import nltk
+        _nltk = nltk
+    return _nltk
+
+
+def load_nltk():
+    """
+    Import NLTK and make sure the tokenizer and tagger data are available.
+
+    Returns:
+        module: The imported `nltk` module.
+    """
+    nltk = import_nltk()
+    try:
+        nltk.data.find("tokenizers/punkt")
+    except LookupError:
+        nltk.download("punkt")
+    try:
+        nltk.data.find("taggers/averaged_perceptron_tagger")
+    except LookupError:
+        nltk.download("averaged_perceptron_tagger")
+    return nltk
+
+
+class Backend:
+    """The common interface of the imperative mood detection backends.
+
+    Attributes:
+        name (str): The name to select the backend in the config and on the command line.
+        cost (str): The relative cost of a call: `negligible`, `low`, `medium` or `high`.
+        footprint (str): The memory the backend loads on top of the interpreter.
+        requires_nltk (bool): Whether the backend imports NLTK.
+    """
+
+    name = ""
+    cost = ""
+    footprint = ""
+    requires_nltk = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # held while a loading is started, not while it runs
+        self._starting = threading.Lock()
+        self._loaded = not self.load_steps()
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def load_steps(self) -> list:
+        """List the steps of loading the model of the backend.
+
+        The loading may be abandoned between the steps, so every step must be idempotent.
+
+        Returns:
+            list: The callables to run in order(empty if the backend has no model).
+        """
+        return []
+
+    def load(self, cancelled: threading.Event = None) -> bool:
+        """Load the model of the backend exactly once.
+
+        Concurrent callers wait for the one that loads the model.
+
+        Args:
+            cancelled (threading.Event, optional): Abandon the loading between the steps once set. Defaults to None.
+
+        Returns:
+            bool: Whether the model is loaded.
+        """
+        if self._loaded:
+            return True
+        with self._lock:
+            if not self._loaded:
+                for step in self.load_steps():
+                    if cancelled is not None and cancelled.is_set():
+                        return False
+                    step()
+                self._loaded = True
+        return True
+
+    def preload(self) -> threading.Thread:
+        """Start loading the model on a background thread.
+
+        The thread is a daemon, so an abandoned load never holds up the exit of the hook.
+
+        Returns:
+            threading.Thread: The started thread.
+        """
+        with self._starting:
+            return self._start_preload()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait for the background loading of the model, start it again if not started yet or cancelled.
+
+        Args:
+            timeout (float, optional): The seconds to wait, unbounded if None. Defaults to None.
+
+        Returns:
+            bool: Whether the model is loaded, False if the loading failed or is still running.
+        """
+        if self._loaded:
+            return True
+        with self._starting:
+            # the concurrent callers wait for the same loading
+            thread = self._start_preload() if self._thread is None or self._cancelled.is_set() else self._thread
+        thread.join(timeout)
+        return self._loaded
+
+    def loading(self) -> bool:
+        """Check whether the model is still being loaded in the background.
+
+        Returns:
+            bool: True if the loading thread is running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def cancel_preload(self):
+        """Abandon the background loading of the model at the next step."""
+        self._cancelled.set()
+
+    def _start_preload(self) -> threading.Thread:
+        # every loading has its own flag, a cancelled one doesn't cancel the next
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._preload, args=(self._cancelled,), name=f"preload-{self.name}",
+                                        daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _preload(self, cancelled: threading.Event):
+        try:
+            self.load(cancelled)
+        except Exception:
+            # the rule waiting for the model loads it again on its own thread, which raises the error
+            pass
+
+    def tag(self, msg: str) -> list:
+        """Tag the words of the message as if it was preceded by the pronoun `I`.
+
+        Args:
+            msg (str): The part of commit mesage(subject line or body).
+
+        Returns:
+            list: The `(word, tag)` pairs of the words of the message.
+        """
+        raise NotImplementedError
+
+    def tag_many(self, msgs: list) -> list:
+        """Tag the words of many messages.
+
+        The built-in backends tag the messages one by one, a backend with a model tagging
+        a batch at once overrides it.
+
+        Args:
+            msgs (list): The parts of commit mesages.
+
+        Returns:
+            list: The `(word, tag)` pairs of every message.
+        """
+        return [self.tag(msg) for msg in msgs]
+
+
+class BatchingBackend(Backend):
+    """Coalesce the concurrent tagging calls into batches of another backend.
+
+    The calls are queued and tagged on a single worker thread,
+    every batch takes all the calls queued while the previous one was tagged,
+    so a lone call isn't delayed and the model is never used concurrently.
+    A batch is faster than its calls only if the backend overrides `tag_many`.
+    """
+
+    def __init__(self, backend: Backend, max_batch: int = 256):
+        super().__init__()
+        self.backend = backend
+        self.name = backend.name
+        self.cost = backend.cost
+        self.footprint = backend.footprint
+        self.requires_nltk = backend.requires_nltk
+        self.max_batch = max_batch
+        self.batches = 0
+        self.batched = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._work, name=f"batch-{self.name}", daemon=True)
+        self._worker.start()
+
+    def load(self, cancelled: threading.Event = None) -> bool:
+        return self.backend.load(cancelled)
+
+    def preload(self) -> threading.Thread:
+        return self.backend.preload()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.backend.wait(timeout)
+
+    def loading(self) -> bool:
+        return self.backend.loading()
+
+    def cancel_preload(self):
+        self.backend.cancel_preload()
+
+    def tag(self, msg: str) -> list:
+        slot = [threading.Event(), None, None]
+        self._queue.put((msg, slot))
+        slot[0].wait()
+        if slot[2] is not None:
+            raise slot[2]
+        return slot[1]
+
+    def _work(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                results = self.backend.tag_many([msg for msg, _ in batch])
+                for (_, slot), result in zip(batch, results):
+                    slot[1] = result
+            except Exception as error:
+                for _, slot in batch:
+                    slot[2] = error
+            self.batches += 1
+            self.batched += len(batch)
+            for _, slot in batch:
+                slot[0].set()
+
+
+class NltkBackend(Backend):
+    """The full NLTK tokenizer and averaged perceptron tagger."""
+
+    name = "nltk"
+    cost = "high"
+    footprint = "the NLTK package, the Punkt tokenizer and the full tagger model"
+    requires_nltk = True
+
+    def __init__(self):
+        super().__init__()
+        self.tagger = None
+
+    def load_steps(self) -> list:
+        return [import_nltk, load_nltk, self._load_tagger, self._load_tokenizer]
+
+    def tag(self, msg: str) -> list:
+        self.load()
+        return self.tagger.tag(["I"] + _nltk.word_tokenize(msg))[1:]
+
+    def _load_tagger(self):
+        if self.tagger is None:
+            from nltk.tag import PerceptronTagger
+            # `nltk.pos_tag` unpickles the model on every call, keep one instance instead
+            self.tagger = PerceptronTagger()
+
+    def _load_tokenizer(self):
+        # the Punkt model is unpickled and cached by the first call
+        _nltk.word_tokenize("I")
+
+
+class PrunedBackend(Backend):
+    """The NLTK tagger weights pruned to the features the check uses.
+
+    The pruned model is a plain JSON file, it's built once from the full NLTK model
+    and then loaded without importing NLTK.
+    The tagging is exact for the first word of a message, the later words
+    lose the features of their left context.
+    """
+
+    name = "pruned"
+    cost = "medium"
+    footprint = "the pruned tagger weights"
+
+    def __init__(self):
+        super().__init__()
+        self.model = None
+
+    def load_steps(self) -> list:
+        return [self._load_model]
+
+    def _load_model(self):
+        if self.model is None:
+            import json
+            try:
+                data = read_text("data/" + PRUNED_MODEL_FILE)
+            except FileNotFoundError:
+                path = os.path.join(cache_dir(), PRUNED_MODEL_FILE)
+                if not os.path.isfile(path):
+                    build_pruned_model(path)
+                with open(path, "r", encoding="utf-8") as file:
+                    data = file.read()
+            self.model = PerceptronModel(**json.loads(data))
+
+    def tag(self, msg: str) -> list:
+        self.load()
+        return self.model.tag(["I"] + WORD_PATTERN.findall(msg))[1:]
+
+
+class LexiconBackend(Backend):
+    """The compact lexicon with suffix rules."""
+
+    name = "lexicon"
+    cost = "low"
+    footprint = "the compact lexicon"
+
+    def load_steps(self) -> list:
+        return [lexicon.load_lexicon]
+
+    def tag(self, msg: str) -> list:
+        self.load()
+        return [(word, lexicon.tag_word(word)) for word in WORD_PATTERN.findall(msg)]
+
+
+class HeuristicBackend(Backend):
+    """The suffix rules only, every `-ing`, `-ed` and `-s` word is considered as not imperative."""
+
+    name = "heuristic"
+    cost = "negligible"
+    footprint = "none"
+
+    def tag(self, msg: str) -> list:
+        return [(word, _suffix_tag(word.lower())) for word in WORD_PATTERN.findall(msg)]
+
+
+class PerceptronModel:
+    """A minimal averaged perceptron tagger compatible with the NLTK model weights."""
+
+    START = ["-START-", "-START2-"]
+    END = ["-END-", "-END2-"]
+
+    def __init__(self, weights: dict, tagdict: dict, classes: list):
+        self.weights = weights
+        self.tagdict = tagdict
+        self.classes = classes
+
+    def tag(self, tokens: list) -> list:
+        """Tag the tokens the same way as `nltk.tag.PerceptronTagger.tag`.
+
+        Args:
+            tokens (list): The words to tag.
+
+        Returns:
+            list: The `(word, tag)` pairs.
+        """
+        prev, prev2 = self.START
+        context = self.START + [_normalize(word) for word in tokens] + self.END
+        tagged = []
+        for i, word in enumerate(tokens):
+            tag = self.tagdict.get(word)
+            if not tag:
+                tag = self.predict(_features(i, word, context, prev, prev2))
+            tagged.append((word, tag))
+            prev2 = prev
+            prev = tag
+        return tagged
+
+    def predict(self, features: list) -> str:
+        """Predict the tag of a word by its features.
+
+        Args:
+            features (list): The feature names of the word.
+
+        Returns:
+            str: The tag with the highest score.
+        """
+        scores = defaultdict(float)
+        for feature in features:
+            for label, weight in self.weights.get(feature, {}).items():
+                scores[label] += weight
+        return max(self.classes, key=lambda label: (scores[label], label))
+
+
+def build_pruned_model(path: str, min_weight: float = 0.0):
+    """Build the pruned tagger model from the full NLTK one.
+
+    Keep only the features the first word of `I <message>` can have,
+    and optionally drop the weights with an absolute value less than `min_weight`.
+
+    Args:
+        path (str): The path to write the model to.
+        min_weight (float, optional): The smallest weight to keep. Defaults to 0.0.
+    """
+    import json
+    load_nltk()
+    from nltk.tag import PerceptronTagger
+    tagger = PerceptronTagger()
+    weights = {}
+    for feature, labels in tagger.model.weights.items():
+        if feature in PRUNED_FEATURES or feature.startswith(PRUNED_PREFIXES):
+            labels = {label: weight for label, weight in labels.items() if abs(weight) >= min_weight}
+            if labels:
+                weights[feature] = labels
+    model = {"weights": weights, "tagdict": tagger.tagdict, "classes": sorted(tagger.classes)}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(model, file, separators=(",", ":"))
+
+
+BACKENDS = {backend.name: backend for backend in (NltkBackend, PrunedBackend, LexiconBackend, HeuristicBackend)}
+DEFAULT_BACKEND = NltkBackend.name
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(name: str = None) -> Backend:
+    """Get the backend by its name.
+
+    The backends are created once per process, so their models are loaded once,
+    even if the first calls come from several threads.
+
+    Args:
+        name (str, optional): The name of the backend. Defaults to `DEFAULT_BACKEND`.
+
+    Raises:
+        KeyError: If there is no backend with the given name.
+
+    Returns:
+        Backend: The backend instance.
+    """
+    name = name or DEFAULT_BACKEND
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
+
+
+def load_reference() -> list:
+    """Load the reference corpus.
+
+    Returns:
+        list: The `(message, is_imperative)` pairs.
+    """
+    corpus = []
+    data = read_text(REFERENCE_FILE)
+    for line in data.splitlines():
+        if line.strip() and not line.startswith("#"):
+            label, msg = line.split("\t", 1)
+            corpus.append((msg, label == "ok"))
+    return corpus
+
+
+def benchmark(backend: Backend, check) -> dict:
+    """Measure the accuracy and the latency of a backend against the reference corpus.
+
+    Args:
+        backend (Backend): The backend to measure.
+        check (callable): The imperative check, called as `check(msg, backend=backend)`.
+
+    Returns:
+        dict: The `accuracy`, the `load` time and the mean `latency` per message in seconds.
+    """
+    corpus = load_reference()
+    start = time.perf_counter()
+    backend.load()
+    loaded = time.perf_counter()
+    correct = sum((not check(msg, backend=backend)) == expected for msg, expected in corpus)
+    done = time.perf_counter()
+    return {"accuracy": correct / len(corpus), "load": loaded - start, "latency": (done - loaded) / len(corpus)}
+
+
+def _suffix_tag(word: str) -> str:
+    if word.endswith("ing") and len(word) > 4:
+        return "VBG"
+    if word.endswith("ed") and len(word) > 3:
+        return "VBD"
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return "VBZ"
+    return ""
+
+
+def _normalize(word: str) -> str:
+    if "-" in word and word[0] != "-":
+        return "!HYPHEN"
+    if word.isdigit() and len(word) == 4:
+        return "!YEAR"
+    if word and word[0].isdigit():
+        return "!DIGITS"
+    return word.lower()
+
+
+def _features(i: int, word: str, context: list, prev: str, prev2: str) -> list:
+    i += 2
+    return [
+        "bias",
+        "i suffix " + word[-3:],
+        "i pref1 " + (word[0] if word else ""),
+        "i-1 tag " + prev,
+        "i-2 tag " + prev2,
+        "i tag+i-2 tag " + prev + " " + prev2,
+        "i word " + context[i],
+        "i-1 tag+i word " + prev + " " + context[i],
+        "i-1 word " + context[i - 1],
+        "i-1 suffix " + context[i - 1][-3:],
+        "i-2 word " + context[i - 2],
+        "i+1 word " + context[i + 1],
+        "i+1 suffix " + context[i + 1][-3:],
+        "i+2 word " + context[i + 2],
+    ]
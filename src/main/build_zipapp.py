@@ -0,0 +1,79 @@
+"""Build a self-contained single-file zipapp of the hook.
+
+The archive bundles the code, the lexicon and the pruned tagger model,
+so it runs with a bare python 3.11+ interpreter without NLTK or its data:
+
+    python -m main.build_zipapp dist/commit-msg-hook.pyz
+    python dist/commit-msg-hook.pyz .git/COMMIT_EDITMSG
+
+The files are stored without compression, so the data is read from the memory-mapped archive
+and the modules are precompiled, so the start doesn't pay for compiling them.
+Building the pruned model requires NLTK, pass `--no-model` to bundle the lexicon only.
+"""
+
+import argparse
+import compileall
+import os
+import shutil
+import sys
+import tempfile
+import zipapp
+
+from . import backends
+
+INTERPRETER = "/usr/bin/env python3"
+
+ENTRY_POINT = """import sys
+
+from main import backends
+from main.cli import main
+
+backends.DEFAULT_BACKEND = "{backend}"
+sys.exit(main())
+"""
+
+
+def build(target: str, model: bool = True, interpreter: str = INTERPRETER):
+    """
+    Build the zipapp.
+
+    Args:
+        target (str): The path of the archive.
+        model (bool, optional): Bundle the pruned tagger model and use it by default,
+            otherwise the lexicon backend is the default. Defaults to True.
+        interpreter (str, optional): The shebang interpreter. Defaults to `/usr/bin/env python3`.
+    """
+    with tempfile.TemporaryDirectory() as temp:
+        package = os.path.join(temp, __package__)
+        shutil.copytree(os.path.dirname(os.path.abspath(__file__)), package,
+                        ignore=shutil.ignore_patterns("__pycache__", "*.pyc", "*.pyz", ".DS_Store"))
+        if model:
+            backends.build_pruned_model(os.path.join(package, "data", backends.PRUNED_MODEL_FILE))
+        backend = backends.PrunedBackend.name if model else backends.LexiconBackend.name
+        with open(os.path.join(temp, "__main__.py"), "w", encoding="utf-8") as file:
+            file.write(ENTRY_POINT.format(backend=backend))
+        # zipimport only picks up the legacy `.pyc` layout next to the sources
+        compileall.compile_dir(temp, quiet=1, legacy=True)
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        zipapp.create_archive(temp, target, interpreter=interpreter, compressed=False)
+
+
+def main():
+    """
+    Extract arguments from command line and build the zipapp.
+    """
+    parser = argparse.ArgumentParser(description="build a single-file zipapp of commit-msg-hook")
+    parser.add_argument("target", type=str, help="the path of the archive")
+    parser.add_argument("--no-model", action="store_true",
+                        help="bundle the lexicon only, building the pruned model requires NLTK")
+    parser.add_argument("--python", type=str, default=INTERPRETER, help="the shebang interpreter")
+    args = parser.parse_args()
+    try:
+        build(args.target, not args.no_model, args.python)
+    except ImportError as error:
+        print(f"error: {error}, install NLTK or pass --no-model", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
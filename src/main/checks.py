@@ -0,0 +1,77 @@
+"""The cheap string checks of the commit rules.
+
+Every check gets a part of commit message(subject line or a line of the body)
+and returns the detected errors(empty in a case of no errors).
+"""
+
+import string
+
+from .colors import GREEN, ITALIC, OFF, RED
+
+MIN_WORDS = 2
+
+
+def check_meaningful(msg: str, min_words: int = MIN_WORDS) -> str:
+    """Check if a commit message less than `min_words` word.
+
+    If message contains less than `min_words` words, generate an appropriate error message.
+
+    Args:
+        msg (str): The part of commit mesage(subject line or body).
+        min_words (int, optional): The least number of words. Defaults to 2.
+
+    Returns:
+        str: The detected errors(empty in a case of no errors).
+    """
+    errors = ""
+    words = [word for word in msg.strip(string.punctuation).split() if word.strip(string.punctuation)]
+    if len(words) == 1 and min_words > 1:
+        errors += f"\n{RED}\
+error:\tone-word message  {GREEN}{ITALIC}{words[0]}{RED}  is not informative, please add more details{OFF}\n"
+    elif len(words) < min_words:
+        errors += f"\n{RED}\
+error:\tthe message  {GREEN}{ITALIC}{msg}{RED}  is too short, use at least {min_words} words{OFF}\n"
+    return errors
+
+
+def check_prefix(msg: str) -> str:
+    """Check if the prefix of the message is correct casefold.
+
+    If validation failed, generate an appropriate error message.
+
+    Args:
+        msg (str): The part of commit mesage(subject line or body).
+
+    Returns:
+        str: The detected errors(empty in a case of no errors).
+    """
+    errors = ""
+    # the leading punctuation(e.g. `--- wip`) isn't a word
+    words = msg.strip(string.punctuation + string.whitespace).split()
+    if not words:
+        return errors
+    first_word = words[0].strip(string.punctuation)
+    if first_word[0].islower():
+        errors += f"\n{RED}error:\tcapitalise the word  {GREEN}{ITALIC}{first_word}{OFF}\n"
+    if not first_word[1:].islower():
+        errors += f"\n{RED}\
+error:\tthe word  {GREEN}{ITALIC}{first_word}{RED}  must be in letter case and not uppercase or mixed{OFF}\n"
+    return errors
+
+
+def check_ending(msg: str) -> str:
+    """Check whether the message ends with a dot or not.
+
+    If the message ends with a dot, generate an appropriate error message.
+
+    Args:
+        msg (str): The part of commit mesage(subject line or body).
+
+    Returns:
+        str: The detected errors(empty in a case of no errors).
+    """
+    errors = ""
+    if msg != msg.strip(string.punctuation):
+        errors += f"\n{RED}\
+error:\tdo not end the line  {GREEN}{ITALIC}{msg}{RED}  with any punctuation character{OFF}\n"
+    return errors
@@ -0,0 +1,100 @@
+"""The classifier of the generated commit messages.
+
+Merges, reverts, `fixup!`/`squash!` commits and the commits of bots are written by tools,
+not by people, and fail the rules for no good reason. The classifier recognizes them
+with a single match of one precompiled pattern against the subject line(and of another one
+against the author), and every category gets its own policy:
+
+* `skip` - don't check the message at all
+* `cheap` - run only the cheap string checks, skip the rules requiring the model
+* `full` - check the message like any other
+"""
+
+import re
+
+from .config import ConfigError
+
+POLICY_SKIP = "skip"
+POLICY_CHEAP = "cheap"
+POLICY_FULL = "full"
+POLICIES = (POLICY_SKIP, POLICY_CHEAP, POLICY_FULL)
+
+# every category is a named group, so a single match tells the category by `lastgroup`
+SUBJECT_PATTERN = re.compile(
+    r"(?P<merge>Merge (?:branch|branches|remote-tracking branch|pull request|tag|commit|remote-tracking branches)\b"
+    r"|Merge [0-9a-f]{7,40}\b)"
+    r"|(?P<revert>(?:Revert|Reapply) \")"
+    r"|(?P<fixup>(?:fixup|amend)! )"
+    r"|(?P<squash>squash! )"
+)
+BOT_AUTHORS = [r"\[bot\]", r"^dependabot\b", r"^renovate\b"]
+
+CATEGORIES = ("merge", "revert", "fixup", "squash", "bot")
+DEFAULT_CATEGORIES = {category: POLICY_SKIP for category in CATEGORIES}
+
+
+class Classifier:
+    """
+    Recognize the generated commit messages.
+
+    Attributes:
+        policies (dict): The policy of every category.
+        bot_authors (re.Pattern): The pattern matching the names and emails of the bots.
+    """
+
+    def __init__(self, categories: dict = None, bot_authors: list = None):
+        """
+        Compile the classifier.
+
+        Args:
+            categories (dict, optional): The policies overriding the default ones, by category.
+            bot_authors (list, optional): The extra regular expressions matching the authors of the bots.
+
+        Raises:
+            ConfigError: If a category, a policy or a pattern is invalid.
+        """
+        self.policies = dict(DEFAULT_CATEGORIES)
+        for category, policy in (categories or {}).items():
+            if category not in CATEGORIES:
+                raise ConfigError(f"unknown message category {category}, choose one of: {', '.join(CATEGORIES)}")
+            if policy not in POLICIES:
+                raise ConfigError(f"unknown policy {policy} of the {category} messages, "
+                                  f"choose one of: {', '.join(POLICIES)}")
+            self.policies[category] = policy
+        try:
+            self.bot_authors = re.compile("|".join(f"(?:{pattern})" for pattern in BOT_AUTHORS + list(bot_authors or [])),
+                                          re.IGNORECASE)
+        except re.error as error:
+            raise ConfigError(f"invalid pattern in `bot_authors`: {error}")
+
+    def classify(self, msg: str, author: str = None) -> str:
+        """
+        Recognize the category of a commit message.
+
+        Args:
+            msg (str): The commit message.
+            author (str, optional): The author as `Name <email>`, if known.
+
+        Returns:
+            str: The category, None if the message is written by a person.
+        """
+        match = SUBJECT_PATTERN.match(msg)
+        if match:
+            return match.lastgroup
+        if author and self.bot_authors.search(author):
+            return "bot"
+        return None
+
+    def policy(self, msg: str, author: str = None) -> str:
+        """
+        Get the policy for a commit message.
+
+        Args:
+            msg (str): The commit message.
+            author (str, optional): The author as `Name <email>`, if known.
+
+        Returns:
+            str: `skip`, `cheap` or `full`.
+        """
+        category = self.classify(msg, author)
+        return POLICY_FULL if category is None else self.policies[category]
@@ -6,258 +6,354 @@ the chaos-hub team commit rules.
 """
 
 import argparse
-import string
+import importlib
+import os
 import sys
+import time
+
+from . import backends, git, rules
+from .colors import BLUE, CAYAN, OFF, RED, YELLOW
+from .config import ConfigError, load_policy
+from .rules import Budget
+from .validator import Validator
 
-import nltk
-
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt")
-try:
-    nltk.data.find("taggers/averaged_perceptron_tagger")
-except LookupError:
-    nltk.download("averaged_perceptron_tagger")
-
-OFF = "\033[0m"
-ITALIC = "\033[3m"
-WHITE = OFF + "\033[97m"
-BLACK = OFF + "\033[30m"
-RED = OFF + "\033[31m"
-GREEN = OFF + "\033[32m"
-YELLOW = OFF + "\033[33m"
-BLUE = OFF + "\033[34m"
-MAGENTA = OFF + "\033[35m"
-CAYAN = OFF + "\033[36m"
-DEFAULT = OFF + "\033[39m"
-
-FILLER = OFF + "\033[;7m"
-WHITEFONE = FILLER + "\033[37m"
-BLACKFONE = FILLER + "\033[30m"
-REDFONE = FILLER + "\033[31m"
-BLUEFONE = FILLER + "\033[34m"
-GREENFONE = FILLER + "\033[32m"
-VIOLETFONE = FILLER + "\033[35m"
-YELLOWFONE = FILLER + "\033[33m"
-
-MIN_WORDS = 2
 COMMIT_EDITMSG = ".git/COMMIT_EDITMSG"
 GITHUB_LINK = "https://github.com/dimaka-wix/commit-msg-hook/blob/main/README.md#commit-rules"
 
 HINT = f"\n{YELLOW}hint:\tread the convention on: {BLUE}{GITHUB_LINK}{OFF}\n"
 
-
-def main():
+# the subcommands, imported only when invoked
+COMMANDS = {
+    "zygote": f"{__package__}.zygote:main",
+    "http": f"{__package__}.service:main",
+    "check-range": f"{__package__}.history:main",
+    "pre-receive": f"{__package__}.receive:main",
+    "post-rewrite": f"{__package__}.rewrite:main",
+    "rebase-todo": f"{__package__}.rebase:main",
+    "audit": f"{__package__}.audit:main",
+    "merge-reports": f"{__package__}.reports:main",
+    "audit-repos": f"{__package__}.repos:main",
+}
+# the socket of a running zygote to forward the hook runs to
+ZYGOTE_ENV = "COMMIT_MSG_HOOK_ZYGOTE"
+
+
+def main(argv: list = None):
     """
     Perform validations of the commit message.
 
-    Extract arguments from command line and run the hook logic
+    Extract arguments from command line and run the hook logic,
+    or dispatch to a subcommand if the first argument names one.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
     """
+    start = time.monotonic()
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        module, _, function = COMMANDS[argv[0]].partition(":")
+        return getattr(importlib.import_module(module), function)(argv[1:])
+    if os.environ.get(ZYGOTE_ENV):
+        from .zygote import request
+        code = request(os.environ[ZYGOTE_ENV], argv)
+        if code is not None:
+            sys.exit(code)
     parser = argparse.ArgumentParser()
-    parser.add_argument("path", nargs="?", type=str, default=COMMIT_EDITMSG,
-                        help="the path of commit message file")
-    args = parser.parse_args()
-    msg = read_msg(args.path)
-    if not msg.strip():
-        print(f"ֿ\n{RED}error:\tcommit message can't be empty{OFF}\n")
+    parser.add_argument("paths", nargs="*", type=str, metavar="path",
+                        help="the paths of commit message files(the message of the commit being made by default)")
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS),
+                        help="the imperative mood detection backend(overrides the repository config)")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="check the imperative mood with a compact lexicon instead of loading NLTK")
+    parser.add_argument("--benchmark-backends", action="store_true",
+                        help="measure all the backends against the reference corpus and exit")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="stop at the first line with errors")
+    parser.add_argument("--budget-ms", type=int,
+                        help="skip the checks that can't finish within the given milliseconds"
+                             "(overrides the repository config)")
+    parser.add_argument("--report-rss", action="store_true",
+                        help="print the peak resident set size of the hook on exit")
+    args = parser.parse_args(argv)
+    args.paths = args.paths or [git.commit_editmsg() or COMMIT_EDITMSG]
+    if args.benchmark_backends:
+        benchmark_backends()
+        sys.exit(0)
+    try:
+        settings = load_settings()
+        backend = select_backend(args.backend or settings.get("backend"), args.low_memory)
+        enabled_rules = select_rules(settings.get("rules"))
+        budget = Budget(args.budget_ms if args.budget_ms is not None else settings.get("budget_ms"), start)
+        validator = select_validator(backend, enabled_rules, settings, args.fail_fast)
+        # hide the model loading behind reading the message and the cheap checks
+        validator.preload()
+        if len(args.paths) > 1:
+            run_hooks(args.paths, validator, budget, commit_author())
+        msg = read_msg(args.paths[0])
+        if not msg.strip():
+            print(f"ֿ\n{RED}error:\tcommit message can't be empty{OFF}\n")
+            sys.exit(1)
+        run_hook(msg, validator, budget, commit_author())
+    finally:
+        if args.report_rss:
+            print(f"{YELLOW}info:\tpeak RSS {peak_rss()}{OFF}", file=sys.stderr)
+
+
+def load_settings() -> dict:
+    """
+    Load the repository settings that apply to the commit.
+
+    The staged paths are listed only if the policy has per-path overrides or nested configs.
+    If the config is invalid, abort commit(exit nonzero) and display appropriate error.
+
+    Returns:
+        dict: The settings.
+    """
+    try:
+        policy = load_policy()
+        paths = None
+        if policy.needs_paths:
+            paths = git.staged_paths()
+            policy = load_policy(paths=paths)
+        return policy.resolve(paths)
+    except ConfigError as error:
+        print(f"\n{RED}error:\t{error}{OFF}\n")
         sys.exit(1)
-    run_hook(msg)
 
 
-def read_msg(path: str) -> str:
+def select_backend(name: str = None, low_memory: bool = False) -> backends.Backend:
     """
-    Extract commit message content.
+    Select the imperative mood detection backend.
 
-    Try to read the message on the given path.
-    If fail, abort commit(exit nonzero), display appropriate error and hint
+    In the low-memory mode the backends that load NLTK or a tagger model are replaced with the lexicon one.
+    If the name is invalid, abort commit(exit nonzero) and display appropriate error.
 
     Args:
-        path (str): The path of the file with commit message
+        name (str, optional): The backend given on the command line or in the config. Defaults to `nltk`.
+        low_memory (bool, optional): Never load NLTK or a tagger model. Defaults to False.
     Returns:
-        str: The commit message.
+        backends.Backend: The selected backend.
     """
     try:
-        with open(path, "r", encoding="utf-8") as file:
-            msg = file.read()
-            # cut the commented text
-            msg = msg.split("#", 1)[0]
-    except FileNotFoundError:
-        print(f"\n{RED}\
-error:\tthe path  {CAYAN}{path}  not found!\n{YELLOW}\
-hint:\tthe commit message is usually stored in  {CAYAN}{COMMIT_EDITMSG}{OFF}\n")
+        name = name or backends.DEFAULT_BACKEND
+        if name not in backends.BACKENDS:
+            raise ConfigError(f"unknown backend {name}, choose one of: {', '.join(sorted(backends.BACKENDS))}")
+    except ConfigError as error:
+        print(f"\n{RED}error:\t{error}{OFF}\n")
         sys.exit(1)
-    return msg
+    if low_memory and name in (backends.NltkBackend.name, backends.PrunedBackend.name):
+        name = backends.LexiconBackend.name
+    return backends.get_backend(name)
 
 
-def run_hook(msg: str):
+def select_rules(names: list = None) -> list:
     """
-    Run the main logic of the hook.
+    Select the enabled rules.
 
-    If one of the validations failed, abort commit(exit nonzero), display appropriate errors and hints.
-    Otherwise exit zero and allow the `git commit` command.
+    If one of the rules is unknown, abort commit(exit nonzero) and display appropriate error.
 
     Args:
-        msg (str): The commit message to validate.
+        names (list, optional): The `rules` setting of the config. Defaults to all the built-in rules.
+    Returns:
+        list: The enabled rules.
     """
-    global default_prefixes
-    subj_line_errors = validate_subj_line(msg)
-    body_errors = validate_body(msg)
-    if subj_line_errors or body_errors:
-        print(subj_line_errors + body_errors + HINT)
+    try:
+        return rules.resolve_rules(names)
+    except ConfigError as error:
+        print(f"\n{RED}error:\t{error}{OFF}\n")
         sys.exit(1)
-    sys.exit(0)
 
 
-def validate_subj_line(msg: str) -> str:
+def select_validator(backend: backends.Backend, enabled_rules: list, settings: dict,
+                     fail_fast: bool = False) -> Validator:
     """
-    Validate the subject line of a commit message.
+    Create the validator of the commit message.
 
-    Slice subject line of commit message and validate it according to chaos-hub team commit rules
+    If the message categories of the config are invalid, abort commit(exit nonzero) and display appropriate error.
 
     Args:
-        msg (str): The commit message
+        backend (backends.Backend): The imperative mood detection backend.
+        enabled_rules (list): The enabled rules.
+        settings (dict): The repository settings.
+        fail_fast (bool, optional): Stop at the first line with errors. Defaults to False.
     Returns:
-        str: The detected errors(empty in a case of no errors)
+        Validator: The validator.
     """
-    subject = msg.splitlines()[0]
-    meaningful_errors = check_meaningful(subject)
-    prefix_errors = check_prefix(subject)
-    imperatives_errors = check_for_imperative(subject)
-    ending_errors = check_ending(subject)
-    errors = meaningful_errors + prefix_errors + imperatives_errors + ending_errors
-    return errors
-
+    try:
+        return Validator(backend, enabled_rules, settings, fail_fast)
+    except ConfigError as error:
+        print(f"\n{RED}error:\t{error}{OFF}\n")
+        sys.exit(1)
 
-def validate_body(msg: str) -> str:
-    """Validate the body of a commit message.
 
-    Slice body of commit message and validate it according to chaos-hub team commit rules.
+def commit_author() -> str:
+    """
+    Get the author of the commit being made.
 
-    Args:
-        msg (str): The commit message
+    Only the `GIT_AUTHOR_NAME`/`GIT_AUTHOR_EMAIL` variables are read(e.g. set by the bots),
+    asking git would cost a process per commit.
 
     Returns:
-        str: The detected errors(empty in a case of no errors)
+        str: The author as `Name <email>`, None if unknown.
     """
-    errors = ""
-    if len(msg.splitlines()) > 1:
-        body = msg.splitlines()[1:]
-        if body[0].strip() != "":
-            errors += f"\n{RED}error:\tseparate the subject line from the message body with a blank line{OFF}\n"
-        for i in range(len(body)):
-            line_msg = body[i].strip()
-            if line_msg:
-                line_msg = remove_bullet(line_msg)
-                if line_msg:
-                    meaningful_errors = check_meaningful(line_msg)
-                    prefix_errors = check_prefix(line_msg)
-                    imperatives_errors = check_for_imperative(line_msg)
-                    ending_errors = check_ending(line_msg)
-                    errors += meaningful_errors + prefix_errors + imperatives_errors + ending_errors
-                else:
-                    errors += f"\n{RED}error:\tthe message body can't be empty{OFF}\n"
-    return errors
-
-
-def remove_bullet(body_line: str) -> str:
-    """Remove line bullet if exist.
-
-    Ex: get `* Fix bugs` return `Fix bugs`.
+    name = os.environ.get("GIT_AUTHOR_NAME", "")
+    email = os.environ.get("GIT_AUTHOR_EMAIL", "")
+    if not (name or email):
+        return None
+    return f"{name} <{email}>"
 
-    Args:
-        body_line (str): The single line of message body.
+
+def benchmark_backends():
+    """
+    Measure all the backends against the reference corpus and print the results.
+
+    The backends that can't be loaded(e.g. NLTK is not installed) are reported and skipped.
+    """
+    print(f"{'backend':<10} {'cost':<11} {'accuracy':>8} {'load':>10} {'latency':>10}  footprint")
+    for name in backends.BACKENDS:
+        backend = backends.get_backend(name)
+        try:
+            result = backends.benchmark(backend, rules.BUILTIN_RULES["imperative"].check)
+        except (ImportError, LookupError, OSError) as error:
+            print(f"{name:<10} {backend.cost:<11} {RED}unavailable: {error}{OFF}")
+            continue
+        print(f"{name:<10} {backend.cost:<11} {result['accuracy']:>8.1%} "
+              f"{result['load'] * 1000:>8.1f}ms {result['latency'] * 1e6:>8.1f}us  {backend.footprint}")
+
+
+def peak_rss() -> str:
+    """
+    Measure the peak resident set size of the current process.
 
     Returns:
-        str: The message without non-alpha characters at the beginning of the line.
+        str: The human readable peak RSS, or `unavailable` on platforms without `resource`.
     """
-    content = ""
-    if body_line:
-        for i in range(len(body_line)):
-            if body_line[i].isalpha():
-                content = body_line[i:]
-                break
-    return content
+    try:
+        import resource
+    except ImportError:
+        return "unavailable"
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        peak //= 1024
+    return f"{peak / 1024:.1f} MiB"
 
 
-def check_meaningful(msg: str) -> str:
-    """Check if a commit message less than 2 word.
+def read_msg(path: str) -> str:
+    """
+    Extract commit message content.
 
-    If message contains less than 2 words, generate an appropriate error message.
+    Try to read the message on the given path.
+    If fail, abort commit(exit nonzero), display appropriate error and hint
 
     Args:
-        msg (str): The part of commit mesage(subject line or body).
-
+        path (str): The path of the file with commit message
     Returns:
-        str: The detected errors(empty in a case of no errors).
+        str: The commit message.
     """
-    errors = ""
-    words = msg.strip(string.punctuation).split()
-    if len(words) < MIN_WORDS:
-        errors += f"\n{RED}\
-error:\tone-word message  {GREEN}{ITALIC}{words[0]}{RED}  is not informative, please add more details{OFF}\n"
-    return errors
+    try:
+        return load_msg(path)
+    except FileNotFoundError:
+        print(not_found_error(path))
+        sys.exit(1)
 
 
-def check_prefix(msg: str) -> str:
-    """Check if the prefix of the message is correct casefold.
+def load_msg(path: str) -> str:
+    """
+    Read the commit message on the given path.
 
-    If validation failed, generate an appropriate error message.
+    The message is decoded with `i18n.commitEncoding` and its comment lines
+    are removed according to `core.commentChar`, the git config is read without running git.
 
     Args:
-        msg (str): The part of commit mesage(subject line or body).
-
+        path (str): The path of the file with commit message
+    Raises:
+        FileNotFoundError: If there is no file on the path.
     Returns:
-        str: The detected errors(empty in a case of no errors).
+        str: The commit message without the commented text.
     """
-    errors = ""
-    first_word = msg.split()[0].strip(string.punctuation)
-    if first_word[0].islower():
-        errors += f"\n{RED}error:\tcapitalise the word  {GREEN}{ITALIC}{first_word}{OFF}\n"
-    if not first_word[1:].islower():
-        errors += f"\n{RED}\
-error:\tthe word  {GREEN}{ITALIC}{first_word}{RED}  must be in letter case and not uppercase or mixed{OFF}\n"
-    return errors
+    with open(path, "rb") as file:
+        data = file.read()
+    config = git.read_config()
+    msg = data.decode(git.commit_encoding(config), "replace")
+    return git.strip_comments(msg, git.comment_char(config, msg))
 
 
-def check_for_imperative(msg: str, words_limit: int = 2) -> str:
-    """Check the given msg for imperative mood.
+def not_found_error(path: str) -> str:
+    """
+    Describe a missing commit message file.
 
     Args:
-        msg (str): The part of commit mesage(subject line or body).
-        words_limit (int, optional): Check first `words_limit - 1` words of the given message. Defaults to 2.
-
+        path (str): The path of the file with commit message
     Returns:
-        str: The detected errors(empty in a case of no errors).
+        str: The error and the hint.
     """
-    errors = ""
-    words = nltk.word_tokenize(msg)
-    # VBZ : Verb, 3rd person singular present, like "adds", "writes" etc.
-    # VBD : Verb, Past tense , like "added", "wrote" etc.
-    # VBG : Verb, Present participle, like "adding", "writing" ect.
-    for word, tag in nltk.pos_tag(["I"]+words)[1:words_limit]:
-        if word.endswith("ing") or tag.startswith("VBZ") or tag.startswith("VBD") or tag.startswith("VBG"):
-            errors += f"\n{RED}\
-error:\tthe word  {GREEN}{ITALIC}{word}{RED}  must be in imperative mood{OFF}\n"
-    return errors
+    return f"\n{RED}\
+error:\tthe path  {CAYAN}{path}  not found!\n{YELLOW}\
+hint:\tthe commit message is usually stored in  {CAYAN}{COMMIT_EDITMSG}{OFF}\n"
 
 
-def check_ending(msg: str) -> str:
-    """Check whether the message ends with a dot or not.
+def run_hook(msg: str, validator: Validator = None, budget: Budget = None, author: str = None):
+    """
+    Run the main logic of the hook.
 
-    If the message ends with a dot, generate an appropriate error message.
+    If one of the validations failed, abort commit(exit nonzero), display appropriate errors and hints.
+    Otherwise exit zero and allow the `git commit` command.
 
     Args:
-        msg (str): The part of commit mesage(subject line or body).
+        msg (str): The commit message to validate.
+        validator (Validator, optional): The validator. Defaults to the one with the built-in rules and `nltk`.
+        budget (Budget, optional): The latency budget, unbounded if None. Defaults to None.
+        author (str, optional): The author as `Name <email>`, to recognize the bots. Defaults to None.
+    """
+    validator = validator or Validator()
+    budget = budget or Budget()
+    errors = validator.validate(msg, budget, author)
+    warnings = budget.warnings()
+    if errors:
+        print(warnings + errors + HINT)
+        sys.exit(1)
+    if warnings:
+        print(warnings)
+    sys.exit(0)
 
-    Returns:
-        str: The detected errors(empty in a case of no errors).
+
+def run_hooks(paths: list, validator: Validator = None, budget: Budget = None, author: str = None):
     """
-    errors = ""
-    if msg != msg.strip(string.punctuation):
-        errors += f"\n{RED}\
-error:\tdo not end the line  {GREEN}{ITALIC}{msg}{RED}  with any punctuation character{OFF}\n"
-    return errors
+    Validate the commit messages of many files with one validator.
+
+    The errors are displayed per file, followed by a summary.
+    If one of the messages failed, exit nonzero, otherwise exit zero.
+
+    Args:
+        paths (list): The paths of the files with commit messages.
+        validator (Validator, optional): The validator. Defaults to the one with the built-in rules and `nltk`.
+        budget (Budget, optional): The latency budget of the whole run, unbounded if None. Defaults to None.
+        author (str, optional): The author as `Name <email>`, to recognize the bots. Defaults to None.
+    """
+    validator = validator or Validator()
+    budget = budget or Budget()
+    failed = 0
+    for path in paths:
+        try:
+            msg = load_msg(path)
+        except FileNotFoundError:
+            errors = not_found_error(path)
+        else:
+            if msg.strip():
+                errors = validator.validate(msg, budget, author)
+            else:
+                errors = f"\n{RED}error:\tcommit message can't be empty{OFF}\n"
+        if errors:
+            failed += 1
+            print(f"{CAYAN}{path}{OFF}{errors}")
+    warnings = budget.warnings()
+    if failed:
+        print(f"{warnings}\n{RED}error:\t{failed} of {len(paths)} commit messages failed{OFF}\n{HINT}")
+        sys.exit(1)
+    if warnings:
+        print(warnings)
+    sys.exit(0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+"""ANSI escape sequences to colorize the output of the hook."""
+
+OFF = "\033[0m"
+ITALIC = "\033[3m"
+WHITE = OFF + "\033[97m"
+BLACK = OFF + "\033[30m"
+RED = OFF + "\033[31m"
+GREEN = OFF + "\033[32m"
+YELLOW = OFF + "\033[33m"
+BLUE = OFF + "\033[34m"
+MAGENTA = OFF + "\033[35m"
+CAYAN = OFF + "\033[36m"
+DEFAULT = OFF + "\033[39m"
+
+FILLER = OFF + "\033[;7m"
+WHITEFONE = FILLER + "\033[37m"
+BLACKFONE = FILLER + "\033[30m"
+REDFONE = FILLER + "\033[31m"
+BLUEFONE = FILLER + "\033[34m"
+GREENFONE = FILLER + "\033[32m"
+VIOLETFONE = FILLER + "\033[35m"
+YELLOWFONE = FILLER + "\033[33m"
@@ -0,0 +1,293 @@
+"""Repository configuration of the hook.
+
+The configuration is stored in the `.commit-msg-hook.toml` file
+in the root folder of the repository, e.g.:
+
+    backend = "lexicon"
+    min_words = 3
+
+    [[overrides]]
+    paths = ["services/payments/*"]
+    words_limit = 3
+
+In a monorepo(`monorepo = true` in the root file) a team may keep its own
+`.commit-msg-hook.toml` in its folder, the settings of a nested file apply to the paths under the folder.
+The nested files are discovered along the paths of the staged changes.
+
+The files are parsed and validated once into a compiled `Policy`,
+which is cached on disk and reused while the files stay the same.
+"""
+
+import os
+import pickle
+import time
+import zlib
+
+from .git import repo_root
+
+CONFIG_FILE = ".commit-msg-hook.toml"
+POLICY_CACHE = "policies"
+# bump on any change of the `Policy` class to drop the stale caches
+POLICY_FORMAT = 2
+# a file modified that recently may change again within the same mtime tick
+RACY_SECONDS = 2
+
+SETTINGS = {
+    "monorepo": bool,
+    "backend": str,
+    "rules": list,
+    "budget_ms": int,
+    "min_words": int,
+    "words_limit": int,
+    "categories": dict,
+    "bot_authors": list,
+}
+
+
+class ConfigError(Exception):
+    """Raised when the repository configuration can't be read or is invalid."""
+
+
+class Policy:
+    """
+    The compiled repository configuration.
+
+    Attributes:
+        settings (dict): The settings that apply to the whole repository.
+        overrides (list): The `(pattern, settings)` pairs, the compiled pattern matches the paths
+            relative to the root folder the settings apply to.
+    """
+
+    def __init__(self, settings: dict = None, overrides: list = None):
+        self.settings = settings or {}
+        self.overrides = overrides or []
+
+    def resolve(self, paths: list = None) -> dict:
+        """
+        Get the settings for the given paths.
+
+        Every override matching any of the paths is applied on top of the repository settings,
+        in the order they are declared.
+
+        Args:
+            paths (list, optional): The paths relative to the root folder, e.g. of the staged changes.
+
+        Returns:
+            dict: The settings.
+        """
+        settings = dict(self.settings)
+        for pattern, override in self.overrides:
+            if paths and any(pattern.match(path) for path in paths):
+                settings.update(override)
+        return settings
+
+    @property
+    def needs_paths(self) -> bool:
+        """
+        Check whether the settings depend on the changed paths.
+
+        Returns:
+            bool: True if the policy has overrides or nested files may exist.
+        """
+        return bool(self.overrides) or bool(self.settings.get("monorepo"))
+
+
+def cache_dir() -> str:
+    """Get the folder for the files the hook caches between runs.
+
+    Returns:
+        str: The `commit-msg-hook` folder under `$XDG_CACHE_HOME`(`~/.cache` by default).
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "commit-msg-hook")
+
+
+def load_config(path: str = CONFIG_FILE) -> dict:
+    """Read a configuration file.
+
+    Args:
+        path (str, optional): The path of the configuration file. Defaults to `.commit-msg-hook.toml`.
+
+    Raises:
+        ConfigError: If the file exists but can't be parsed.
+
+    Returns:
+        dict: The configuration(empty in a case of no configuration file).
+    """
+    if not os.path.isfile(path):
+        return {}
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ConfigError(f"reading {path} requires python 3.11+ or the tomli package")
+    try:
+        with open(path, "rb") as file:
+            return tomllib.load(file)
+    except tomllib.TOMLDecodeError as error:
+        raise ConfigError(f"{path} is not a valid TOML file: {error}")
+
+
+def discover_configs(start: str = ".", paths: list = None) -> list:
+    """Find the configuration files that apply to the given folder and paths.
+
+    Args:
+        start (str, optional): The folder to start from. Defaults to the current one.
+        paths (list, optional): The paths relative to the root folder to discover the nested files along.
+
+    Returns:
+        list: The absolute paths of the files, the outer files before the nested ones.
+    """
+    start = os.path.abspath(start)
+    root = repo_root(start) or start
+    folders = [start] + [os.path.dirname(os.path.join(root, path)) for path in paths or []]
+    visited = set()
+    found = []
+    for folder in folders:
+        while folder not in visited and (folder == root or folder.startswith(root + os.sep)):
+            visited.add(folder)
+            config = os.path.join(folder, CONFIG_FILE)
+            if os.path.isfile(config):
+                found.append(config)
+            if folder == root:
+                break
+            folder = os.path.dirname(folder)
+    return sorted(found, key=lambda config: (config.count(os.sep), config))
+
+
+def compile_policy(sources: list, root: str) -> Policy:
+    """Parse and validate the configuration files into a policy.
+
+    Args:
+        sources (list): The paths of the files, the outermost first.
+        root (str): The root folder of the repository.
+
+    Raises:
+        ConfigError: If one of the files can't be parsed or is invalid.
+
+    Returns:
+        Policy: The compiled policy.
+    """
+    settings = {}
+    overrides = []
+    for source in sources:
+        config = load_config(source)
+        folder = os.path.relpath(os.path.dirname(source), root).replace(os.sep, "/")
+        folder = "" if folder == "." else folder + "/"
+        file_overrides = config.pop("overrides", [])
+        _validate(config, source)
+        if folder:
+            config.pop("monorepo", None)
+            overrides.append((_compile_patterns([folder + "*"]), config))
+        else:
+            settings.update(config)
+        if not isinstance(file_overrides, list):
+            raise ConfigError(f"{source}: `overrides` must be an array of tables")
+        for override in file_overrides:
+            if not isinstance(override, dict):
+                raise ConfigError(f"{source}: `overrides` must be an array of tables")
+            override = dict(override)
+            paths = override.pop("paths", None)
+            if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+                raise ConfigError(f"{source}: every override must have `paths`, an array of glob patterns")
+            _validate(override, source)
+            overrides.append((_compile_patterns([folder + path.lstrip("/") for path in paths]), override))
+    return Policy(settings, overrides)
+
+
+def load_policy(start: str = ".", paths: list = None) -> Policy:
+    """Load the policy for the given folder.
+
+    The compiled policy is cached on disk. A warm start only stats the configuration files,
+    the files are hashed if their mtime changed and parsed again only if their content changed.
+
+    Args:
+        start (str, optional): The folder to start the discovery from. Defaults to the current one.
+        paths (list, optional): The paths relative to the root folder to discover the nested files along.
+
+    Raises:
+        ConfigError: If one of the files can't be parsed or is invalid.
+
+    Returns:
+        Policy: The compiled policy(empty in a case of no configuration files).
+    """
+    sources = discover_configs(start, paths)
+    if not sources:
+        return Policy()
+    key = zlib.crc32("\0".join(sources).encode("utf-8", "surrogateescape"))
+    cache_path = os.path.join(cache_dir(), POLICY_CACHE, f"{key:08x}.pickle")
+    stamps = [_stamp(source) for source in sources]
+    cached = _read_cache(cache_path)
+    if cached is not None and cached["sources"] != sources:
+        cached = None
+    if cached is not None and all(stamps) and cached["stamps"] == stamps:
+        return cached["policy"]
+    digests = [_digest(source) for source in sources]
+    if cached is not None and cached["digests"] == digests:
+        policy = cached["policy"]
+    else:
+        policy = compile_policy(sources, repo_root(start) or os.path.dirname(sources[0]))
+    _write_cache(cache_path, {"format": POLICY_FORMAT, "sources": sources, "stamps": stamps, "digests": digests, "policy": policy})
+    return policy
+
+
+def _validate(settings: dict, source: str):
+    for key, value in settings.items():
+        if key not in SETTINGS:
+            raise ConfigError(f"{source}: unknown setting `{key}`, choose one of: {', '.join(SETTINGS)}")
+        expected = SETTINGS[key]
+        if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+            raise ConfigError(f"{source}: `{key}` must be of type {expected.__name__}")
+        if expected is int and value < 0:
+            raise ConfigError(f"{source}: `{key}` can't be negative")
+    if not all(isinstance(rule, str) for rule in settings.get("rules", [])):
+        raise ConfigError(f"{source}: `rules` must be an array of rule names")
+    if not all(isinstance(policy, str) for policy in settings.get("categories", {}).values()):
+        raise ConfigError(f"{source}: `categories` must map the message categories to policy names")
+    if not all(isinstance(pattern, str) for pattern in settings.get("bot_authors", [])):
+        raise ConfigError(f"{source}: `bot_authors` must be an array of regular expressions")
+
+
+def _compile_patterns(patterns: list):
+    import fnmatch
+    import re
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+
+def _stamp(path: str) -> tuple:
+    stat = os.stat(path)
+    if time.time() - stat.st_mtime < RACY_SECONDS:
+        # can't trust the mtime, force hashing on the next run
+        return None
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def _digest(path: str) -> str:
+    import hashlib
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def _read_cache(path: str) -> dict:
+    try:
+        with open(path, "rb") as file:
+            cached = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(cached, dict) or cached.get("format") != POLICY_FORMAT:
+        return None
+    return cached
+
+
+def _write_cache(path: str, cached: dict):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as file:
+            pickle.dump(cached, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path)
+    except OSError:
+        # the cache is an optimization, a read-only home folder must not fail the hook
+        pass
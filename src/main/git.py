@@ -0,0 +1,318 @@
+"""Helpers to read the state of the git repository the hook runs in."""
+
+import os
+import re
+import threading
+
+DEFAULT_COMMENT_CHAR = "#"
+# the characters `core.commentChar = auto` picks from
+AUTO_COMMENT_CHARS = "#;@!$%^&|:"
+SCISSORS = "------------------------ >8 ------------------------"
+DEFAULT_ENCODING = "utf-8"
+CONFIG_ESCAPES = {"n": "\n", "t": "\t", "b": "\b"}
+# the nesting limit of `include.path`, the same as git's
+MAX_INCLUDE_DEPTH = 10
+
+_configs = {}
+_configs_lock = threading.Lock()
+
+
+def repo_root(start: str = ".") -> str:
+    """Find the root folder of the working tree.
+
+    Walk up from the given folder to the first one containing `.git`(a folder or a worktree file).
+
+    Args:
+        start (str, optional): The folder to start from. Defaults to the current one.
+
+    Returns:
+        str: The absolute path of the root folder, None if not in a git repository.
+    """
+    path = os.path.abspath(start)
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def staged_paths() -> list:
+    """List the paths of the changes staged for the commit.
+
+    The index is read without running git, `git diff --cached` is run only
+    for a repository in a format the reader doesn't support.
+
+    Returns:
+        list: The paths relative to the root folder(empty if git can't be run).
+    """
+    import struct
+    import zlib
+    from . import index
+    folder = git_dir()
+    if folder is None:
+        return []
+    try:
+        return index.staged_paths(folder)
+    except (OSError, ValueError, IndexError, struct.error, zlib.error):
+        pass
+    import subprocess
+    try:
+        output = subprocess.run(["git", "diff", "--cached", "--name-only", "-z"],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    return [path for path in output.decode("utf-8", "surrogateescape").split("\0") if path]
+
+
+def git_dir(start: str = ".") -> str:
+    """Find the git folder of the repository without running git.
+
+    `$GIT_DIR` is used if set, otherwise walk up from the given folder to the first `.git`.
+    A `.git` file(a worktree or a submodule) is followed to the folder it points to.
+
+    Args:
+        start (str, optional): The folder to start from. Defaults to the current one.
+
+    Returns:
+        str: The absolute path of the git folder, None if not in a git repository.
+    """
+    if os.environ.get("GIT_DIR"):
+        return os.path.abspath(os.environ["GIT_DIR"])
+    root = repo_root(start)
+    if root is None:
+        return None
+    path = os.path.join(root, ".git")
+    if os.path.isdir(path):
+        return path
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            content = file.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if not content.startswith("gitdir:"):
+        return None
+    return os.path.normpath(os.path.join(root, content[len("gitdir:"):].strip()))
+
+
+def common_dir(git_folder: str) -> str:
+    """Find the folder shared by all the worktrees of the repository.
+
+    Args:
+        git_folder (str): The git folder of the worktree.
+
+    Returns:
+        str: The absolute path of the common folder, the git folder itself if it's the main worktree.
+    """
+    try:
+        with open(os.path.join(git_folder, "commondir"), "r", encoding="utf-8") as file:
+            return os.path.normpath(os.path.join(git_folder, file.read().strip()))
+    except (OSError, UnicodeDecodeError):
+        return git_folder
+
+
+def commit_editmsg(start: str = ".") -> str:
+    """Get the path of the message of the commit being made.
+
+    The file is kept in the git folder of the worktree, which is not `.git`
+    in the linked worktrees and the submodules.
+
+    Args:
+        start (str, optional): The folder to start from. Defaults to the current one.
+
+    Returns:
+        str: The path of `COMMIT_EDITMSG`, None if not in a git repository.
+    """
+    folder = git_dir(start)
+    return None if folder is None else os.path.join(folder, "COMMIT_EDITMSG")
+
+
+def read_config(git_folder: str = None) -> dict:
+    """Read the git configuration of the repository without running git.
+
+    The system, global, repository and worktree files are read in the order git reads them,
+    followed by the `git -c` settings passed to the hooks in the environment.
+    `include.path` is followed, `includeIf` isn't.
+    The result is cached per git folder.
+
+    Args:
+        git_folder (str, optional): The git folder of the repository. Defaults to the current one.
+
+    Returns:
+        dict: The values by the lower-cased `section.key`(`section.subsection.key` keeps the subsection case),
+            the last value wins.
+    """
+    git_folder = git_folder or git_dir()
+    with _configs_lock:
+        if git_folder not in _configs:
+            _configs[git_folder] = _read_configs(git_folder)
+        return _configs[git_folder]
+
+
+def comment_char(config: dict, msg: str = "") -> str:
+    """Get the character(or the string) starting the comment lines of the commit message.
+
+    With `core.commentChar = auto` git picks a character the message doesn't start its lines with
+    and writes its comments at the end of the message, so it's the first one of the last line.
+
+    Args:
+        config (dict): The git configuration.
+        msg (str, optional): The raw commit message, to detect the `auto` character. Defaults to "".
+
+    Returns:
+        str: The comment character, `#` by default.
+    """
+    value = config.get("core.commentstring") or config.get("core.commentchar") or DEFAULT_COMMENT_CHAR
+    if value != "auto":
+        return value
+    lines = [line for line in msg.splitlines() if line.strip()]
+    if lines and lines[-1][0] in AUTO_COMMENT_CHARS:
+        return lines[-1][0]
+    return DEFAULT_COMMENT_CHAR
+
+
+def commit_encoding(config: dict) -> str:
+    """Get the encoding of the commit messages.
+
+    Args:
+        config (dict): The git configuration.
+
+    Returns:
+        str: The `i18n.commitEncoding`, `utf-8` by default or if python doesn't know the encoding.
+    """
+    import codecs
+    encoding = config.get("i18n.commitencoding") or DEFAULT_ENCODING
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return DEFAULT_ENCODING
+
+
+def strip_comments(msg: str, comment: str = DEFAULT_COMMENT_CHAR) -> str:
+    """Remove the comments from the commit message the way `git commit --cleanup=strip` does.
+
+    The lines starting with the comment character are removed,
+    and everything below the scissors line of `git commit --verbose` is cut.
+
+    Args:
+        msg (str): The raw commit message.
+        comment (str, optional): The comment character. Defaults to `#`.
+
+    Returns:
+        str: The commit message without the comments.
+    """
+    scissors = f"{comment} {SCISSORS}"
+    lines = []
+    for line in msg.splitlines(True):
+        if line.rstrip("\r\n") == scissors:
+            break
+        if not line.startswith(comment):
+            lines.append(line)
+    return "".join(lines)
+
+
+def _read_configs(git_folder: str) -> dict:
+    config = {}
+    if not os.environ.get("GIT_CONFIG_NOSYSTEM"):
+        _parse_config_file(os.environ.get("GIT_CONFIG_SYSTEM") or "/etc/gitconfig", config)
+    if os.environ.get("GIT_CONFIG_GLOBAL"):
+        _parse_config_file(os.environ["GIT_CONFIG_GLOBAL"], config)
+    else:
+        xdg = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+        _parse_config_file(os.path.join(xdg, "git", "config"), config)
+        _parse_config_file(os.path.join(os.path.expanduser("~"), ".gitconfig"), config)
+    if git_folder:
+        _parse_config_file(os.path.join(common_dir(git_folder), "config"), config)
+        if config.get("extensions.worktreeconfig", "").lower() in ("true", "yes", "on", "1"):
+            _parse_config_file(os.path.join(git_folder, "config.worktree"), config)
+    for i in range(int(os.environ.get("GIT_CONFIG_COUNT") or 0)):
+        key = os.environ.get(f"GIT_CONFIG_KEY_{i}")
+        if key:
+            config[_normalize_key(key)] = os.environ.get(f"GIT_CONFIG_VALUE_{i}", "")
+    if os.environ.get("GIT_CONFIG_PARAMETERS"):
+        import shlex
+        try:
+            parameters = shlex.split(os.environ["GIT_CONFIG_PARAMETERS"])
+        except ValueError:
+            parameters = []
+        for parameter in parameters:
+            key, separator, value = parameter.partition("=")
+            config[_normalize_key(key)] = value if separator else "true"
+    return config
+
+
+def _parse_config_file(path: str, config: dict, depth: int = 0):
+    try:
+        with open(path, "r", encoding="utf-8", errors="surrogateescape") as file:
+            text = file.read()
+    except OSError:
+        return
+    section = ""
+    lines = iter(text.splitlines())
+    for line in lines:
+        line = line.strip()
+        if line.startswith("["):
+            end = line.find("]")
+            if end < 0:
+                continue
+            section = _section_name(line[1:end])
+            line = line[end + 1:].strip()
+        if not line or line[0] in "#;":
+            continue
+        key, separator, value = line.partition("=")
+        key = key.strip().lower()
+        if not separator:
+            value = "true"
+        else:
+            value = value.lstrip()
+            # a trailing backslash outside of quotes continues the value on the next line
+            while value.endswith("\\") and not value.endswith("\\\\"):
+                value = value[:-1] + next(lines, "")
+            value = _parse_value(value)
+        name = f"{section}.{key}"
+        config[name] = value
+        if name == "include.path" and depth < MAX_INCLUDE_DEPTH:
+            include = os.path.expanduser(value)
+            _parse_config_file(os.path.join(os.path.dirname(path), include), config, depth + 1)
+
+
+def _section_name(header: str) -> str:
+    name, _, subsection = header.strip().partition(" ")
+    subsection = subsection.strip()
+    if subsection.startswith('"') and subsection.endswith('"'):
+        subsection = re.sub(r"\\(.)", r"\1", subsection[1:-1])
+        return f"{name.lower()}.{subsection}"
+    # the deprecated `[section.subsection]` syntax is case-insensitive
+    return header.strip().lower()
+
+
+def _parse_value(raw: str) -> str:
+    value = ""
+    spaces = ""
+    quoted = False
+    i = 0
+    while i < len(raw):
+        char = raw[i]
+        i += 1
+        if char == "\\" and i < len(raw):
+            char = CONFIG_ESCAPES.get(raw[i], raw[i])
+            i += 1
+        elif char == '"':
+            quoted = not quoted
+            continue
+        elif not quoted and char in "#;":
+            break
+        elif not quoted and char in " \t":
+            # the whitespace at the end of the value is dropped
+            spaces += char
+            continue
+        value += spaces + char
+        spaces = ""
+    return value
+
+
+def _normalize_key(key: str) -> str:
+    section, _, name = key.partition(".")
+    subsection, _, name = name.rpartition(".")
+    return ".".join(part for part in (section.lower(), subsection, name.lower()) if part)
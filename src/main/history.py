@@ -0,0 +1,442 @@
+"""Read and check the commit messages of the git history.
+
+The commits are listed by one `git rev-list` and read through one long-lived
+`git cat-file --batch` process, so reading the whole history costs two processes
+instead of one per commit:
+
+    commit-msg-hook check-range origin/main..HEAD
+
+The results are stored per commit, so the next runs validate only the new commits.
+"""
+
+import argparse
+import itertools
+import sqlite3
+import subprocess
+import sys
+import threading
+from collections import deque, namedtuple
+
+from . import backends
+from .colors import CAYAN, OFF, RED
+from .reports import add_results, new_report, write
+from .shards import Shard, parse_shard
+from .store import CHUNK_SIZE, Result, ResultStore, fingerprint, message_hash
+from .validator import Violation
+
+EMPTY_MESSAGE_ERROR = f"\n{RED}error:\tcommit message can't be empty{OFF}\n"
+# the pseudo-rule of the commits whose check raised, their results aren't stored so the check is retried
+CHECK_ERROR = "check-error"
+# the object names written to `git cat-file` between the flushes
+WRITE_BATCH = 512
+
+
+class Commit(namedtuple("Commit", ["sha", "author", "time", "message"])):
+    """
+    A commit read from the history.
+
+    Attributes:
+        sha (str): The object name of the commit.
+        author (str): The author as `Name <email>`.
+        time (int): The author time as a unix timestamp.
+        message (str): The commit message.
+    """
+
+    __slots__ = ()
+
+    @property
+    def subject(self) -> str:
+        """
+        Get the subject line of the message.
+
+        Returns:
+            str: The first line of the message.
+        """
+        return self.message.split("\n", 1)[0]
+
+
+class CommitReader:
+    """
+    Read the commits through a long-lived `git cat-file --batch` process.
+
+    The object names are written to the process on a separate thread while the objects are read,
+    so the pipes never fill up whatever the number of commits.
+    A reader serves one `read` at a time.
+
+    Attributes:
+        git_dir (str): The git folder of the repository, the current repository if None.
+    """
+
+    def __init__(self, git_dir: str = None):
+        self.git_dir = git_dir
+        self._process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def read(self, shas) -> iter:
+        """
+        Read the commits in the given order.
+
+        Args:
+            shas (iterable): The object names of the commits.
+
+        Raises:
+            ValueError: If an object is missing or isn't a commit.
+
+        Returns:
+            iter: The `Commit`s.
+        """
+        process = self._start()
+        pending = _Pending()
+        writer = threading.Thread(target=self._write, args=(process, shas, pending), daemon=True)
+        writer.start()
+        completed = False
+        try:
+            while pending.wait():
+                yield self._read_object(process.stdout)
+            completed = True
+        finally:
+            if not completed:
+                # the caller stopped early, the unread objects would be read by the next call
+                self._kill()
+        writer.join()
+        if pending.error is not None:
+            raise pending.error
+
+    def close(self):
+        """Stop the `git cat-file` process."""
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process = None
+
+    def _kill(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+    def _start(self):
+        if self._process is None:
+            self._process = subprocess.Popen(git_command(self.git_dir, "cat-file", "--batch"),
+                                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return self._process
+
+    @staticmethod
+    def _write(process, shas, pending):
+        try:
+            for i, sha in enumerate(shas, 1):
+                process.stdin.write(sha.encode("ascii") + b"\n")
+                pending.add()
+                if i % WRITE_BATCH == 0:
+                    process.stdin.flush()
+            process.stdin.flush()
+        except Exception as error:
+            # e.g. `git rev-list` failed, re-raised by the reader
+            pending.error = error
+        finally:
+            pending.close()
+
+    @staticmethod
+    def _read_object(stream) -> Commit:
+        header = stream.readline().split()
+        if len(header) != 3 or header[1] != b"commit":
+            raise ValueError(f"{b' '.join(header).decode('ascii', 'replace')} is not a commit")
+        data = stream.read(int(header[2]))
+        stream.read(1)
+        return parse_commit(header[0].decode("ascii"), data)
+
+
+class _Pending:
+    """The number of requested objects not read yet, shared by the writer and the reader."""
+
+    def __init__(self):
+        self._count = 0
+        self._closed = False
+        self.error = None
+        self._condition = threading.Condition()
+
+    def add(self):
+        with self._condition:
+            self._count += 1
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def wait(self) -> bool:
+        with self._condition:
+            while not self._count and not self._closed:
+                self._condition.wait()
+            if not self._count:
+                return False
+            self._count -= 1
+            return True
+
+
+def git_command(git_dir: str = None, *args) -> list:
+    """
+    Build the command line of git.
+
+    Args:
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+        *args: The git command and its arguments.
+
+    Returns:
+        list: The command line.
+    """
+    return ["git"] + ([f"--git-dir={git_dir}"] if git_dir else []) + list(args)
+
+
+def rev_list(revisions: list, git_dir: str = None) -> iter:
+    """
+    List the commits of the given revisions as `git rev-list` streams them.
+
+    Args:
+        revisions (list): The `git rev-list` arguments, e.g. `["origin/main..HEAD"]`.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+
+    Raises:
+        subprocess.CalledProcessError: If git failed, e.g. a revision is unknown.
+
+    Returns:
+        iter: The object names of the commits, the newest first.
+    """
+    process = subprocess.Popen(git_command(git_dir, "rev-list", *revisions, "--"), stdout=subprocess.PIPE)
+    with process:
+        for line in process.stdout:
+            yield line[:-1].decode("ascii")
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+
+
+def parse_commit(sha: str, data: bytes) -> Commit:
+    """
+    Parse a raw commit object.
+
+    The headers are scanned in place through a `memoryview`, nothing is copied
+    but the author line and the message, the only parts decoded.
+
+    Args:
+        sha (str): The object name of the commit.
+        data (bytes): The content of the commit object.
+
+    Returns:
+        Commit: The commit.
+    """
+    view = memoryview(data)
+    end = data.find(b"\n\n")
+    end = len(data) if end < 0 else end
+    author = b""
+    encoding = "utf-8"
+    start = 0
+    while start < end:
+        stop = data.find(b"\n", start, end)
+        stop = end if stop < 0 else stop
+        if data.startswith(b"author ", start, stop):
+            author = view[start + 7:stop]
+        elif data.startswith(b"encoding ", start, stop):
+            encoding = str(view[start + 9:stop], "ascii", "replace")
+        start = stop + 1
+    name, _, stamp = str(author, "utf-8", "replace").rpartition("> ")
+    timestamp = stamp.split()[0] if stamp.split() else "0"
+    try:
+        message = str(view[end + 2:], encoding, "replace")
+    except LookupError:
+        message = str(view[end + 2:], "utf-8", "replace")
+    return Commit(sha, name + ">" if name else "", int(timestamp) if timestamp.isdigit() else 0, message)
+
+
+def check_commits(commits, validator) -> iter:
+    """
+    Check the messages of the commits.
+
+    A check raising an error fails its commit with a `check-error` violation instead of the run.
+
+    Args:
+        commits (iterable): The `Commit`s.
+        validator (Validator): The validator.
+
+    Returns:
+        iter: The `(commit, violations)` pairs, the violations are empty if the message passed.
+    """
+    for commit in commits:
+        if not commit.message.strip():
+            yield commit, [Violation("empty-message", EMPTY_MESSAGE_ERROR)]
+            continue
+        try:
+            violations = validator.check(commit.message, author=commit.author)
+        except Exception as error:
+            # a broken check(e.g. of a plugin) fails its commit, not the whole run
+            violations = [Violation(CHECK_ERROR, f"\n{RED}error:\tthe message can't be checked: {error!r}{OFF}\n")]
+        yield commit, violations
+
+
+def check_revisions(revisions: list, validator, store: ResultStore = None, git_dir: str = None, shard: Shard = None,
+                    skip: int = 0, skip_to: str = None, checkpoint=None) -> iter:
+    """
+    Check the messages of the commits of the given revisions, see `check_shas`.
+
+    Args:
+        revisions (list): The `git rev-list` arguments, e.g. `["origin/main..HEAD"]`.
+        validator (Validator): The validator.
+        store (ResultStore, optional): The store of the results. Defaults to None.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+        shard (Shard, optional): Check only the commits of the shard. Defaults to None.
+        skip (int, optional): The number of the first listed commits(of the shard) to skip, e.g. processed before.
+            Defaults to 0.
+        skip_to (str, optional): The object name the last skipped commit must have. Defaults to None.
+        checkpoint (callable, optional): Called with the results of every chunk,
+            returns the `Checkpoint` to store in the same transaction. Defaults to None.
+
+    Raises:
+        subprocess.CalledProcessError: If git failed, e.g. a revision is unknown.
+        ValueError: If the last skipped commit isn't `skip_to`, i.e. the listing changed.
+
+    Returns:
+        iter: The `Result`s in the order of `git rev-list`.
+    """
+    listed = rev_list(revisions, git_dir)
+    shas = listed if shard is None else (sha for sha in listed if sha in shard)
+    skipped = deque(itertools.islice(shas, skip), maxlen=1)
+    if skip_to is not None and list(skipped) != [skip_to]:
+        listed.close()
+        raise ValueError(f"the commit {skip} of the listing isn't {skip_to}")
+    yield from check_shas(shas, validator, store, git_dir, checkpoint)
+
+
+def check_shas(shas, validator, store: ResultStore = None, git_dir: str = None, checkpoint=None) -> iter:
+    """
+    Check the messages of the given commits.
+
+    The commits with a result in the store for the rule set of the validator aren't read nor validated,
+    the new results are stored a chunk at a time.
+
+    Args:
+        shas (iterable): The object names of the commits.
+        validator (Validator): The validator.
+        store (ResultStore, optional): The store of the results. Defaults to None.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+        checkpoint (callable, optional): Called with the results of every chunk,
+            returns the `Checkpoint` to store in the same transaction. Defaults to None.
+
+    Returns:
+        iter: The `Result`s in the given order.
+    """
+    rule_set = fingerprint(validator) if store is not None else None
+    shas = iter(shas)
+    with CommitReader(git_dir) as reader:
+        while True:
+            chunk = list(itertools.islice(shas, CHUNK_SIZE))
+            if not chunk:
+                break
+            cached = store.get_many(chunk, rule_set) if store is not None else {}
+            missing = [sha for sha in chunk if sha not in cached]
+            fresh = {commit.sha: to_result(commit, violations)
+                     for commit, violations in check_commits(reader.read(missing), validator)}
+            results = [cached.get(sha) or fresh[sha] for sha in chunk]
+            progress = checkpoint(results) if checkpoint is not None else None
+            if store is not None and (fresh or progress):
+                stored = [result for result in fresh.values()
+                          if not any(violation.rule == CHECK_ERROR for violation in result.violations)]
+                store.put_many(stored, rule_set, progress, chunk if progress is not None else ())
+            yield from results
+
+
+def to_result(commit: Commit, violations: list) -> Result:
+    """
+    Make the result of a checked commit.
+
+    Args:
+        commit (Commit): The commit.
+        violations (list): The violations of its message.
+
+    Returns:
+        Result: The result to store.
+    """
+    return Result(commit.sha, message_hash(commit.message, commit.author), commit.subject, commit.time, violations)
+
+
+def open_store(git_dir: str = None) -> ResultStore:
+    """
+    Open the result store of the repository.
+
+    Args:
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+
+    Returns:
+        ResultStore: The store, None if it can't be opened(e.g. a read-only repository).
+    """
+    try:
+        return ResultStore.for_repo(git_dir)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def report(commit: Commit, violations: list) -> str:
+    """
+    Describe the errors of a commit.
+
+    Args:
+        commit (Commit): The commit or its `Result`.
+        violations (list): The violations of the message.
+
+    Returns:
+        str: The short object name and the subject line followed by the errors.
+    """
+    return f"{CAYAN}{commit.sha[:12]}{OFF} {commit.subject}" + "".join(violation.text for violation in violations)
+
+
+def main(argv: list = None):
+    """
+    Extract arguments from command line and check the messages of a range of commits.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    from . import cli
+    from .config import ConfigError, load_policy
+    parser = argparse.ArgumentParser(prog="commit-msg-hook check-range",
+                                     description="check the messages of the commits in a revision range")
+    parser.add_argument("revisions", nargs="+", help="the revisions as `git rev-list` takes them, e.g. origin/main..HEAD")
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS),
+                        help="the imperative mood detection backend(overrides the repository config)")
+    parser.add_argument("--no-store", action="store_true",
+                        help="validate every commit, don't use nor update the stored results")
+    parser.add_argument("--shard", type=parse_shard,
+                        help="check only a shard of the commits, K/N or a range of object name prefixes, e.g. 00-3f")
+    parser.add_argument("--report", help="write the partial report of the checked commits to the path(- for stdout)")
+    args = parser.parse_args(argv)
+    try:
+        settings = load_policy().resolve()
+    except ConfigError as error:
+        parser.error(str(error))
+    backend = cli.select_backend(args.backend or settings.get("backend"))
+    validator = cli.select_validator(backend, cli.select_rules(settings.get("rules")), settings)
+    validator.preload()
+    store = None if args.no_store else open_store()
+    partial = new_report(fingerprint(validator), args.revisions, args.shard and args.shard.spec)
+    try:
+        for result in check_revisions(args.revisions, validator, store, shard=args.shard):
+            add_results(partial, [result])
+            if result.violations and args.report != "-":
+                print(report(result, result.violations))
+    except subprocess.CalledProcessError as error:
+        print(f"\n{RED}error:\tgit failed: {' '.join(error.cmd)}{OFF}\n")
+        sys.exit(2)
+    finally:
+        if store is not None:
+            store.close()
+    if args.report:
+        write(partial, args.report)
+    if partial["failed"]:
+        if args.report != "-":
+            print(f"\n{RED}error:\t{partial['failed']} of {partial['commits']} commit messages failed{OFF}\n{cli.HINT}")
+        sys.exit(1)
+    sys.exit(0)
@@ -0,0 +1,33 @@
+"""The imperative mood check of the commit rules."""
+
+from . import backends
+from .colors import GREEN, ITALIC, OFF, RED
+
+# words after the checked ones the tagger looks at(its `i+1` and `i+2` features)
+TAGGER_LOOKAHEAD = 2
+
+
+def check_for_imperative(msg: str, words_limit: int = 2, backend: backends.Backend = None) -> str:
+    """Check the given msg for imperative mood.
+
+    Args:
+        msg (str): The part of commit mesage(subject line or body).
+        words_limit (int, optional): Check first `words_limit - 1` words of the given message. Defaults to 2.
+        backend (backends.Backend, optional): The backend to tag the words with. Defaults to `nltk`.
+
+    Returns:
+        str: The detected errors(empty in a case of no errors).
+    """
+    errors = ""
+    backend = backend or backends.get_backend()
+    # the tagger only looks at the checked words and a couple of the next ones,
+    # so a pathological line costs the same as a short one
+    msg = " ".join(msg.split(None, words_limit + TAGGER_LOOKAHEAD)[:words_limit + TAGGER_LOOKAHEAD])
+    # VBZ : Verb, 3rd person singular present, like "adds", "writes" etc.
+    # VBD : Verb, Past tense , like "added", "wrote" etc.
+    # VBG : Verb, Present participle, like "adding", "writing" ect.
+    for word, tag in backend.tag(msg)[:words_limit - 1]:
+        if word.endswith("ing") or tag.startswith("VBZ") or tag.startswith("VBD") or tag.startswith("VBG"):
+            errors += f"\n{RED}\
+error:\tthe word  {GREEN}{ITALIC}{word}{RED}  must be in imperative mood{OFF}\n"
+    return errors
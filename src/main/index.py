@@ -0,0 +1,510 @@
+"""Read the changes staged for the commit from the git index without running git.
+
+The entries of the index are compared with the tree of `HEAD`, read from the loose
+and the packed objects. The cached trees of the index(the `TREE` extension) are
+compared first, so only the folders with changes since the last commit are read,
+which is a handful of objects on a typical commit.
+
+The formats this module doesn't read(a split or a sparse index, the SHA-256 objects,
+the reftable refs) raise `ValueError`, the caller falls back to `git diff --cached`.
+"""
+
+import os
+import struct
+import zlib
+
+from . import git
+
+SIGNATURE = b"DIRC"
+VERSIONS = (2, 3, 4)
+OID_SIZE = 20
+# the fixed part of an entry: the stat data, the mode, the object name and the flags
+ENTRY_HEAD = struct.Struct(">10I20sH")
+EXTENDED_FLAG = 0x4000
+INTENT_TO_ADD_FLAG = 0x2000
+NAME_MASK = 0xFFF
+TREE_MODE = 0o40000
+# the extensions an index can't be read without
+UNSUPPORTED_EXTENSIONS = (b"link", b"sdir")
+IDX_SIGNATURE = b"\377tOc"
+OBJECT_TYPES = {1: b"commit", 2: b"tree", 3: b"blob", 4: b"tag"}
+OFS_DELTA = 6
+REF_DELTA = 7
+READ_CHUNK = 8192
+MAX_SYMREF_DEPTH = 5
+# the refs every worktree keeps in its own git folder
+WORKTREE_REFS = ("refs/bisect/", "refs/worktree/", "refs/rewritten/")
+
+
+def staged_paths(git_folder: str) -> list:
+    """
+    List the paths of the changes staged for the commit, like `git diff --cached --name-only`.
+
+    Args:
+        git_folder (str): The git folder of the worktree.
+
+    Raises:
+        ValueError: If the index, the refs or the objects are in a format this module doesn't read.
+
+    Returns:
+        list: The sorted paths relative to the root folder.
+    """
+    config = git.read_config(git_folder)
+    if config.get("extensions.objectformat", "sha1").lower() != "sha1":
+        raise ValueError("only the SHA-1 repositories are supported")
+    index_path = os.environ.get("GIT_INDEX_FILE") or os.path.join(git_folder, "index")
+    try:
+        with open(index_path, "rb") as file:
+            entries, cached = read_index(file.read())
+    except FileNotFoundError:
+        entries, cached = {}, {}
+    objects = ObjectReader(object_dirs(git.common_dir(git_folder)))
+    commit = resolve_head(git_folder)
+    head = {}
+    unchanged = set()
+    if commit is not None:
+        tree = _commit_tree(objects.read(commit, b"commit"))
+        _walk_tree(objects, tree, "", cached, head, unchanged)
+    changed = set()
+    for path, (mode, oid) in entries.items():
+        if _under(path, unchanged):
+            continue
+        if head.pop(path, None) != (mode, oid):
+            changed.add(path)
+    # the files left are in HEAD but not in the index anymore
+    changed.update(head)
+    return sorted(changed)
+
+
+def read_index(data: bytes) -> tuple:
+    """
+    Parse the index file.
+
+    Args:
+        data (bytes): The content of the index file.
+
+    Raises:
+        ValueError: If the index is invalid or needs an unsupported extension.
+
+    Returns:
+        tuple: The `(mode, object name)` of the entries by the path and the object names
+            of the valid cached trees by the folder path(`""` for the root one).
+    """
+    if len(data) < 12 + OID_SIZE or data[:4] != SIGNATURE:
+        raise ValueError("not a git index")
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in VERSIONS:
+        raise ValueError(f"unsupported index version {version}")
+    end = len(data) - OID_SIZE
+    entries = {}
+    offset = 12
+    path = b""
+    for _ in range(count):
+        fields = ENTRY_HEAD.unpack_from(data, offset)
+        mode, oid, flags = fields[6], fields[10], fields[11]
+        start = offset
+        offset += ENTRY_HEAD.size
+        extended = 0
+        if flags & EXTENDED_FLAG and version >= 3:
+            extended = struct.unpack_from(">H", data, offset)[0]
+            offset += 2
+        if version == 4:
+            strip, offset = _prefix_varint(data, offset)
+            if strip > len(path):
+                raise ValueError("invalid index path compression")
+            name_end = data.index(b"\0", offset)
+            path = path[:len(path) - strip] + data[offset:name_end]
+            offset = name_end + 1
+        else:
+            length = flags & NAME_MASK
+            name_end = offset + length if length < NAME_MASK else data.index(b"\0", offset)
+            path = data[offset:name_end]
+            # the entries are padded with 1-8 NULs to a multiple of 8 bytes
+            offset = start + ((name_end - start + 8) & ~7)
+        if mode & 0o170000 == TREE_MODE:
+            raise ValueError("the sparse index isn't supported")
+        if extended & INTENT_TO_ADD_FLAG:
+            # `git add -N` isn't staged content, the commit leaves the file out
+            continue
+        entries[path.decode("utf-8", "surrogateescape")] = (mode, oid)
+    cached = {}
+    while offset + 8 <= end:
+        signature, size = struct.unpack_from(">4sI", data, offset)
+        offset += 8
+        if signature in UNSUPPORTED_EXTENSIONS:
+            raise ValueError(f"the {signature.decode('ascii')} index extension isn't supported")
+        if signature == b"TREE":
+            _read_cache_tree(data[offset:offset + size], cached)
+        elif not b"A" <= signature[:1] <= b"Z":
+            raise ValueError(f"unknown required index extension {signature!r}")
+        offset += size
+    return entries, cached
+
+
+def resolve_head(git_folder: str) -> bytes:
+    """
+    Resolve `HEAD` of the worktree to a commit.
+
+    Args:
+        git_folder (str): The git folder of the worktree.
+
+    Raises:
+        ValueError: If the refs are in a format this module doesn't read.
+
+    Returns:
+        bytes: The binary object name of the commit, None on an unborn branch.
+    """
+    common = git.common_dir(git_folder)
+    name = "HEAD"
+    for _ in range(MAX_SYMREF_DEPTH):
+        folder = git_folder if name == "HEAD" or name.startswith(WORKTREE_REFS) else common
+        value = _read_ref(folder, name)
+        if value is None:
+            value = _packed_ref(common, name)
+        if value is None:
+            return None
+        if not value.startswith("ref:"):
+            return bytes.fromhex(value)
+        name = value[len("ref:"):].strip()
+        if name == "refs/heads/.invalid":
+            raise ValueError("the reftable refs aren't supported")
+    raise ValueError("too deep symbolic refs")
+
+
+def object_dirs(common: str) -> list:
+    """
+    List the folders the objects of the repository are stored in.
+
+    Args:
+        common (str): The common git folder of the repository.
+
+    Returns:
+        list: The objects folder followed by its alternates.
+    """
+    folders = [os.environ.get("GIT_OBJECT_DIRECTORY") or os.path.join(common, "objects")]
+    alternates = os.environ.get("GIT_ALTERNATE_OBJECT_DIRECTORIES")
+    if alternates:
+        folders += alternates.split(os.pathsep)
+    i = 0
+    while i < len(folders):
+        try:
+            with open(os.path.join(folders[i], "info", "alternates"), "r", encoding="utf-8") as file:
+                lines = file.read().splitlines()
+        except OSError:
+            lines = []
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                folder = os.path.normpath(os.path.join(folders[i], line))
+                if folder not in folders:
+                    folders.append(folder)
+        i += 1
+    return folders
+
+
+class ObjectReader:
+    """
+    Read the loose and the packed objects of a repository.
+
+    Attributes:
+        folders (list): The objects folders.
+    """
+
+    def __init__(self, folders: list):
+        self.folders = folders
+        self._packs = None
+
+    def read(self, oid: bytes, expected: bytes = None) -> bytes:
+        """
+        Read an object.
+
+        Args:
+            oid (bytes): The binary object name.
+            expected (bytes, optional): The type the object must be of, e.g. `b"tree"`. Defaults to any.
+
+        Raises:
+            ValueError: If the object is missing or of another type.
+
+        Returns:
+            bytes: The content of the object.
+        """
+        kind, content = self._read(oid)
+        if expected is not None and kind != expected:
+            raise ValueError(f"{oid.hex()} is a {kind.decode('ascii')}, not a {expected.decode('ascii')}")
+        return content
+
+    def _read(self, oid: bytes) -> tuple:
+        name = oid.hex()
+        for folder in self.folders:
+            try:
+                with open(os.path.join(folder, name[:2], name[2:]), "rb") as file:
+                    raw = zlib.decompress(file.read())
+            except FileNotFoundError:
+                continue
+            header, _, content = raw.partition(b"\0")
+            return header.split(b" ", 1)[0], content
+        for pack in self._load_packs():
+            offset = pack.find(oid)
+            if offset is not None:
+                return pack.read(offset, self._read)
+        raise ValueError(f"object {name} is missing")
+
+    def _load_packs(self) -> list:
+        if self._packs is None:
+            self._packs = []
+            for folder in self.folders:
+                pack_folder = os.path.join(folder, "pack")
+                try:
+                    names = sorted(os.listdir(pack_folder))
+                except OSError:
+                    continue
+                for name in names:
+                    if name.endswith(".idx") and os.path.exists(os.path.join(pack_folder, name[:-4] + ".pack")):
+                        self._packs.append(Pack(os.path.join(pack_folder, name[:-4])))
+        return self._packs
+
+
+class Pack:
+    """
+    A pack of objects and its index(version 2).
+
+    Attributes:
+        path (str): The path of the pack without the extension.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path + ".idx", "rb") as file:
+            self._idx = file.read()
+        if self._idx[:4] != IDX_SIGNATURE or struct.unpack_from(">I", self._idx, 4)[0] != 2:
+            raise ValueError(f"{path}.idx isn't a version 2 pack index")
+        self._fanout = struct.unpack_from(">256I", self._idx, 8)
+        self._count = self._fanout[-1]
+
+    def find(self, oid: bytes) -> int:
+        """
+        Find an object in the pack.
+
+        Args:
+            oid (bytes): The binary object name.
+
+        Returns:
+            int: The offset of the object in the pack, None if it isn't in the pack.
+        """
+        names = 8 + 256 * 4
+        low = self._fanout[oid[0] - 1] if oid[0] else 0
+        high = self._fanout[oid[0]]
+        while low < high:
+            middle = (low + high) // 2
+            found = self._idx[names + middle * OID_SIZE:names + (middle + 1) * OID_SIZE]
+            if found < oid:
+                low = middle + 1
+            elif found > oid:
+                high = middle
+            else:
+                offsets = names + self._count * (OID_SIZE + 4)
+                offset = struct.unpack_from(">I", self._idx, offsets + middle * 4)[0]
+                if offset & 0x80000000:
+                    large = offsets + self._count * 4 + (offset & 0x7FFFFFFF) * 8
+                    offset = struct.unpack_from(">Q", self._idx, large)[0]
+                return offset
+        return None
+
+    def read(self, offset: int, read_base) -> tuple:
+        """
+        Read the object at the offset, resolving the deltas.
+
+        Args:
+            offset (int): The offset of the object in the pack.
+            read_base (callable): Reads the `(type, content)` of the base object of a `REF_DELTA` by its name.
+
+        Returns:
+            tuple: The type and the content of the object.
+        """
+        with open(self.path + ".pack", "rb") as file:
+            deltas = []
+            while True:
+                file.seek(offset)
+                kind = _pack_type(file)
+                if kind == OFS_DELTA:
+                    base = offset - _ofs_delta_offset(file)
+                    deltas.append(_inflate(file))
+                    offset = base
+                elif kind == REF_DELTA:
+                    base = file.read(OID_SIZE)
+                    deltas.append(_inflate(file))
+                    kind, content = read_base(base)
+                    break
+                elif kind in OBJECT_TYPES:
+                    kind, content = OBJECT_TYPES[kind], _inflate(file)
+                    break
+                else:
+                    raise ValueError(f"invalid object type {kind} in {self.path}.pack")
+        for delta in reversed(deltas):
+            content = _apply_delta(content, delta)
+        return kind, content
+
+
+def _pack_type(file) -> int:
+    byte = file.read(1)[0]
+    kind = (byte >> 4) & 7
+    # the size follows, the inflated data tells it anyway
+    while byte & 0x80:
+        byte = file.read(1)[0]
+    return kind
+
+
+def _ofs_delta_offset(file) -> int:
+    byte = file.read(1)[0]
+    offset = byte & 0x7F
+    while byte & 0x80:
+        byte = file.read(1)[0]
+        offset = ((offset + 1) << 7) | (byte & 0x7F)
+    return offset
+
+
+def _inflate(file) -> bytes:
+    inflater = zlib.decompressobj()
+    parts = []
+    while not inflater.eof:
+        chunk = file.read(READ_CHUNK)
+        if not chunk:
+            raise ValueError("truncated pack")
+        parts.append(inflater.decompress(chunk))
+    return b"".join(parts)
+
+
+def _delta_size(delta: bytes, offset: int) -> tuple:
+    size = shift = 0
+    while True:
+        byte = delta[offset]
+        offset += 1
+        size |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return size, offset
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    source_size, offset = _delta_size(delta, 0)
+    target_size, offset = _delta_size(delta, offset)
+    if source_size != len(base):
+        raise ValueError("the delta doesn't match its base")
+    parts = []
+    while offset < len(delta):
+        op = delta[offset]
+        offset += 1
+        if op & 0x80:
+            start = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    start |= delta[offset] << (8 * i)
+                    offset += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[offset] << (8 * i)
+                    offset += 1
+            parts.append(base[start:start + (size or 0x10000)])
+        elif op:
+            parts.append(delta[offset:offset + op])
+            offset += op
+        else:
+            raise ValueError("invalid delta")
+    content = b"".join(parts)
+    if len(content) != target_size:
+        raise ValueError("the delta doesn't match its size")
+    return content
+
+
+def _prefix_varint(data: bytes, offset: int) -> tuple:
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def _read_cache_tree(data: bytes, cached: dict):
+    # the folders in the preorder, each with the number of its subfolders
+    stack = []
+    offset = 0
+    while offset < len(data):
+        name_end = data.index(b"\0", offset)
+        name = data[offset:name_end].decode("utf-8", "surrogateescape")
+        line_end = data.index(b"\n", name_end)
+        entry_count, subtrees = (int(number) for number in data[name_end + 1:line_end].split(b" "))
+        offset = line_end + 1
+        while stack and stack[-1][1] == 0:
+            stack.pop()
+        if stack:
+            stack[-1][1] -= 1
+            path = stack[-1][0] + name + "/"
+        else:
+            path = ""
+        if entry_count >= 0:
+            cached[path.rstrip("/")] = data[offset:offset + OID_SIZE]
+            offset += OID_SIZE
+        stack.append([path, subtrees])
+
+
+def _read_ref(folder: str, name: str) -> str:
+    try:
+        with open(os.path.join(folder, name), "r", encoding="utf-8") as file:
+            return file.read().strip() or None
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return None
+
+
+def _packed_ref(common: str, name: str) -> str:
+    try:
+        with open(os.path.join(common, "packed-refs"), "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith(("#", "^")):
+                    continue
+                oid, _, ref = line.rstrip("\n").partition(" ")
+                if ref == name:
+                    return oid
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def _commit_tree(commit: bytes) -> bytes:
+    first = commit.split(b"\n", 1)[0]
+    if not first.startswith(b"tree "):
+        raise ValueError("invalid commit object")
+    return bytes.fromhex(first[len(b"tree "):].decode("ascii"))
+
+
+def _walk_tree(objects: ObjectReader, oid: bytes, prefix: str, cached: dict, files: dict, unchanged: set):
+    folder = prefix.rstrip("/")
+    if cached.get(folder) == oid:
+        # the index has the same tree for the folder, nothing under it is staged
+        unchanged.add(folder)
+        return
+    data = objects.read(oid, b"tree")
+    offset = 0
+    while offset < len(data):
+        mode_end = data.index(b" ", offset)
+        name_end = data.index(b"\0", mode_end)
+        mode = int(data[offset:mode_end], 8)
+        path = prefix + data[mode_end + 1:name_end].decode("utf-8", "surrogateescape")
+        entry = data[name_end + 1:name_end + 1 + OID_SIZE]
+        offset = name_end + 1 + OID_SIZE
+        if mode == TREE_MODE:
+            _walk_tree(objects, entry, path + "/", cached, files, unchanged)
+        else:
+            files[path] = (mode, entry)
+
+
+def _under(path: str, folders: set) -> bool:
+    if "" in folders:
+        return True
+    while "/" in path:
+        path = path.rsplit("/", 1)[0]
+        if path in folders:
+            return True
+    return False
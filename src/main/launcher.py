@@ -0,0 +1,51 @@
+"""Generate a lightweight launcher of the hook.
+
+Under old setuptools and pip the generated `commit-msg-hook` console script
+imports `pkg_resources`, which scans every installed distribution on each run.
+The launcher imports nothing but the hook itself:
+
+    python -m main.launcher ~/.local/bin/commit-msg-hook
+"""
+
+import argparse
+import os
+import stat
+import sys
+
+TEMPLATE = """#!{python}
+import sys
+
+from main.cli import main
+
+sys.exit(main())
+"""
+
+
+def write_launcher(path: str, python: str = sys.executable):
+    """
+    Write an executable launcher script.
+
+    Args:
+        path (str): The path of the script.
+        python (str, optional): The interpreter with the hook installed. Defaults to the current one.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(TEMPLATE.format(python=python))
+    mode = os.stat(path).st_mode
+    os.chmod(path, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def main():
+    """
+    Extract arguments from command line and write the launcher.
+    """
+    parser = argparse.ArgumentParser(description="generate a lightweight launcher of commit-msg-hook")
+    parser.add_argument("path", type=str, help="the path of the launcher script")
+    parser.add_argument("--python", type=str, default=sys.executable,
+                        help="the interpreter with the hook installed")
+    args = parser.parse_args()
+    write_launcher(args.path, args.python)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compact lexicon and suffix rules for the imperative mood check.
+
+The lexicon is a small word list shipped in ``data/lexicon.txt``.
+It is used instead of the NLTK tagger when the hook runs in the
+low-memory mode, so the check costs a few kilobytes instead of the
+whole NLTK import and the perceptron tagger model.
+"""
+
+import threading
+
+from .resources import read_text
+
+LEXICON_FILE = "data/lexicon.txt"
+
+_lexicon = None
+_lexicon_lock = threading.Lock()
+
+
+def load_lexicon() -> dict:
+    """Load the bundled lexicon.
+
+    The file is read once per process, under a lock, and kept in a module level dict.
+
+    Returns:
+        dict: The mapping of a lower-cased word to its Penn Treebank tag.
+    """
+    global _lexicon
+    if _lexicon is None:
+        with _lexicon_lock:
+            if _lexicon is None:
+                lexicon = {}
+                tag = ""
+                data = read_text(LEXICON_FILE)
+                for line in data.splitlines():
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    if line.startswith("["):
+                        tag = line.strip("[]")
+                        continue
+                    for word in line.split():
+                        lexicon[word] = tag
+                _lexicon = lexicon
+    return _lexicon
+
+
+def tag_word(word: str) -> str:
+    """Guess the Penn Treebank verb tag of a single word.
+
+    Known words are looked up in the lexicon, the rest go through the suffix rules:
+    `-ing` is a present participle, `-ed` is a past tense
+    and `-s`/`-es`/`-ies` is a 3rd person singular when the stem is a known verb.
+
+    Args:
+        word (str): The word to tag.
+
+    Returns:
+        str: `VB`, `VBD`, `VBZ`, `VBG`, `NN` or empty string if the word is unknown.
+    """
+    lexicon = load_lexicon()
+    lower = word.lower()
+    if lower in lexicon:
+        return lexicon[lower]
+    if lower.endswith("ing") and len(lower) > 4:
+        return "VBG"
+    if lower.endswith("ed") and len(lower) > 3:
+        return "VBD"
+    if lower.endswith("s") and not lower.endswith(("ss", "us", "is")):
+        stems = (lower[:-1], lower[:-2], lower[:-3] + "y")
+        if any(lexicon.get(stem) == "VB" for stem in stems):
+            return "VBZ"
+    return ""
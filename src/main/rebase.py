@@ -0,0 +1,288 @@
+"""Edit and check the messages of an interactive rebase before it starts.
+
+Set the hook as the sequence editor:
+
+    git config sequence.editor "commit-msg-hook rebase-todo"
+
+The todo list is opened in the usual editor first. Then the messages of all the `reword` commits
+and of all the `squash` groups are opened together in a single file, and checked all at once
+by one warm validator, the file is opened again with the errors until every message passes.
+The todo list is rewritten to apply the checked messages with `git commit --amend`,
+so the rebase never stops on a bad message halfway and the model is loaded once.
+"""
+
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+
+from . import backends, git
+from .colors import OFF, RED
+from .history import CommitReader
+
+PICK = ("p", "pick")
+REWORD = ("r", "reword")
+SQUASH = ("s", "squash")
+FIXUP = ("f", "fixup")
+MESSAGES_FOLDER = "commit-msg-hook"
+MESSAGES_FILE = "messages"
+DEFAULT_EDITOR = "vi"
+
+HELP = """Edit the messages of the rebased commits, they are checked all at once before the rebase starts.
+The lines starting with {comment} are ignored, delete everything to abort the rebase.
+Keep the {comment}{comment}{comment} lines, every one starts the message of a commit.
+"""
+
+
+class Rewrite:
+    """
+    A message the rebase will ask for.
+
+    Attributes:
+        start (int): The index of the first todo line of the commit(s).
+        end (int): The index after the last todo line of the commit(s).
+        command (str): `reword` or `squash`.
+        shas (list): The object names of the commits as written in the todo list.
+        message (str): The message to edit.
+    """
+
+    def __init__(self, start: int, end: int, command: str, shas: list):
+        self.start = start
+        self.end = end
+        self.command = command
+        self.shas = shas
+        self.message = ""
+
+
+def parse_todo(lines: list, comment: str = git.DEFAULT_COMMENT_CHAR) -> list:
+    """
+    Find the commits whose message the rebase will ask for.
+
+    A `reword` line is one message, a `pick`/`reword` line followed by `squash`/`fixup` lines
+    with at least one `squash` is one combined message.
+    The groups with `fixup -C`/`fixup -c` are left to git.
+
+    Args:
+        lines (list): The lines of the todo list.
+        comment (str, optional): The comment character. Defaults to `#`.
+
+    Returns:
+        list: The `Rewrite`s in the order of the todo list.
+    """
+    rewrites = []
+    i = 0
+    while i < len(lines):
+        words = lines[i].split()
+        if not words or words[0].startswith(comment) or words[0] not in PICK + REWORD or len(words) < 2:
+            i += 1
+            continue
+        start, end = i, i + 1
+        shas = [words[1]]
+        squashed = False
+        plain = True
+        while end < len(lines):
+            following = lines[end].split()
+            if not following or following[0].startswith(comment):
+                end += 1
+                continue
+            if following[0] not in SQUASH + FIXUP or len(following) < 2:
+                break
+            if following[1].startswith("-"):
+                plain = False
+            squashed = squashed or following[0] in SQUASH
+            if following[0] in SQUASH:
+                shas.append(following[1])
+            end += 1
+        while end > start + 1 and (not lines[end - 1].split() or lines[end - 1].split()[0].startswith(comment)):
+            end -= 1
+        if plain and squashed:
+            rewrites.append(Rewrite(start, end, "squash", shas))
+        elif words[0] in REWORD and end == start + 1:
+            rewrites.append(Rewrite(start, end, "reword", shas))
+        i = end
+    return rewrites
+
+
+def compose(rewrites: list, messages: list, comment: str, errors: dict = None) -> str:
+    """
+    Compose the file to edit the messages in.
+
+    Args:
+        rewrites (list): The `Rewrite`s.
+        messages (list): The messages to edit, a message per rewrite.
+        comment (str): The comment character.
+        errors (dict, optional): The plain text errors by the index of the rewrite. Defaults to None.
+
+    Returns:
+        str: The content of the file.
+    """
+    errors = errors or {}
+    parts = ["".join(f"{comment} {line}\n" for line in HELP.format(comment=comment).splitlines())]
+    for i, (rewrite, message) in enumerate(zip(rewrites, messages)):
+        parts.append(f"\n{comment * 3} {rewrite.command} {' '.join(rewrite.shas)}\n")
+        parts.append("".join(f"{comment} error: {error}\n" for error in errors.get(i, [])))
+        parts.append(message.strip("\n") + "\n")
+    return "".join(parts)
+
+
+def split_messages(content: str, comment: str) -> list:
+    """
+    Split the edited file into the messages.
+
+    Args:
+        content (str): The content of the file.
+        comment (str): The comment character.
+
+    Returns:
+        list: The messages without the comments, a message per `{comment}{comment}{comment}` line.
+    """
+    separator = comment * 3 + " "
+    messages = None
+    for line in content.splitlines(True):
+        if line.startswith(separator):
+            messages = (messages or []) + [""]
+        elif messages is not None:
+            messages[-1] += line
+    return [git.strip_comments(message, comment).strip("\n") + "\n" for message in messages or []]
+
+
+def rewrite_todo(lines: list, rewrites: list, paths: list) -> list:
+    """
+    Rewrite the todo list to apply the checked messages.
+
+    A `reword` becomes a `pick`, the `squash` lines of a group become `fixup` ones,
+    and an `exec` line amends the commit with its checked message.
+
+    Args:
+        lines (list): The lines of the todo list.
+        rewrites (list): The `Rewrite`s.
+        paths (list): The paths of the files with the checked messages, a file per rewrite.
+
+    Returns:
+        list: The lines of the new todo list.
+    """
+    lines = list(lines)
+    for rewrite, path in reversed(list(zip(rewrites, paths))):
+        group = lines[rewrite.start:rewrite.end]
+        for i, line in enumerate(group):
+            words = line.split(None, 1)
+            if words and words[0] in REWORD:
+                group[i] = "pick " + words[1]
+            elif words and words[0] in SQUASH:
+                group[i] = "fixup " + words[1]
+        amend = f"exec git commit --amend --no-verify --allow-empty --quiet --cleanup=whitespace -F {shlex.quote(path)}"
+        lines[rewrite.start:rewrite.end] = group + [amend]
+    return lines
+
+
+def editor(config: dict) -> str:
+    """
+    Get the editor git would open a commit message in.
+
+    Args:
+        config (dict): The git configuration.
+
+    Returns:
+        str: The shell command of the editor.
+    """
+    return os.environ.get("GIT_EDITOR") or config.get("core.editor") or os.environ.get("VISUAL") or \
+        os.environ.get("EDITOR") or DEFAULT_EDITOR
+
+
+def edit(command: str, path: str) -> bool:
+    """
+    Open a file in the editor the way git does.
+
+    Args:
+        command (str): The shell command of the editor.
+        path (str): The path of the file.
+
+    Returns:
+        bool: True if the editor succeeded.
+    """
+    return subprocess.run(["sh", "-c", f'{command} "$@"', command, path]).returncode == 0
+
+
+def main(argv: list = None):
+    """
+    Extract arguments from command line, edit the todo list and check the messages of the rebase.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    from . import cli
+    from .config import ConfigError, load_policy
+    parser = argparse.ArgumentParser(prog="commit-msg-hook rebase-todo",
+                                     description="edit and check the messages of an interactive rebase up front")
+    parser.add_argument("todo", help="the todo list git passes to the sequence editor")
+    parser.add_argument("--editor", help="the editor of the todo list and the messages(the git editor by default)")
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS),
+                        help="the imperative mood detection backend(overrides the repository config)")
+    args = parser.parse_args(argv)
+    config = git.read_config()
+    comment = git.comment_char(config)
+    command = args.editor or editor(config)
+    if not edit(command, args.todo):
+        sys.exit(1)
+    with open(args.todo, "r", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    rewrites = parse_todo(lines, comment)
+    if not rewrites:
+        sys.exit(0)
+    try:
+        settings = load_policy().resolve()
+    except ConfigError as error:
+        parser.error(str(error))
+    backend = cli.select_backend(args.backend or settings.get("backend"))
+    validator = cli.select_validator(backend, cli.select_rules(settings.get("rules")), settings)
+    validator.preload()
+    with CommitReader() as reader:
+        commits = iter(reader.read([sha for rewrite in rewrites for sha in rewrite.shas]))
+        messages = ["\n\n".join(next(commits).message.strip("\n") for _ in rewrite.shas) for rewrite in rewrites]
+    folder = os.path.join(os.path.dirname(os.path.abspath(args.todo)), MESSAGES_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, MESSAGES_FILE)
+    composed = compose(rewrites, messages, comment)
+    failing = False
+    while True:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(composed)
+        if not edit(command, path):
+            sys.exit(1)
+        with open(path, "r", encoding="utf-8") as file:
+            content = file.read()
+        if failing and content == composed:
+            # nothing was fixed, don't reopen the editor forever
+            print(f"\n{RED}error:\tthe messages still don't pass, aborting the rebase{OFF}\n")
+            sys.exit(1)
+        if not git.strip_comments(content, comment).strip():
+            print(f"\n{RED}error:\tthe messages are empty, aborting the rebase{OFF}\n")
+            sys.exit(1)
+        failing = True
+        edited = split_messages(content, comment)
+        if len(edited) != len(rewrites):
+            # the messages can't be matched to the commits, reopen the edited text as it is
+            notice = f"{comment} error: keep the {comment * 3} lines, a line per commit\n"
+            composed = notice + (content[len(notice):] if content.startswith(notice) else content)
+            continue
+        messages = edited
+        errors = {}
+        for i, message in enumerate(messages):
+            violations = validator.check(message) if message.strip() else []
+            found = [error for violation in violations for error in violation.messages]
+            if not message.strip():
+                found.append("commit message can't be empty")
+            if found:
+                errors[i] = found
+        if not errors:
+            break
+        composed = compose(rewrites, messages, comment, errors)
+    paths = []
+    for i, message in enumerate(messages):
+        paths.append(os.path.join(folder, f"{i + 1}.txt"))
+        with open(paths[-1], "w", encoding="utf-8") as file:
+            file.write(message)
+    with open(args.todo, "w", encoding="utf-8") as file:
+        file.write("\n".join(rewrite_todo(lines, rewrites, paths)) + "\n")
+    sys.exit(0)
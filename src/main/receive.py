@@ -0,0 +1,146 @@
+"""The server-side `pre-receive` hook.
+
+Install it in the `hooks` folder of a bare repository:
+
+    #!/bin/sh
+    exec commit-msg-hook pre-receive
+
+The ref updates are read from stdin, only the commits new to the repository
+(`git rev-list <new tips> --not --all`) are checked, all of them by one warm validator
+and within the time budget of the push. The push is rejected with a line per failed commit.
+"""
+
+import argparse
+import sys
+
+from . import backends
+from .colors import CAYAN, OFF, RED, YELLOW
+from .history import CommitReader, check_commits, rev_list
+from .rules import Budget
+
+# the time a push may spend in the hook, git servers usually time out after a minute
+PUSH_BUDGET_MS = 20000
+# the failed commits listed in the rejection
+MAX_REPORTED = 50
+
+
+def read_updates(stream) -> list:
+    """
+    Read the ref updates git passes to the `pre-receive` hook.
+
+    Args:
+        stream (file): The text stream of `<old> <new> <ref>` lines.
+
+    Returns:
+        list: The `(old, new, ref)` tuples.
+    """
+    updates = []
+    for line in stream:
+        parts = line.split()
+        if len(parts) == 3:
+            updates.append(tuple(parts))
+    return updates
+
+
+def new_commits(updates: list, git_dir: str = None) -> iter:
+    """
+    List the commits the push brings to the repository.
+
+    The deleted refs are skipped, a commit reachable from any existing ref isn't listed.
+
+    Args:
+        updates (list): The `(old, new, ref)` tuples.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+
+    Returns:
+        iter: The object names of the new commits.
+    """
+    tips = [new for _, new, _ in updates if new.strip("0")]
+    if not tips:
+        return iter(())
+    return rev_list(tips + ["--not", "--all"], git_dir)
+
+
+def check_push(updates: list, validator, budget: Budget) -> tuple:
+    """
+    Check the messages of the new commits of a push.
+
+    Once the budget is spent the remaining commits are accepted unchecked.
+
+    Args:
+        updates (list): The `(old, new, ref)` tuples.
+        validator (Validator): The validator.
+        budget (Budget): The time budget of the push.
+
+    Returns:
+        tuple: The number of checked commits, the `(commit, violations)` pairs of the failed ones
+            and the number of commits left unchecked.
+    """
+    shas = list(new_commits(updates))
+    checked = 0
+    failures = []
+    with CommitReader() as reader:
+        for commit, violations in check_commits(reader.read(shas), validator):
+            checked += 1
+            if violations:
+                failures.append((commit, violations))
+            if budget.remaining() == 0:
+                break
+    return checked, failures, len(shas) - checked
+
+
+def summary(checked: int, failures: list, unchecked: int) -> str:
+    """
+    Describe the result of a push check compactly.
+
+    Args:
+        checked (int): The number of checked commits.
+        failures (list): The `(commit, violations)` pairs of the failed commits.
+        unchecked (int): The number of commits left unchecked.
+
+    Returns:
+        str: A line per failed commit with the names of its failed rules(empty in a case of no failures).
+    """
+    lines = []
+    if unchecked:
+        lines.append(f"{YELLOW}warning:\tthe time budget of the push is spent, {unchecked} commits weren't checked{OFF}")
+    if failures:
+        lines.append(f"{RED}error:\t{len(failures)} of {checked} new commits have invalid messages:{OFF}")
+        for commit, violations in failures[:MAX_REPORTED]:
+            failed_rules = ", ".join(dict.fromkeys(violation.rule for violation in violations))
+            lines.append(f"  {CAYAN}{commit.sha[:12]}{OFF} {commit.subject[:60]}  ({failed_rules})")
+        if len(failures) > MAX_REPORTED:
+            lines.append(f"  ... and {len(failures) - MAX_REPORTED} more")
+    return "\n".join(lines)
+
+
+def main(argv: list = None):
+    """
+    Extract arguments from command line and check the pushed commits.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    from . import cli
+    from .config import ConfigError, load_policy
+    parser = argparse.ArgumentParser(prog="commit-msg-hook pre-receive",
+                                     description="check the messages of the pushed commits")
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS),
+                        help="the imperative mood detection backend(overrides the repository config)")
+    parser.add_argument("--budget-ms", type=int, default=PUSH_BUDGET_MS,
+                        help=f"stop checking after the given milliseconds and accept the rest(default {PUSH_BUDGET_MS})")
+    args = parser.parse_args(argv)
+    budget = Budget(args.budget_ms)
+    try:
+        settings = load_policy().resolve()
+    except ConfigError as error:
+        parser.error(str(error))
+    backend = cli.select_backend(args.backend or settings.get("backend"))
+    validator = cli.select_validator(backend, cli.select_rules(settings.get("rules")), settings)
+    validator.preload()
+    checked, failures, unchecked = check_push(read_updates(sys.stdin), validator, budget)
+    report = summary(checked, failures, unchecked)
+    if report:
+        print(report + ("\n" + cli.HINT if failures else ""))
+    sys.exit(1 if failures else 0)
+
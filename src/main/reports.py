@@ -0,0 +1,174 @@
+"""Compact reports of the checked commits, mergeable across the shards of a run.
+
+Every aggregate of a report is associative, the counts and the histogram of the failed rules
+are summed and the top offenders are a top-k under a total order, so the shards can be merged
+in any grouping and the result is identical to the report of a single-node run:
+
+    commit-msg-hook merge-reports shard-*.json --output report.json
+"""
+
+import argparse
+import json
+import sys
+
+from .colors import OFF, RED
+from .shards import combine
+
+REPORT_FORMAT = 1
+# the commits with the most failed rules kept in a report
+TOP_OFFENDERS = 10
+
+
+def new_report(rule_set: str, revisions: list, shard: str = None) -> dict:
+    """
+    Make an empty report.
+
+    Args:
+        rule_set (str): The fingerprint of the rule set of the validator.
+        revisions (list): The `git rev-list` arguments of the listing.
+        shard (str, optional): The spec of the shard, None for the whole listing.
+
+    Returns:
+        dict: The report.
+    """
+    return {"format": REPORT_FORMAT, "fingerprint": rule_set, "revisions": list(revisions),
+            "shards": None if shard is None else [shard], "commits": 0, "failed": 0, "violations": {},
+            "offenders": []}
+
+
+def offender_key(offender: list) -> tuple:
+    """
+    Order the offenders, the most failed rules first, then the newest and the object name.
+
+    Args:
+        offender (list): The `[sha, subject, time, rules]` of a commit.
+
+    Returns:
+        tuple: The sort key.
+    """
+    return -len(offender[3]), -offender[2], offender[0]
+
+
+def add_results(report: dict, results: list):
+    """
+    Add the results of checked commits to a report.
+
+    Args:
+        report (dict): The report to update.
+        results (list): The `Result`s.
+    """
+    offenders = report["offenders"]
+    for result in results:
+        report["commits"] += 1
+        if not result.violations:
+            continue
+        report["failed"] += 1
+        rules = list(dict.fromkeys(violation.rule for violation in result.violations))
+        for rule in rules:
+            report["violations"][rule] = report["violations"].get(rule, 0) + 1
+        offenders.append([result.sha, result.subject, result.time, rules])
+    if len(offenders) > TOP_OFFENDERS:
+        offenders.sort(key=offender_key)
+        del offenders[TOP_OFFENDERS:]
+
+
+def finish(report: dict) -> dict:
+    """
+    Put the aggregates of a report in their canonical order.
+
+    Args:
+        report (dict): The report.
+
+    Returns:
+        dict: The report.
+    """
+    report["offenders"].sort(key=offender_key)
+    report["violations"] = dict(sorted(report["violations"].items()))
+    return report
+
+
+def merge(reports: list) -> dict:
+    """
+    Merge the partial reports of the shards of a run.
+
+    Args:
+        reports (list): The reports.
+
+    Raises:
+        ValueError: If the reports are of different runs or their shards overlap.
+
+    Returns:
+        dict: The merged report.
+    """
+    if not reports:
+        raise ValueError("no reports to merge")
+    first = reports[0]
+    for report in reports:
+        if report.get("format") != REPORT_FORMAT:
+            raise ValueError(f"unsupported report format {report.get('format')}")
+        if (report["fingerprint"], report["revisions"]) != (first["fingerprint"], first["revisions"]):
+            raise ValueError("the reports are of different revisions or rule sets")
+    specs = [spec for report in reports for spec in (report["shards"] or [None])]
+    merged = new_report(first["fingerprint"], first["revisions"])
+    merged["shards"] = combine(specs)
+    for report in reports:
+        merged["commits"] += report["commits"]
+        merged["failed"] += report["failed"]
+        for rule, count in report["violations"].items():
+            merged["violations"][rule] = merged["violations"].get(rule, 0) + count
+        merged["offenders"].extend(report["offenders"])
+    merged["offenders"] = sorted(merged["offenders"], key=offender_key)[:TOP_OFFENDERS]
+    return finish(merged)
+
+
+def dumps(report: dict) -> str:
+    """
+    Serialize a report compactly.
+
+    Args:
+        report (dict): The report.
+
+    Returns:
+        str: The JSON of the report.
+    """
+    return json.dumps(finish(report), separators=(",", ":"), sort_keys=True)
+
+
+def write(report: dict, path: str):
+    """
+    Write a report to a file.
+
+    Args:
+        report (dict): The report.
+        path (str): The path of the file, `-` for stdout.
+    """
+    if path == "-":
+        print(dumps(report))
+        return
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(dumps(report) + "\n")
+
+
+def main(argv: list = None):
+    """
+    Extract arguments from command line and merge the partial reports.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    parser = argparse.ArgumentParser(prog="commit-msg-hook merge-reports",
+                                     description="merge the partial reports of the shards of an audit")
+    parser.add_argument("reports", nargs="+", help="the paths of the partial reports")
+    parser.add_argument("--output", default="-", help="the path of the merged report(default stdout)")
+    args = parser.parse_args(argv)
+    reports = []
+    try:
+        for path in args.reports:
+            with open(path, "r", encoding="utf-8") as file:
+                reports.append(json.load(file))
+        merged = merge(reports)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"\n{RED}error:\tcan't merge the reports: {error}{OFF}\n")
+        sys.exit(2)
+    write(merged, args.output)
+    sys.exit(0)
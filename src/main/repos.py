@@ -0,0 +1,266 @@
+"""Audit many repositories at once.
+
+    commit-msg-hook audit-repos repos.txt --submodules --output report.json
+
+The list has a repository per line, optionally followed by the revision to audit(HEAD by default),
+the lines starting with `#` are ignored. The model is loaded once and the workers of the pool
+are forked from the warm process, the largest repositories are scheduled first so the run
+takes about as long as the largest one. Every repository keeps its results and its last audited
+commit in its own result store, so the next run validates only the new commits.
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+from . import backends, rules
+from .audit import audit, summarize
+from .colors import OFF, RED
+from .config import ConfigError, load_policy
+from .store import ResultStore
+from .validator import Validator
+
+# the backend of the workers, inherited warm from the parent when forked
+_backend = None
+
+
+def read_list(stream) -> list:
+    """
+    Read the list of the repositories.
+
+    Args:
+        stream (file): The text stream of `<path> [revision]` lines.
+
+    Returns:
+        list: The `(path, revision)` tuples.
+    """
+    repos = []
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.rsplit(None, 1)
+        if len(parts) == 1 or os.path.isdir(line):
+            # the whole line is a path, maybe with a space
+            repos.append((line, "HEAD"))
+        else:
+            repos.append((parts[0], parts[1]))
+    return repos
+
+
+def submodules(path: str) -> list:
+    """
+    List the checked out submodules of a repository, recursively.
+
+    Args:
+        path (str): The path of the repository.
+
+    Returns:
+        list: The absolute paths of the submodules.
+    """
+    command = ["git", "-C", path, "submodule", "foreach", "--recursive", "--quiet", "pwd"]
+    output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    return output.decode("utf-8", "replace").splitlines()
+
+
+def repo_size(path: str) -> int:
+    """
+    Estimate the size of a repository by its objects.
+
+    Args:
+        path (str): The path of the repository.
+
+    Returns:
+        int: The size of the loose and the packed objects in KiB, 0 if unknown.
+    """
+    command = ["git", "-C", path, "count-objects", "-v"]
+    output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    size = 0
+    for line in output.decode("ascii", "replace").splitlines():
+        key, _, value = line.partition(": ")
+        if key in ("size", "size-pack") and value.isdigit():
+            size += int(value)
+    return size
+
+
+def audit_repo(task: tuple) -> dict:
+    """
+    Audit a repository with the rules and the settings of its config and the shared backend.
+
+    Args:
+        task (tuple): The path of the repository and the revision to audit.
+
+    Returns:
+        dict: The path, the number of the listed(new) commits and of the failed ones, the number of
+            the indexed commits and of the failed ones, the failed commits per rule and the seconds it took,
+            or the path and the error.
+    """
+    path, revision = task
+    start = time.monotonic()
+    try:
+        command = ["git", "-C", path, "rev-parse", "--absolute-git-dir"]
+        git_folder = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True).stdout
+        git_folder = git_folder.decode("utf-8").strip()
+        settings = load_policy(path).resolve()
+        validator = Validator(_backend, rules.resolve_rules(settings.get("rules")), settings)
+        store = ResultStore.for_repo(git_folder)
+        try:
+            report = audit(revision, validator, store, git_folder)
+            indexed, failed, by_rule = summarize(revision, validator, store, git_folder)
+        finally:
+            store.close()
+    except subprocess.CalledProcessError as error:
+        message = error.stderr.decode("utf-8", "replace").strip() if error.stderr else " ".join(error.cmd)
+        return {"path": path, "revision": revision, "error": f"git failed: {message}"}
+    except (ConfigError, OSError, sqlite3.Error, ValueError) as error:
+        return {"path": path, "revision": revision, "error": str(error)}
+    except Exception as error:
+        # an unexpected error of a repository must not bring down the pool and the audits of the others
+        return {"path": path, "revision": revision, "error": f"the audit failed: {error!r}"}
+    return {"path": path, "revision": revision, "listed": report["commits"], "listed_failed": report["failed"],
+            "commits": indexed, "failed": failed, "violations": by_rule,
+            "seconds": round(time.monotonic() - start, 3)}
+
+
+def _init(name: str):
+    global _backend
+    if _backend is None:
+        # not forked(e.g. spawned on macOS or Windows), load the model in every worker
+        _backend = backends.get_backend(name)
+        _backend.load()
+
+
+def audit_repos(repos: list, backend_name: str, jobs: int = None, progress=None) -> list:
+    """
+    Audit the repositories in a pool of processes.
+
+    Args:
+        repos (list): The `(path, revision)` tuples.
+        backend_name (str): The name of the imperative mood detection backend.
+        jobs (int, optional): The number of the processes. Defaults to the number of CPUs.
+        progress (file, optional): The stream to report every audited repository to. Defaults to None.
+
+    Returns:
+        list: The results of `audit_repo` in the order of the repositories.
+    """
+    global _backend
+    _backend = backends.get_backend(backend_name)
+    _backend.load()
+    # the largest first, the small ones fill the gaps at the end
+    order = sorted(range(len(repos)), key=lambda i: -repo_size(repos[i][0]))
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    gc.collect()
+    gc.freeze()
+    results = {}
+    with context.Pool(min(jobs or os.cpu_count() or 1, max(len(repos), 1)), _init, (backend_name,)) as pool:
+        tasks = [repos[i] for i in order]
+        for done, result in enumerate(pool.imap_unordered(audit_repo, tasks), 1):
+            results[result["path"], result["revision"]] = result
+            if progress is not None:
+                state = result["error"] if "error" in result else f"{result['seconds']}s"
+                progress.write(f"[{done}/{len(repos)}] {result['path']}: {state}\n")
+                progress.flush()
+    return [results[repo] for repo in repos]
+
+
+def consolidate(results: list, seconds: float) -> dict:
+    """
+    Consolidate the audits of the repositories.
+
+    Args:
+        results (list): The results of `audit_repo`.
+        seconds (float): The wall time of the run.
+
+    Returns:
+        dict: The totals over the audited repositories and the result of every repository.
+    """
+    totals = {"repositories": len(results), "errors": 0, "listed": 0, "listed_failed": 0, "commits": 0, "failed": 0,
+              "violations": {}}
+    for result in results:
+        if "error" in result:
+            totals["errors"] += 1
+            continue
+        for key in ("listed", "listed_failed", "commits", "failed"):
+            totals[key] += result[key]
+        for rule, count in result["violations"].items():
+            totals["violations"][rule] = totals["violations"].get(rule, 0) + count
+    totals["violations"] = dict(sorted(totals["violations"].items(), key=lambda pair: -pair[1]))
+    totals["seconds"] = round(seconds, 3)
+    return {"totals": totals, "repositories": results}
+
+
+def describe(report: dict) -> str:
+    """
+    Describe a consolidated report.
+
+    Args:
+        report (dict): The report, see `consolidate`.
+
+    Returns:
+        str: A line per repository, the totals and the failed commits per rule.
+    """
+    lines = []
+    for result in report["repositories"]:
+        if "error" in result:
+            lines.append(f"{RED}{result['path']}: {result['error']}{OFF}")
+        else:
+            lines.append(f"{result['path']}: listed {result['listed']} new commits({result['listed_failed']} failed), "
+                         f"{result['failed']} of {result['commits']} indexed commits failed")
+    totals = report["totals"]
+    lines.append(f"{totals['repositories']} repositories in {totals['seconds']}s: listed {totals['listed']} "
+                 f"new commits({totals['listed_failed']} failed), {totals['failed']} of {totals['commits']} "
+                 f"indexed commits failed")
+    lines += [f"  {rule:<14} {count}" for rule, count in totals["violations"].items()]
+    return "\n".join(lines)
+
+
+def main(argv: list = None):
+    """
+    Extract arguments from command line and audit the listed repositories.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    from . import cli
+    parser = argparse.ArgumentParser(prog="commit-msg-hook audit-repos",
+                                     description="audit the commit messages of many repositories at once")
+    parser.add_argument("list", help="the file listing the repositories, a `path [revision]` per line(- for stdin)")
+    parser.add_argument("--submodules", action="store_true", help="audit the checked out submodules too")
+    parser.add_argument("--jobs", type=int, help="the number of the processes(default the number of CPUs)")
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS),
+                        help="the imperative mood detection backend of all the repositories(default the current config)")
+    parser.add_argument("--json", action="store_true", help="print the consolidated report as JSON")
+    parser.add_argument("--output", help="write the consolidated report as JSON to the path")
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("argument --jobs: the number must be positive")
+    try:
+        if args.list == "-":
+            repos = read_list(sys.stdin)
+        else:
+            with open(args.list, "r", encoding="utf-8") as file:
+                repos = read_list(file)
+        settings = load_policy().resolve()
+    except OSError as error:
+        parser.error(f"can't read the list: {error}")
+    except ConfigError as error:
+        parser.error(str(error))
+    if args.submodules:
+        repos += [(path, "HEAD") for repo, _ in repos for path in submodules(repo)]
+    repos = list(dict.fromkeys((os.path.abspath(path), revision) for path, revision in repos))
+    backend = cli.select_backend(args.backend or settings.get("backend"))
+    start = time.monotonic()
+    results = audit_repos(repos, backend.name, args.jobs, sys.stderr if sys.stderr.isatty() else None)
+    report = consolidate(results, time.monotonic() - start)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    print(json.dumps(report) if args.json else describe(report))
+    sys.exit(2 if report["totals"]["errors"] else 0)
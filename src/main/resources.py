@@ -0,0 +1,79 @@
+"""Read the data files bundled with the hook.
+
+When the hook runs from a zipapp the archive is memory-mapped once
+and a file stored without compression is returned as a slice of the mapping,
+so the data is never copied before it's decoded.
+"""
+
+import os
+import threading
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def read_data(name: str):
+    """
+    Read a data file of the package.
+
+    Args:
+        name (str): The path of the file relative to the package, e.g. `data/lexicon.txt`.
+
+    Raises:
+        FileNotFoundError: If there is no such file.
+
+    Returns:
+        bytes-like: The content of the file, a `memoryview` if read from a zipapp.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), *name.split("/"))
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except OSError:
+        archive = path
+        while archive and not os.path.isfile(archive):
+            parent = os.path.dirname(archive)
+            if parent == archive:
+                raise FileNotFoundError(path)
+            archive = parent
+        if archive == path:
+            raise
+        member = os.path.relpath(path, archive).replace(os.sep, "/")
+        return _read_member(archive, member)
+
+
+def read_text(name: str) -> str:
+    """
+    Read a data file of the package as UTF-8 text.
+
+    Args:
+        name (str): The path of the file relative to the package.
+
+    Returns:
+        str: The content of the file.
+    """
+    return str(read_data(name), "utf-8")
+
+
+def _read_member(archive: str, member: str):
+    import mmap
+    import struct
+    import zipfile
+    with _archives_lock:
+        if archive not in _archives:
+            with open(archive, "rb") as file:
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            with zipfile.ZipFile(archive) as zip_file:
+                members = {info.filename: info for info in zip_file.infolist()}
+            _archives[archive] = (mapping, members)
+        mapping, members = _archives[archive]
+    info = members.get(member)
+    if info is None:
+        raise FileNotFoundError(f"{archive}/{member}")
+    if info.compress_type != zipfile.ZIP_STORED:
+        with zipfile.ZipFile(archive) as zip_file:
+            return zip_file.read(info)
+    # the local file header is 30 bytes followed by the name and the extra field
+    name_length, extra_length = struct.unpack("<HH", mapping[info.header_offset + 26:info.header_offset + 30])
+    start = info.header_offset + 30 + name_length + extra_length
+    return memoryview(mapping)[start:start + info.file_size]
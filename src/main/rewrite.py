@@ -0,0 +1,83 @@
+"""The `post-rewrite` hook.
+
+After `git commit --amend` and `git rebase` the rewritten commits get new object names.
+The hook reads the old and the new names git passes on stdin and copies the stored results
+to the new commits whose message didn't change, so `check-range` validates only the edited messages:
+
+    #!/bin/sh
+    exec commit-msg-hook post-rewrite "$@"
+"""
+
+import argparse
+import sqlite3
+import subprocess
+import sys
+
+from .history import CommitReader, open_store
+from .store import message_hash
+
+
+def read_rewrites(stream) -> list:
+    """
+    Read the rewritten commits git passes to the `post-rewrite` hook.
+
+    Args:
+        stream (file): The text stream of `<old sha> <new sha> [<extra info>]` lines.
+
+    Returns:
+        list: The `(old sha, new sha)` pairs.
+    """
+    rewrites = []
+    for line in stream:
+        parts = line.split()
+        if len(parts) >= 2:
+            rewrites.append((parts[0], parts[1]))
+    return rewrites
+
+
+def carry_over(rewrites: list, store, git_dir: str = None) -> int:
+    """
+    Copy the results of the rewritten commits whose message didn't change.
+
+    Args:
+        rewrites (list): The `(old sha, new sha)` pairs.
+        store (ResultStore): The store of the results.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+
+    Returns:
+        int: The number of the copied results.
+    """
+    old_shas = dict((new, old) for old, new in rewrites)
+    with CommitReader(git_dir) as reader:
+        hashed = [(old_shas[commit.sha], commit.sha, message_hash(commit.message, commit.author))
+                  for commit in reader.read(list(old_shas))]
+    return store.carry_over(hashed)
+
+
+def main(argv: list = None):
+    """
+    Extract arguments from command line and carry the results over to the rewritten commits.
+
+    The hook never fails the rewrite, the results are only a cache.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    parser = argparse.ArgumentParser(prog="commit-msg-hook post-rewrite",
+                                     description="carry the stored results over to the rewritten commits")
+    parser.add_argument("command", nargs="?", choices=("amend", "rebase"), help="the command that rewrote the commits")
+    parser.add_argument("--verbose", action="store_true", help="print the number of the copied results")
+    args = parser.parse_args(argv)
+    rewrites = read_rewrites(sys.stdin)
+    store = open_store()
+    if not rewrites or store is None:
+        sys.exit(0)
+    try:
+        copied = carry_over(rewrites, store)
+    except (ValueError, OSError, sqlite3.Error, subprocess.CalledProcessError):
+        sys.exit(0)
+    finally:
+        store.close()
+    if args.verbose:
+        print(f"commit-msg-hook: carried {copied} of {len(rewrites)} results over")
+    sys.exit(0)
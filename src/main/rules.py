@@ -0,0 +1,211 @@
+"""The registry of the commit rules.
+
+Every rule declares its cost class and the resources it requires,
+the check itself is imported only when the rule is enabled and runs for the first time.
+Third-party rules are discovered through the `commit_msg_hook.rules` entry points,
+an entry point refers either to a `Rule` or to a plain check function.
+"""
+
+import importlib
+import time
+
+from .colors import OFF, YELLOW
+from .config import ConfigError
+
+# string operations on a single line
+COST_CHEAP = 0
+# anything heavier, e.g. reading files or calling a service
+COST_MEDIUM = 1
+# requires the tagger model of a backend
+COST_MODEL = 2
+
+ENTRY_POINT_GROUP = "commit_msg_hook.rules"
+
+
+class Rule:
+    """
+    A commit rule.
+
+    Attributes:
+        name (str): The name to enable the rule in the config.
+        target (str): The check function as `module:function`, called with a single line of the message.
+        cost (int): The cost class, the cheapest rules run first.
+        requires (tuple): The resources and settings passed to the check as keyword arguments,
+            e.g. `backend` or `min_words`.
+    """
+
+    def __init__(self, name: str, target: str, cost: int = COST_CHEAP, requires: tuple = ()):
+        self.name = name
+        self.target = target
+        self.cost = cost
+        self.requires = tuple(requires)
+        self._check = None
+
+    @property
+    def check(self):
+        """
+        Import the check function on the first access.
+
+        Returns:
+            callable: The check function.
+        """
+        if self._check is None:
+            module, _, function = self.target.partition(":")
+            self._check = getattr(importlib.import_module(module), function)
+        return self._check
+
+
+BUILTIN_RULES = {rule.name: rule for rule in (
+    Rule("meaningful", f"{__package__}.checks:check_meaningful", requires=("min_words",)),
+    Rule("prefix", f"{__package__}.checks:check_prefix"),
+    Rule("imperative", f"{__package__}.imperative:check_for_imperative", COST_MODEL, ("backend", "words_limit")),
+    Rule("ending", f"{__package__}.checks:check_ending"),
+)}
+DEFAULT_RULES = list(BUILTIN_RULES)
+
+
+class Budget:
+    """
+    The latency budget of a single hook run.
+
+    Attributes:
+        ms (int): The budget in milliseconds, unbounded if None.
+        deadline (float): The `time.monotonic()` by which the checks must finish.
+        skipped (list): The names of the rules skipped for the lack of time.
+    """
+
+    def __init__(self, ms: int = None, start: float = None):
+        self.ms = ms
+        self.deadline = None if ms is None else (start or time.monotonic()) + ms / 1000
+        self.skipped = []
+
+    def remaining(self) -> float:
+        """
+        Get the time left.
+
+        Returns:
+            float: The seconds left(never negative), None if the budget is unbounded.
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def skip(self, rule: str):
+        """
+        Record a rule skipped for the lack of time.
+
+        Args:
+            rule (str): The name of the rule.
+        """
+        if rule not in self.skipped:
+            self.skipped.append(rule)
+
+    def warnings(self) -> str:
+        """
+        Describe the skipped rules.
+
+        Returns:
+            str: The warnings(empty in a case of no skipped rules or no budget).
+        """
+        if self.ms is None:
+            return ""
+        return "".join(f"\n{YELLOW}warning:\tthe {rule} check is skipped, "
+                       f"it can't finish within the {self.ms} ms budget{OFF}\n" for rule in self.skipped)
+
+
+def resolve_rules(names: list = None) -> list:
+    """
+    Resolve the names of the enabled rules.
+
+    The entry points are scanned only if a name isn't one of the built-in rules.
+
+    Args:
+        names (list, optional): The names of the enabled rules. Defaults to all the built-in rules.
+
+    Raises:
+        ConfigError: If there is no rule with one of the given names.
+
+    Returns:
+        list: The enabled rules in the given order.
+    """
+    names = DEFAULT_RULES if names is None else names
+    plugins = {}
+    if any(name not in BUILTIN_RULES for name in names):
+        plugins = _entry_points()
+    rules = []
+    for name in names:
+        if name in BUILTIN_RULES:
+            rules.append(BUILTIN_RULES[name])
+        elif name in plugins:
+            rules.append(_plugin_rule(name, plugins[name].load()))
+        else:
+            raise ConfigError(f"unknown rule {name}, choose one of: {', '.join(sorted(BUILTIN_RULES))} "
+                              f"or install a plugin providing it")
+    return rules
+
+
+def run_rules(line: str, rules: list = None, backend=None, fail_fast: bool = False, budget: Budget = None,
+              settings: dict = None) -> list:
+    """
+    Run the rules on a single line of a commit message, the cheapest first.
+
+    In the fail-fast mode the rules heavier than the cheap ones are skipped
+    as soon as a rule failed, and the background loading of the model is abandoned.
+    The rules requiring the backend wait for its model only as long as the latency budget allows.
+
+    Args:
+        line (str): The subject line or a line of the message body.
+        rules (list, optional): The enabled rules. Defaults to all the built-in rules.
+        backend (backends.Backend, optional): The imperative mood detection backend. Defaults to `nltk`.
+        fail_fast (bool, optional): Skip the heavier rules if a rule failed. Defaults to False.
+        budget (Budget, optional): The latency budget, unbounded if None. Defaults to None.
+        settings (dict, optional): The settings of the policy the rules may require. Defaults to None.
+
+    Returns:
+        list: The `(rule name, errors)` pairs of the failed rules in the order of the rules.
+    """
+    rules = resolve_rules() if rules is None else rules
+    settings = settings or {}
+    errors = {}
+    for rule in sorted(rules, key=lambda rule: rule.cost):
+        if fail_fast and rule.cost > COST_CHEAP and any(errors.values()):
+            if backend is not None:
+                backend.cancel_preload()
+            break
+        kwargs = {name: settings[name] for name in rule.requires if settings.get(name) is not None}
+        if "backend" in rule.requires:
+            if backend is None:
+                from .backends import get_backend
+                backend = get_backend()
+            timeout = budget.remaining() if budget is not None else None
+            if not backend.wait(timeout):
+                if timeout is not None and backend.loading():
+                    budget.skip(rule.name)
+                    continue
+                # the background loading failed, load on this thread so that its error fails the hook
+                backend.load()
+            kwargs["backend"] = backend
+        errors[rule.name] = rule.check(line, **kwargs)
+    return [(rule.name, errors[rule.name]) for rule in rules if errors.get(rule.name)]
+
+
+def _entry_points() -> dict:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return {}
+    found = entry_points()
+    if hasattr(found, "select"):
+        group = found.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = found.get(ENTRY_POINT_GROUP, [])
+    return {entry_point.name: entry_point for entry_point in group}
+
+
+def _plugin_rule(name: str, plugin) -> Rule:
+    if isinstance(plugin, Rule):
+        return plugin
+    rule = Rule(name, f"{plugin.__module__}:{plugin.__name__}",
+                getattr(plugin, "cost", COST_CHEAP), getattr(plugin, "requires", ()))
+    rule._check = plugin
+    return rule
@@ -0,0 +1,238 @@
+"""Estimate the compliance of a history from a random sample of its commits.
+
+    commit-msg-hook audit main --sample 400 [--stratify year]
+
+The commits are sampled by reservoir sampling over the `git rev-list` stream, so the history
+is listed once and only the sampled commits are read and validated. With `--stratify` a reservoir
+is kept per period of the author time(the time `--since` and the index filter by) and the sample is
+allocated to the periods in proportion to their commits, at least one commit per period if the sample
+is large enough. The failure rates are reported with their Wilson score intervals.
+"""
+
+import math
+import random
+import time
+
+from .history import check_shas, rev_list
+from .shards import Shard
+
+STRATA = ("week", "month", "year")
+DEFAULT_CONFIDENCE = 0.95
+
+
+class Reservoir:
+    """
+    A uniform random sample of a stream of unknown length(Algorithm R).
+
+    Attributes:
+        size (int): The size of the sample.
+        seen (int): The number of the items of the stream.
+        items (list): The sampled items.
+    """
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = size
+        self.seen = 0
+        self.items = []
+        self._rng = rng
+
+    def add(self, item):
+        """
+        Offer an item of the stream.
+
+        Args:
+            item: The item.
+        """
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+            return
+        index = self._rng.randrange(self.seen)
+        if index < self.size:
+            self.items[index] = item
+
+
+def stratum(timestamp: int, period: str) -> str:
+    """
+    Get the period of an author time.
+
+    Args:
+        timestamp (int): The unix timestamp.
+        period (str): `week`, `month` or `year`.
+
+    Returns:
+        str: The period, e.g. `2024`, `2024-03` or `2024-W09`(UTC).
+    """
+    date = time.gmtime(timestamp)
+    if period == "year":
+        return time.strftime("%Y", date)
+    if period == "month":
+        return time.strftime("%Y-%m", date)
+    return time.strftime("%G-W%V", date)
+
+
+def allocate(size: int, counts: dict) -> dict:
+    """
+    Allocate a sample to the strata in proportion to their sizes(largest remainder method).
+
+    If the sample is at least as large as the number of the strata, every stratum gets an item
+    and the rest of the sample is allocated in proportion to the rest of the items.
+
+    Args:
+        size (int): The size of the sample.
+        counts (dict): The number of the items by stratum.
+
+    Returns:
+        dict: The size of the sample of every stratum.
+    """
+    total = sum(counts.values())
+    if total <= size:
+        return dict(counts)
+    # a stratum without an item in the sample would be missing from the estimate
+    base = 1 if size >= len(counts) else 0
+    size -= base * len(counts)
+    total -= base * len(counts)
+    quotas = {key: size * (count - base) / total for key, count in counts.items()}
+    shares = {key: int(quota) for key, quota in quotas.items()}
+    left = size - sum(shares.values())
+    for key in sorted(quotas, key=lambda key: (shares[key] - quotas[key], key))[:left]:
+        shares[key] += 1
+    return {key: share + base for key, share in shares.items()}
+
+
+def sample_commits(revisions: list, size: int, git_dir: str = None, period: str = None, seed: int = None,
+                   shard: Shard = None, since: int = None) -> tuple:
+    """
+    Sample the commits of the given revisions.
+
+    Args:
+        revisions (list): The `git rev-list` arguments.
+        size (int): The size of the sample.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+        period (str, optional): Stratify by the `week`, `month` or `year` of the author time. Defaults to None.
+        seed (int, optional): The seed of the random generator, for a reproducible sample. Defaults to None.
+        shard (Shard, optional): Sample only the commits of the shard. Defaults to None.
+        since (int, optional): Sample only the commits authored since the unix timestamp. Defaults to None.
+
+    Raises:
+        subprocess.CalledProcessError: If git failed, e.g. a revision is unknown.
+
+    Returns:
+        tuple: The number of the commits by stratum and the sampled object names by stratum.
+    """
+    rng = random.Random(seed)
+    reservoirs = {}
+    for line in rev_list(["--format=%at %H"] + list(revisions), git_dir):
+        stamp, _, sha = line.partition(" ")
+        if stamp == "commit":
+            # the header line of every commit, its author time and object name follow
+            continue
+        if (shard is not None and sha not in shard) or (since is not None and int(stamp) < since):
+            continue
+        key = stratum(int(stamp), period) if period else ""
+        reservoir = reservoirs.get(key)
+        if reservoir is None:
+            reservoir = reservoirs[key] = Reservoir(size, rng)
+        reservoir.add(sha)
+    counts = {key: reservoir.seen for key, reservoir in reservoirs.items()}
+    shares = allocate(size, counts)
+    # a uniform subsample of a uniform sample is uniform
+    return counts, {key: rng.sample(reservoirs[key].items, shares[key]) for key in sorted(reservoirs)}
+
+
+def z_score(confidence: float) -> float:
+    """
+    Get the two-sided quantile of the standard normal distribution.
+
+    Args:
+        confidence (float): The confidence level, e.g. 0.95.
+
+    Returns:
+        float: The z score, e.g. 1.96.
+    """
+    low, high = 0.0, 10.0
+    target = (1 + confidence) / 2
+    for _ in range(60):
+        middle = (low + high) / 2
+        if (1 + math.erf(middle / math.sqrt(2))) / 2 < target:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def wilson(rate: float, n: int, z: float) -> tuple:
+    """
+    Get the Wilson score interval of a proportion.
+
+    Args:
+        rate (float): The observed proportion.
+        n (int): The size of the sample.
+        z (float): The z score of the confidence level.
+
+    Returns:
+        tuple: The lower and the upper bound.
+    """
+    if not n:
+        return 0.0, 1.0
+    denominator = 1 + z * z / n
+    center = (rate + z * z / (2 * n)) / denominator
+    spread = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+def estimate(revisions: list, size: int, validator, store=None, git_dir: str = None, period: str = None,
+             seed: int = None, shard: Shard = None, since: int = None,
+             confidence: float = DEFAULT_CONFIDENCE) -> dict:
+    """
+    Estimate the failure rates of the commits of the given revisions from a sample.
+
+    The strata are weighted by their share of the commits of the sampled strata, the strata left
+    without a sample(more strata than the size of the sample) count at the rate of the others.
+    The intervals are the Wilson score intervals of the weighted rates for the size of the whole sample,
+    exact if every commit is sampled.
+
+    Args:
+        revisions (list): The `git rev-list` arguments.
+        size (int): The size of the sample.
+        validator (Validator): The validator.
+        store (ResultStore, optional): The store of the results. Defaults to None.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+        period (str, optional): Stratify by the `week`, `month` or `year` of the author time. Defaults to None.
+        seed (int, optional): The seed of the random generator. Defaults to None.
+        shard (Shard, optional): Sample only the commits of the shard. Defaults to None.
+        since (int, optional): Sample only the commits authored since the unix timestamp. Defaults to None.
+        confidence (float, optional): The confidence level of the intervals. Defaults to 0.95.
+
+    Raises:
+        subprocess.CalledProcessError: If git failed, e.g. a revision is unknown.
+
+    Returns:
+        dict: The population, the sample size and the `{"rate", "low", "high"}` of the failed commits
+            and of every failed rule.
+    """
+    counts, samples = sample_commits(revisions, size, git_dir, period, seed, shard, since)
+    population = sum(counts.values())
+    sampled = sum(len(shas) for shas in samples.values())
+    covered = sum(counts[key] for key, shas in samples.items() if shas)
+    rates = {}
+    for key, shas in samples.items():
+        if not shas:
+            continue
+        weight = counts[key] / covered
+        failed = {}
+        for result in check_shas(shas, validator, store, git_dir):
+            if not result.violations:
+                continue
+            for rule in ["failed"] + list(dict.fromkeys(violation.rule for violation in result.violations)):
+                failed[rule] = failed.get(rule, 0) + 1
+        for rule, count in failed.items():
+            rates[rule] = rates.get(rule, 0.0) + weight * count / len(shas)
+    z = z_score(confidence)
+    intervals = {}
+    for rule in ["failed"] + sorted(rule for rule in rates if rule != "failed"):
+        rate = rates.get(rule, 0.0)
+        low, high = (rate, rate) if sampled == population else wilson(rate, sampled, z)
+        intervals[rule] = {"rate": round(rate, 4), "low": round(low, 4), "high": round(high, 4)}
+    return {"commits": population, "sampled": sampled, "confidence": confidence,
+            "failed": intervals.pop("failed"), "rules": intervals}
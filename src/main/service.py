@@ -0,0 +1,307 @@
+"""Local HTTP validation service.
+
+Serves the validator over HTTP/1.1 with keep-alive for the tools
+that check many messages, e.g. a merge bot or a PR title checker:
+
+    commit-msg-hook http --port 8080
+
+* `POST /validate` with `{"message": "...", "author": "Name <email>"}`(the author is optional)
+  returns `{"ok": true, "errors": []}`
+* `POST /batch` with `{"messages": ["...", {"message": "...", "author": "..."}, ...]}` returns
+  `{"results": [{"ok": ..., "errors": [...]}, ...]}`
+* `GET /metrics` returns the request latency and throughput metrics in the Prometheus text format
+* `GET /health` returns `ok`
+
+The tagging calls of concurrent requests and of the messages of a batch are queued to a single thread
+and handed to the backend in batches, so its model is never used concurrently. The built-in backends
+tag a batch one message at a time(the NLTK perceptron tags word by word), the batches save time only
+with a backend tagging a batch at once. A message the validator fails on is answered with the status 500 and the error.
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import backends, cli
+from .config import ConfigError, load_policy
+from .validator import Validator
+
+# the upper bounds of the request latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+MAX_BODY = 16 << 20
+ENDPOINTS = ("/validate", "/batch", "/metrics", "/health")
+# the messages of the batches validated at once, their tagging calls are queued together
+BATCH_WORKERS = 64
+
+
+class Metrics:
+    """
+    The request latency and throughput metrics of the service.
+
+    Attributes:
+        started (float): The `time.monotonic()` the service started at.
+        requests (dict): The number of requests per endpoint and status.
+        messages (int): The number of validated messages.
+        latency (dict): The cumulative latency histogram per endpoint.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = {}
+        self.messages = 0
+        self.latency = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, status: int, seconds: float, messages: int = 0):
+        """
+        Record a served request.
+
+        Args:
+            endpoint (str): The path of the request.
+            status (int): The response status.
+            seconds (float): The time it took to serve the request.
+            messages (int, optional): The number of messages validated by the request. Defaults to 0.
+        """
+        with self._lock:
+            key = (endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.messages += messages
+            buckets, total, count = self.latency.get(endpoint, ([0] * len(LATENCY_BUCKETS), 0.0, 0))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            self.latency[endpoint] = (buckets, total + seconds, count + 1)
+
+    def render(self, backend: backends.Backend) -> str:
+        """
+        Render the metrics in the Prometheus text format.
+
+        Args:
+            backend (backends.Backend): The backend of the service, to report its batching.
+
+        Returns:
+            str: The metrics.
+        """
+        with self._lock:
+            uptime = time.monotonic() - self.started
+            lines = ["# TYPE commit_msg_hook_requests_total counter"]
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f'commit_msg_hook_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+            lines.append("# TYPE commit_msg_hook_request_duration_seconds histogram")
+            for endpoint, (buckets, total, count) in sorted(self.latency.items()):
+                for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'commit_msg_hook_request_duration_seconds_bucket'
+                                 f'{{endpoint="{endpoint}",le="{bound}"}} {bucket}')
+                lines.append(f'commit_msg_hook_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {count}')
+                lines.append(f'commit_msg_hook_request_duration_seconds_sum{{endpoint="{endpoint}"}} {total}')
+                lines.append(f'commit_msg_hook_request_duration_seconds_count{{endpoint="{endpoint}"}} {count}')
+            lines += [
+                "# TYPE commit_msg_hook_messages_total counter",
+                f"commit_msg_hook_messages_total {self.messages}",
+                "# TYPE commit_msg_hook_messages_per_second gauge",
+                f"commit_msg_hook_messages_per_second {self.messages / uptime if uptime else 0.0}",
+                "# TYPE commit_msg_hook_uptime_seconds gauge",
+                f"commit_msg_hook_uptime_seconds {uptime}",
+            ]
+        if isinstance(backend, backends.BatchingBackend):
+            lines += [
+                "# TYPE commit_msg_hook_tag_batches_total counter",
+                f"commit_msg_hook_tag_batches_total {backend.batches}",
+                "# TYPE commit_msg_hook_tag_batched_total counter",
+                f"commit_msg_hook_tag_batched_total {backend.batched}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class Service:
+    """
+    The validator shared by the request handlers.
+
+    Attributes:
+        backend (backends.Backend): The batching imperative mood detection backend.
+        validator (Validator): The validator shared by the request threads.
+        metrics (Metrics): The metrics of the service.
+    """
+
+    def __init__(self, backend: backends.Backend, rules: list, settings: dict):
+        self.backend = backends.BatchingBackend(backend)
+        self.validator = Validator(self.backend, rules, settings)
+        self.metrics = Metrics()
+        self._pool = ThreadPoolExecutor(BATCH_WORKERS, thread_name_prefix="batch-validate")
+
+    def validate(self, msg: str, author: str = None) -> dict:
+        """
+        Validate a commit message.
+
+        Args:
+            msg (str): The commit message.
+            author (str, optional): The author as `Name <email>`, to recognize the bots. Defaults to None.
+
+        Returns:
+            dict: `ok` and the list of plain text `errors`.
+        """
+        if not msg.strip():
+            return {"ok": False, "errors": ["commit message can't be empty"]}
+        errors = [error for violation in self.validator.check(msg, author=author) for error in violation.messages]
+        return {"ok": not errors, "errors": errors}
+
+    def validate_many(self, requests: list) -> list:
+        """
+        Validate many commit messages at once.
+
+        The messages are validated concurrently, so the batching backend tags them together.
+
+        Args:
+            requests (list): The `(message, author)` pairs, the author may be None.
+
+        Returns:
+            list: The results of `validate` in the order of the messages.
+        """
+        if len(requests) == 1:
+            return [self.validate(*requests[0])]
+        return list(self._pool.map(lambda request: self.validate(*request), requests))
+
+
+class Handler(BaseHTTPRequestHandler):
+    """The HTTP/1.1 keep-alive request handler of the service."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "commit-msg-hook"
+    service = None
+    verbose = False
+
+    def do_GET(self):
+        self._start = time.monotonic()
+        if self.path == "/metrics":
+            self._reply(200, self.service.metrics.render(self.service.backend), "text/plain; version=0.0.4")
+        elif self.path == "/health":
+            self._reply(200, "ok\n", "text/plain")
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        self._start = time.monotonic()
+        try:
+            request = self._read_json()
+            if self.path == "/validate":
+                requests = [self._message(request)]
+            elif self.path == "/batch":
+                if not isinstance(request.get("messages"), list):
+                    raise ValueError("`messages` must be an array")
+                requests = [self._message(item if isinstance(item, dict) else {"message": item})
+                            for item in request["messages"]]
+            else:
+                requests = None
+        except ValueError as error:
+            self._reply(400, {"error": str(error)})
+        else:
+            if requests is None:
+                self._reply(404, {"error": "not found"})
+            else:
+                try:
+                    results = self.service.validate_many(requests)
+                except Exception as error:
+                    # a validator error is the fault of the service, not of the request
+                    self._reply(500, {"error": f"the message can't be checked: {error!r}"})
+                else:
+                    body = results[0] if self.path == "/validate" else {"results": results}
+                    self._reply(200, body, messages=len(results))
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def _endpoint(self) -> str:
+        # keep the metric labels bounded whatever paths the clients request
+        return self.path if self.path in ENDPOINTS else "other"
+
+    @staticmethod
+    def _message(request: dict) -> tuple:
+        if not isinstance(request.get("message"), str):
+            raise ValueError("`message` must be a string")
+        if not isinstance(request.get("author", ""), str):
+            raise ValueError("`author` must be a string")
+        return request["message"], request.get("author")
+
+    def _read_json(self) -> dict:
+        length = (self.headers.get("Content-Length") or "0").strip()
+        if not length or length.strip("0123456789"):
+            # the body can't be skipped, so the connection can't be kept alive
+            self.close_connection = True
+            raise ValueError("`Content-Length` must be a non-negative integer")
+        length = int(length)
+        if length > MAX_BODY:
+            self.close_connection = True
+            raise ValueError("the request is too large")
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            raise ValueError(f"the request isn't valid JSON: {error}")
+        if not isinstance(request, dict):
+            raise ValueError("the request must be a JSON object")
+        return request
+
+    def _reply(self, status: int, body, content_type: str = "application/json", messages: int = 0):
+        data = (body if isinstance(body, str) else json.dumps(body)).encode("utf-8")
+        # observed before the reply is sent, so the next request of the client already sees it
+        self.service.metrics.observe(self._endpoint(), status, time.monotonic() - self._start, messages)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(host: str, port: int, service: Service, verbose: bool = False):
+    """
+    Run the service until interrupted.
+
+    Args:
+        host (str): The address to listen on.
+        port (int): The port to listen on.
+        service (Service): The validator to serve.
+        verbose (bool, optional): Log every request. Defaults to False.
+    """
+    handler = type("ServiceHandler", (Handler,), {"service": service, "verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f"serving commit-msg-hook on http://{host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: list = None):
+    """
+    Extract arguments from command line and run the service.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    parser = argparse.ArgumentParser(prog="commit-msg-hook http", description="serve the validator over HTTP")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="the port to listen on")
+    parser.add_argument("--backend", choices=sorted(backends.BACKENDS),
+                        help="the imperative mood detection backend(overrides the repository config)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+    try:
+        settings = load_policy().resolve()
+    except ConfigError as error:
+        parser.error(str(error))
+    backend = cli.select_backend(args.backend or settings.get("backend"))
+    enabled_rules = cli.select_rules(settings.get("rules"))
+    try:
+        service = Service(backend, enabled_rules, settings)
+    except ConfigError as error:
+        parser.error(str(error))
+    backend.load()
+    serve(args.host, args.port, service, args.verbose)
@@ -0,0 +1,115 @@
+"""Split the commits of a history between the nodes of an audit.
+
+A shard is given either as `K/N`, the commits whose object name modulo N is K,
+or as a range of object name prefixes `A-B`, e.g. `00-3f`:
+
+    commit-msg-hook audit main --shard 0/4 --report shard-0.json
+
+The object names are hashes already, so both kinds split any history evenly.
+"""
+
+import argparse
+
+HEX_DIGITS = "0123456789abcdef"
+
+
+class Shard:
+    """
+    A part of the commits of a history.
+
+    Attributes:
+        spec (str): The normalized spec, `K/N` or `A-B`.
+        modulo (tuple): The `(K, N)` of a modulo shard, None for a range.
+        range (tuple): The `(A, B)` prefixes of a range shard, None for a modulo.
+    """
+
+    def __init__(self, modulo: tuple = None, prefixes: tuple = None):
+        self.modulo = modulo
+        self.range = prefixes
+        self.spec = f"{modulo[0]}/{modulo[1]}" if modulo else f"{prefixes[0]}-{prefixes[1]}"
+
+    def __contains__(self, sha: str) -> bool:
+        if self.modulo:
+            return int(sha, 16) % self.modulo[1] == self.modulo[0]
+        prefix = sha[:len(self.range[0])]
+        return self.range[0] <= prefix <= self.range[1]
+
+    def __repr__(self):
+        return f"Shard({self.spec!r})"
+
+    def interval(self, width: int) -> tuple:
+        """
+        Get the object names of a range shard as an interval of prefixes.
+
+        Args:
+            width (int): The length of the prefixes, at least the length of the range.
+
+        Returns:
+            tuple: The first prefix and the prefix after the last one, as numbers.
+        """
+        scale = 16 ** (width - len(self.range[0]))
+        return int(self.range[0], 16) * scale, (int(self.range[1], 16) + 1) * scale
+
+
+def parse_shard(spec: str) -> Shard:
+    """
+    Parse a shard spec.
+
+    Args:
+        spec (str): `K/N` or `A-B`, see the module docstring.
+
+    Raises:
+        argparse.ArgumentTypeError: If the spec is invalid.
+
+    Returns:
+        Shard: The shard.
+    """
+    if "/" in spec:
+        index, _, count = spec.partition("/")
+        if not index.isdigit() or not count.isdigit() or not int(index) < int(count):
+            raise argparse.ArgumentTypeError(f"invalid shard {spec}, use K/N with 0 <= K < N")
+        return Shard(modulo=(int(index), int(count)))
+    first, _, last = spec.lower().partition("-")
+    if not first or len(first) != len(last) or not set(first + last) <= set(HEX_DIGITS) or first > last:
+        raise argparse.ArgumentTypeError(f"invalid shard {spec}, use K/N or a range of hex prefixes, e.g. 00-3f")
+    return Shard(prefixes=(first, last))
+
+
+def combine(specs: list) -> list:
+    """
+    Combine the shards of the partial reports of a run.
+
+    Args:
+        specs (list): The shard specs of the reports, None for a whole history.
+
+    Raises:
+        ValueError: If the shards overlap or are of different kinds.
+
+    Returns:
+        list: The sorted specs, None if they cover the whole history.
+    """
+    if any(spec is None for spec in specs):
+        if len(specs) > 1:
+            raise ValueError("a report of the whole history can't be merged with another one")
+        return None
+    shards = [parse_shard(spec) for spec in specs]
+    if all(shard.modulo for shard in shards):
+        counts = {shard.modulo[1] for shard in shards}
+        indexes = [shard.modulo[0] for shard in shards]
+        if len(counts) > 1:
+            raise ValueError(f"the shards split the history in different counts: {', '.join(specs)}")
+        if len(set(indexes)) != len(indexes):
+            raise ValueError(f"the shards overlap: {', '.join(specs)}")
+        if len(indexes) == counts.pop():
+            return None
+        return [shard.spec for shard in sorted(shards, key=lambda shard: shard.modulo)]
+    if any(shard.modulo for shard in shards):
+        raise ValueError(f"the modulo shards can't be merged with the ranges: {', '.join(specs)}")
+    width = max(len(shard.range[0]) for shard in shards)
+    intervals = sorted((shard.interval(width), shard.spec) for shard in shards)
+    for (previous, spec), (current, other) in zip(intervals, intervals[1:]):
+        if current[0] < previous[1]:
+            raise ValueError(f"the shards overlap: {spec}, {other}")
+    covered = intervals[0][0][0] == 0 and intervals[-1][0][1] == 16 ** width and \
+        all(previous[1] == current[0] for (previous, _), (current, _) in zip(intervals, intervals[1:]))
+    return None if covered else [spec for _, spec in intervals]
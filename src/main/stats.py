@@ -0,0 +1,294 @@
+"""Compliance trends of a history in a single streaming pass with bounded memory.
+
+    commit-msg-hook audit main --stats [--csv]
+
+The violation rate of every rule is counted in fixed weekly buckets, the most common
+non-imperative words and the paths touched by the most failed commits are kept by
+space-saving sketches of a fixed number of counters, however large the history is.
+"""
+
+import csv
+import io
+import re
+import subprocess
+from datetime import datetime, timezone
+
+from .history import check_revisions, git_command
+from .shards import Shard
+
+WEEK = 7 * 24 * 3600
+# the unix epoch is a Thursday, the buckets start on Mondays
+WEEK_OFFSET = 3 * 24 * 3600
+# the counters of a space-saving sketch, the error of a count is at most the total divided by it
+SKETCH_CAPACITY = 1000
+TOP_K = 20
+NON_IMPERATIVE_WORD = re.compile(r"the word\s+(\S+)\s+must be in imperative mood")
+CSV_HEADER = ("metric", "key", "rule", "count", "total", "rate", "error")
+# the bytes of the `git log` output read at a time
+READ_SIZE = 1 << 16
+
+
+class SpaceSaving:
+    """
+    The space-saving sketch of the most frequent items of a stream.
+
+    A new item takes over the counter of the least frequent one when all the counters are taken,
+    so a count is never underestimated and overestimated by at most its recorded error.
+
+    Attributes:
+        capacity (int): The number of the counters.
+        total (int): The number of the added items.
+    """
+
+    def __init__(self, capacity: int = SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}
+        self._errors = {}
+        # the items by their count, to find a least frequent one in constant time
+        self._buckets = {}
+        self._min = 0
+
+    def add(self, item: str):
+        """
+        Count an item.
+
+        Args:
+            item (str): The item.
+        """
+        self.total += 1
+        count = self._counts.get(item)
+        if count is None:
+            error = 0
+            if len(self._counts) >= self.capacity:
+                evicted = self._buckets[self._min].pop()
+                error = self._counts.pop(evicted)
+                del self._errors[evicted]
+                self._drop_bucket(error)
+            else:
+                self._min = 0
+            self._errors[item] = error
+            count = error
+        else:
+            self._buckets[count].discard(item)
+            self._drop_bucket(count)
+        self._counts[item] = count + 1
+        self._buckets.setdefault(count + 1, set()).add(item)
+        if self._min == 0 or self._min > count + 1:
+            self._min = count + 1
+        elif self._min == count and count not in self._buckets:
+            self._min = count + 1
+
+    def _drop_bucket(self, count: int):
+        if not self._buckets[count]:
+            del self._buckets[count]
+
+    def top(self, k: int = TOP_K) -> list:
+        """
+        Get the most frequent items.
+
+        Args:
+            k (int, optional): The number of the items. Defaults to `TOP_K`.
+
+        Returns:
+            list: The `(item, count, error)` tuples, the most frequent first.
+        """
+        ranked = sorted(self._counts.items(), key=lambda pair: (-pair[1], pair[0]))[:k]
+        return [(item, count, self._errors[item]) for item, count in ranked]
+
+
+class HistoryStats:
+    """
+    The compliance trends of the checked commits.
+
+    Attributes:
+        commits (int): The number of the counted commits.
+        failed (int): The number of the failed ones.
+        weeks (dict): The `[commits, failed, {rule: count}]` by the start of the week.
+        words (SpaceSaving): The non-imperative words.
+        paths (SpaceSaving): The paths touched by the failed commits.
+    """
+
+    def __init__(self, capacity: int = SKETCH_CAPACITY):
+        self.commits = 0
+        self.failed = 0
+        self.weeks = {}
+        self.words = SpaceSaving(capacity)
+        self.paths = SpaceSaving(capacity)
+
+    def add(self, result, paths: list = ()):
+        """
+        Count a checked commit.
+
+        Args:
+            result (Result): The result of the commit.
+            paths (list, optional): The paths the commit changed. Defaults to ().
+        """
+        self.commits += 1
+        week = self.weeks.setdefault(week_start(result.time), [0, 0, {}])
+        week[0] += 1
+        if not result.violations:
+            return
+        self.failed += 1
+        week[1] += 1
+        for rule in dict.fromkeys(violation.rule for violation in result.violations):
+            week[2][rule] = week[2].get(rule, 0) + 1
+        for violation in result.violations:
+            if violation.rule == "imperative":
+                for message in violation.messages:
+                    match = NON_IMPERATIVE_WORD.search(message)
+                    if match:
+                        self.words.add(match.group(1).lower())
+        for path in paths:
+            self.paths.add(path)
+
+    def to_dict(self, k: int = TOP_K) -> dict:
+        """
+        Get the trends as plain data.
+
+        Args:
+            k (int, optional): The number of the top words and paths. Defaults to `TOP_K`.
+
+        Returns:
+            dict: The totals, the weekly rates by rule and the top words and paths.
+        """
+        weeks = []
+        for start, (commits, failed, rules) in sorted(self.weeks.items()):
+            weeks.append({"week": iso_date(start), "commits": commits, "failed": failed,
+                          "rates": {rule: round(count / commits, 4) for rule, count in sorted(rules.items())}})
+        return {
+            "commits": self.commits, "failed": self.failed, "weeks": weeks,
+            "words": [{"word": word, "count": count, "error": error} for word, count, error in self.words.top(k)],
+            "paths": [{"path": path, "count": count, "error": error} for path, count, error in self.paths.top(k)],
+        }
+
+    def to_csv(self, k: int = TOP_K) -> str:
+        """
+        Get the trends as CSV rows, see `CSV_HEADER`.
+
+        Args:
+            k (int, optional): The number of the top words and paths. Defaults to `TOP_K`.
+
+        Returns:
+            str: The CSV.
+        """
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(CSV_HEADER)
+        for start, (commits, failed, rules) in sorted(self.weeks.items()):
+            writer.writerow(("week", iso_date(start), "", failed, commits, round(failed / commits, 4), 0))
+            for rule, count in sorted(rules.items()):
+                writer.writerow(("week", iso_date(start), rule, count, commits, round(count / commits, 4), 0))
+        for word, count, error in self.words.top(k):
+            writer.writerow(("word", word, "imperative", count, self.words.total, "", error))
+        for path, count, error in self.paths.top(k):
+            writer.writerow(("path", path, "", count, self.paths.total, "", error))
+        return output.getvalue()
+
+
+def week_start(timestamp: int) -> int:
+    """
+    Get the start of the week of a time.
+
+    Args:
+        timestamp (int): The unix timestamp.
+
+    Returns:
+        int: The unix timestamp of the Monday 00:00 UTC before it.
+    """
+    return (timestamp + WEEK_OFFSET) // WEEK * WEEK - WEEK_OFFSET
+
+
+def iso_date(timestamp: int) -> str:
+    """
+    Format a time as a UTC date.
+
+    Args:
+        timestamp (int): The unix timestamp.
+
+    Returns:
+        str: The date as `YYYY-MM-DD`.
+    """
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+def changed_paths(revisions: list, git_dir: str = None) -> iter:
+    """
+    List the paths changed by the commits as `git log` streams them.
+
+    The merges are listed without paths.
+
+    Args:
+        revisions (list): The `git rev-list` arguments.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+
+    Raises:
+        subprocess.CalledProcessError: If git failed, e.g. a revision is unknown.
+
+    Returns:
+        iter: The `(sha, paths)` pairs in the order of `git rev-list`.
+    """
+    command = git_command(git_dir, "log", "--format=%x00%H", "--name-only", "--no-renames", "-z", *revisions, "--")
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    sha = None
+    paths = []
+    expect_sha = False
+    with process:
+        # every commit starts with an empty field, then its object name and the NUL-terminated paths
+        for field in _fields(process.stdout):
+            if not field:
+                expect_sha = True
+            elif expect_sha:
+                if sha is not None:
+                    yield sha, paths
+                sha, paths, expect_sha = field.decode("ascii"), [], False
+            else:
+                paths.append(field.lstrip(b"\n").decode("utf-8", "replace"))
+        if sha is not None:
+            yield sha, paths
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+
+
+def _fields(stream) -> iter:
+    rest = b""
+    for block in iter(lambda: stream.read(READ_SIZE), b""):
+        fields = (rest + block).split(b"\0")
+        rest = fields.pop()
+        yield from fields
+    if rest:
+        yield rest
+
+
+def collect(revisions: list, validator, store=None, git_dir: str = None, shard: Shard = None, since: int = None,
+            capacity: int = SKETCH_CAPACITY) -> HistoryStats:
+    """
+    Check the commits of the given revisions and count their trends.
+
+    Args:
+        revisions (list): The `git rev-list` arguments.
+        validator (Validator): The validator.
+        store (ResultStore, optional): The store of the results. Defaults to None.
+        git_dir (str, optional): The git folder of the repository, the current repository if None.
+        shard (Shard, optional): Count only the commits of the shard. Defaults to None.
+        since (int, optional): Count only the commits authored since the unix timestamp. Defaults to None.
+        capacity (int, optional): The counters of the sketches. Defaults to `SKETCH_CAPACITY`.
+
+    Raises:
+        subprocess.CalledProcessError: If git failed, e.g. a revision is unknown.
+        ValueError: If `git log` and `git rev-list` listed the commits in different orders.
+
+    Returns:
+        HistoryStats: The trends.
+    """
+    stats = HistoryStats(capacity)
+    changes = changed_paths(revisions, git_dir)
+    if shard is not None:
+        changes = ((sha, paths) for sha, paths in changes if sha in shard)
+    for result in check_revisions(revisions, validator, store, git_dir, shard):
+        sha, paths = next(changes, (None, ()))
+        if sha != result.sha:
+            raise ValueError(f"git log listed {sha} instead of {result.sha}")
+        if since is None or result.time >= since:
+            stats.add(result, paths)
+    return stats
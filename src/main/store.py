@@ -0,0 +1,398 @@
+"""The store of the validation results of the commits.
+
+The results are kept in a SQLite database in the git folder shared by the worktrees,
+keyed by the object name of the commit and the fingerprint of the rule set,
+so a commit is validated once per rule set whatever the number of the runs.
+The hash of the message lets the results of a rewritten commit carry over to its new object name
+when its message didn't change(see `post-rewrite`).
+The failed rules are indexed by the author time, and the last indexed commit and the commits of every
+audited ref are kept, so an audit validates only the commits made since the previous one and counts
+only the commits of its ref.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from collections import namedtuple
+
+from . import git
+from .validator import Violation
+
+STORE_FILE = "commit-msg-hook.sqlite"
+# bump on any change of the schema
+SCHEMA_VERSION = 4
+# the older schemas the current one only adds tables to
+COMPATIBLE_SCHEMAS = (2, 3)
+# bump on any change of the built-in checks that changes their results
+CHECKS_VERSION = 2
+# the settings that change the results of the checks
+FINGERPRINT_SETTINGS = ("min_words", "words_limit", "categories", "bot_authors")
+# the host parameters of a single statement, SQLite allows 999 in the older versions
+CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    sha TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    message_hash TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    violations TEXT NOT NULL,
+    PRIMARY KEY (sha, fingerprint)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_by_time ON results (fingerprint, time);
+CREATE TABLE IF NOT EXISTS violations (
+    sha TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    PRIMARY KEY (sha, fingerprint, rule)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS violations_by_rule ON violations (fingerprint, rule, time);
+CREATE TABLE IF NOT EXISTS tips (
+    ref TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    PRIMARY KEY (ref, fingerprint)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS checkpoints (
+    ref TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    tip TEXT NOT NULL,
+    base TEXT NOT NULL,
+    processed INTEGER NOT NULL,
+    last_sha TEXT NOT NULL,
+    aggregates TEXT NOT NULL,
+    PRIMARY KEY (ref, fingerprint)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ref_commits (
+    ref TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    PRIMARY KEY (ref, fingerprint, sha)
+) WITHOUT ROWID;
+"""
+TABLES = ("results", "violations", "tips", "checkpoints", "ref_commits")
+
+
+class Result(namedtuple("Result", ["sha", "message_hash", "subject", "time", "violations"])):
+    """
+    The validation result of a commit.
+
+    Attributes:
+        sha (str): The object name of the commit.
+        message_hash (str): The hash of the message and the author.
+        subject (str): The subject line of the message.
+        time (int): The author time as a unix timestamp.
+        violations (list): The `Violation`s of the message(empty if it passed).
+    """
+
+    __slots__ = ()
+
+
+class Checkpoint(namedtuple("Checkpoint", ["ref", "tip", "base", "processed", "last_sha", "aggregates"])):
+    """
+    The progress of an interrupted audit.
+
+    Attributes:
+        ref (str): The audited ref.
+        tip (str): The commit the audit lists the history of.
+        base (str): The last indexed commit of the ref the audit lists the history since, empty if none.
+        processed (int): The number of the listed commits processed.
+        last_sha (str): The object name of the last processed commit.
+        aggregates (dict): The partial aggregates of the audit.
+    """
+
+    __slots__ = ()
+
+
+class ResultStore:
+    """
+    The SQLite store of the validation results.
+
+    A store is used by a single thread.
+
+    Attributes:
+        path (str): The path of the database.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def for_repo(cls, git_dir: str = None) -> "ResultStore":
+        """
+        Open the store of a repository.
+
+        Args:
+            git_dir (str, optional): The git folder of the repository. Defaults to the current one.
+
+        Raises:
+            FileNotFoundError: If not in a git repository.
+
+        Returns:
+            ResultStore: The store in the git folder shared by the worktrees.
+        """
+        git_dir = git_dir or git.git_dir()
+        if git_dir is None:
+            raise FileNotFoundError("not in a git repository")
+        return cls(os.path.join(git.common_dir(git_dir), STORE_FILE))
+
+    def get_many(self, shas: list, fingerprint: str) -> dict:
+        """
+        Get the stored results of the commits.
+
+        Args:
+            shas (list): The object names of the commits.
+            fingerprint (str): The fingerprint of the rule set.
+
+        Returns:
+            dict: The `Result`s of the stored commits by their object names.
+        """
+        results = {}
+        for chunk in _chunks(list(shas)):
+            rows = self._connection.execute(
+                f"SELECT sha, message_hash, subject, time, violations FROM results "
+                f"WHERE fingerprint = ? AND sha IN ({', '.join('?' * len(chunk))})", [fingerprint] + chunk)
+            for row in rows:
+                results[row[0]] = _result(row)
+        return results
+
+    def put_many(self, results: list, fingerprint: str, checkpoint: Checkpoint = None, listed: list = ()):
+        """
+        Store the results of the commits.
+
+        Args:
+            results (list): The `Result`s.
+            fingerprint (str): The fingerprint of the rule set.
+            checkpoint (Checkpoint, optional): The progress of the audit to store in the same transaction.
+                Defaults to None.
+            listed (list, optional): The object names of the commits the audit of the checkpoint processed
+                since its previous checkpoint, recorded as commits of its ref. Defaults to ().
+        """
+        results = list(results)
+        with self._connection:
+            if checkpoint is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO checkpoints (ref, fingerprint, tip, base, processed, last_sha, aggregates) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (checkpoint.ref, fingerprint, checkpoint.tip, checkpoint.base, checkpoint.processed,
+                     checkpoint.last_sha, json.dumps(checkpoint.aggregates)))
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO ref_commits (ref, fingerprint, sha) VALUES (?, ?, ?)",
+                    ((checkpoint.ref, fingerprint, sha) for sha in listed))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO results (sha, fingerprint, message_hash, subject, time, violations) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((result.sha, fingerprint, result.message_hash, result.subject, result.time,
+                  json.dumps([list(violation) for violation in result.violations])) for result in results))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO violations (sha, fingerprint, rule, time) VALUES (?, ?, ?, ?)",
+                ((result.sha, fingerprint, rule, result.time) for result in results
+                 for rule in dict.fromkeys(violation.rule for violation in result.violations)))
+
+    def carry_over(self, rewrites: list) -> int:
+        """
+        Copy the results of the rewritten commits to their new object names.
+
+        A result is copied only if the message of the new commit has the same hash,
+        the results of all the rule sets are copied.
+
+        Args:
+            rewrites (list): The `(old sha, new sha, new message hash)` tuples.
+
+        Returns:
+            int: The number of the copied results.
+        """
+        with self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO results (sha, fingerprint, message_hash, subject, time, violations) "
+                "SELECT ?, fingerprint, message_hash, subject, time, violations FROM results "
+                "WHERE sha = ? AND message_hash = ?",
+                ((new, old, message_hash) for old, new, message_hash in rewrites))
+            copied = self._connection.total_changes - before
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO violations (sha, fingerprint, rule, time) "
+                "SELECT ?, violations.fingerprint, rule, violations.time FROM violations JOIN results "
+                "ON results.sha = violations.sha AND results.fingerprint = violations.fingerprint "
+                "WHERE violations.sha = ? AND message_hash = ?",
+                ((new, old, message_hash) for old, new, message_hash in rewrites))
+            return copied
+
+    def get_tip(self, ref: str, fingerprint: str) -> str:
+        """
+        Get the last indexed commit of a ref.
+
+        Args:
+            ref (str): The name of the ref, e.g. `refs/heads/main`.
+            fingerprint (str): The fingerprint of the rule set.
+
+        Returns:
+            str: The object name of the commit, None if the ref wasn't indexed.
+        """
+        row = self._connection.execute("SELECT sha FROM tips WHERE ref = ? AND fingerprint = ?",
+                                       (ref, fingerprint)).fetchone()
+        return row and row[0]
+
+    def set_tip(self, ref: str, fingerprint: str, sha: str):
+        """
+        Record the last indexed commit of a ref, and drop the checkpoint of its audit.
+
+        Args:
+            ref (str): The name of the ref.
+            fingerprint (str): The fingerprint of the rule set.
+            sha (str): The object name of the commit.
+        """
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO tips (ref, fingerprint, sha) VALUES (?, ?, ?)",
+                                     (ref, fingerprint, sha))
+            self._connection.execute("DELETE FROM checkpoints WHERE ref = ? AND fingerprint = ?", (ref, fingerprint))
+
+    def reset(self, ref: str, fingerprint: str):
+        """
+        Forget the last indexed commit and the commits of a ref, e.g. after a force push.
+
+        Args:
+            ref (str): The name of the ref.
+            fingerprint (str): The fingerprint of the rule set.
+        """
+        with self._connection:
+            self._connection.execute("DELETE FROM tips WHERE ref = ? AND fingerprint = ?", (ref, fingerprint))
+            self._connection.execute("DELETE FROM ref_commits WHERE ref = ? AND fingerprint = ?", (ref, fingerprint))
+
+    def get_checkpoint(self, ref: str, fingerprint: str) -> Checkpoint:
+        """
+        Get the progress of an interrupted audit of a ref.
+
+        Args:
+            ref (str): The name of the ref.
+            fingerprint (str): The fingerprint of the rule set.
+
+        Returns:
+            Checkpoint: The progress, None if the last audit of the ref finished.
+        """
+        row = self._connection.execute(
+            "SELECT ref, tip, base, processed, last_sha, aggregates FROM checkpoints WHERE ref = ? AND fingerprint = ?",
+            (ref, fingerprint)).fetchone()
+        return row and Checkpoint(*row[:5], json.loads(row[5]))
+
+    def count(self, fingerprint: str, since: int = None, ref: str = None) -> tuple:
+        """
+        Count the indexed commits.
+
+        Args:
+            fingerprint (str): The fingerprint of the rule set.
+            since (int, optional): The earliest author time as a unix timestamp. Defaults to all the commits.
+            ref (str, optional): Count only the commits of the audited ref. Defaults to all the refs.
+
+        Returns:
+            tuple: The number of the indexed commits and of the failed ones.
+        """
+        if ref is None:
+            return self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(violations != '[]'), 0) FROM results "
+                "WHERE fingerprint = ? AND time >= ?", (fingerprint, since or 0)).fetchone()
+        return self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(violations != '[]'), 0) FROM ref_commits "
+            "JOIN results USING (sha, fingerprint) WHERE ref = ? AND fingerprint = ? AND time >= ?", (ref, fingerprint, since or 0)).fetchone()
+
+    def violations_by_rule(self, fingerprint: str, since: int = None, ref: str = None) -> dict:
+        """
+        Count the indexed commits failing every rule.
+
+        Args:
+            fingerprint (str): The fingerprint of the rule set.
+            since (int, optional): The earliest author time as a unix timestamp. Defaults to all the commits.
+            ref (str, optional): Count only the commits of the audited ref. Defaults to all the refs.
+
+        Returns:
+            dict: The number of the failed commits by rule, the most failed first.
+        """
+        if ref is None:
+            rows = self._connection.execute(
+                "SELECT rule, COUNT(*) AS failed FROM violations WHERE fingerprint = ? AND time >= ? "
+                "GROUP BY rule ORDER BY failed DESC, rule", (fingerprint, since or 0))
+        else:
+            rows = self._connection.execute(
+                "SELECT rule, COUNT(*) AS failed FROM ref_commits JOIN violations USING (sha, fingerprint) "
+                "WHERE ref = ? AND fingerprint = ? AND time >= ? "
+                "GROUP BY rule ORDER BY failed DESC, rule", (ref, fingerprint, since or 0))
+        return dict(rows.fetchall())
+
+    def close(self):
+        """Close the database."""
+        self._connection.close()
+
+    def _migrate(self):
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version in COMPATIBLE_SCHEMAS:
+            with self._connection:
+                self._connection.executescript(SCHEMA)
+                # the commits of the refs audited before weren't recorded, list them again(their results are kept)
+                self._connection.execute("DELETE FROM tips")
+                self._connection.execute("DELETE FROM checkpoints")
+                self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        elif version != SCHEMA_VERSION:
+            with self._connection:
+                # the results are a cache, an unknown schema is dropped rather than migrated
+                for table in TABLES:
+                    self._connection.execute(f"DROP TABLE IF EXISTS {table}")
+                self._connection.executescript(SCHEMA)
+                self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def fingerprint(validator) -> str:
+    """
+    Compute the fingerprint of the rule set of a validator.
+
+    Args:
+        validator (Validator): The validator.
+
+    Returns:
+        str: The hash of the rules, the backend and the settings the results depend on.
+    """
+    rule_set = {
+        "checks": CHECKS_VERSION,
+        "rules": [(rule.name, rule.target, rule.cost) for rule in validator.rules],
+        "backend": validator.backend.name,
+        "settings": {name: validator.settings.get(name) for name in FINGERPRINT_SETTINGS},
+    }
+    return hashlib.sha1(json.dumps(rule_set, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def message_hash(message: str, author: str = "") -> str:
+    """
+    Hash a commit message.
+
+    The author is hashed along with the message, as it can change the category of the message.
+
+    Args:
+        message (str): The commit message.
+        author (str, optional): The author as `Name <email>`. Defaults to "".
+
+    Returns:
+        str: The hash.
+    """
+    return hashlib.sha1(f"{author}\0{message}".encode("utf-8", "surrogateescape")).hexdigest()
+
+
+def _result(row: tuple) -> Result:
+    sha, hashed, subject, time, violations = row
+    return Result(sha, hashed, subject, time, [Violation(*violation) for violation in json.loads(violations)])
+
+
+def _chunks(items: list) -> iter:
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
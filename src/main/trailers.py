@@ -0,0 +1,61 @@
+"""Detect the trailer block of a commit message.
+
+The trailers(`Signed-off-by:`, `Co-authored-by:`, `Change-Id:`...) are metadata, not prose,
+so the rules skip them. The block is detected the same way `git interpret-trailers` does,
+in a single reverse scan of the last paragraph:
+
+* the block is the last paragraph and can't be the title paragraph
+* a line is a trailer if it starts with a token of letters, digits and `-` followed by `:`,
+  a line starting with a whitespace continues the previous trailer
+* the paragraph is a trailer block if all its lines are trailers, or if it contains a trailer
+  generated by git(`Signed-off-by: `, `(cherry picked from commit `) and at least 25% of its lines are trailers
+"""
+
+import re
+
+TRAILER_PATTERN = re.compile(r"[A-Za-z0-9-]+[ \t]*:")
+GIT_GENERATED_PREFIXES = ("Signed-off-by: ", "(cherry picked from commit ")
+
+
+def find_trailers(lines: list) -> int:
+    """
+    Find the trailer block of a commit message.
+
+    Args:
+        lines (list): The lines of the commit message, without the comments.
+
+    Returns:
+        int: The index of the first line of the trailer block, `len(lines)` if there is no block.
+    """
+    end_of_title = 0
+    while end_of_title < len(lines) and lines[end_of_title].strip():
+        end_of_title += 1
+    only_spaces = True
+    recognized_prefix = False
+    trailer_lines = 0
+    non_trailer_lines = 0
+    possible_continuation_lines = 0
+    for i in range(len(lines) - 1, end_of_title - 1, -1):
+        line = lines[i]
+        if not line.strip():
+            if only_spaces:
+                continue
+            non_trailer_lines += possible_continuation_lines
+            if (recognized_prefix and trailer_lines * 3 >= non_trailer_lines) or \
+                    (trailer_lines and not non_trailer_lines):
+                return i + 1
+            return len(lines)
+        only_spaces = False
+        if line.startswith(GIT_GENERATED_PREFIXES):
+            recognized_prefix = True
+            trailer_lines += 1
+            possible_continuation_lines = 0
+        elif TRAILER_PATTERN.match(line):
+            trailer_lines += 1
+            possible_continuation_lines = 0
+        elif line[0].isspace():
+            possible_continuation_lines += 1
+        else:
+            non_trailer_lines += 1 + possible_continuation_lines
+            possible_continuation_lines = 0
+    return len(lines)
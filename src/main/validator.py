@@ -0,0 +1,200 @@
+"""The validator of commit messages.
+
+A `Validator` holds everything that is shared between the validations:
+the backend with its model, the enabled rules and the settings.
+The model is loaded exactly once under the lock of the backend
+and every validation keeps its state local, so one validator
+can be shared by the threads of a pool.
+"""
+
+import re
+from collections import namedtuple
+
+from . import backends, rules
+from .classify import POLICY_CHEAP, POLICY_SKIP, Classifier
+from .colors import OFF, RED
+from .rules import Budget
+from .trailers import find_trailers
+
+ANSI_ESCAPE = re.compile(r"\033\[[0-9;]*m")
+
+
+class Violation(namedtuple("Violation", ["rule", "text"])):
+    """
+    A failed rule.
+
+    Attributes:
+        rule (str): The name of the rule, or of the message structure check(`separator`, `empty-body`).
+        text (str): The colored error messages of the rule.
+    """
+
+    __slots__ = ()
+
+    @property
+    def messages(self) -> list:
+        """
+        Get the plain text error messages.
+
+        Returns:
+            list: The messages without colors and the `error:` prefix.
+        """
+        return [line.split("\t", 1)[-1] for line in ANSI_ESCAPE.sub("", self.text).splitlines() if line.strip()]
+
+
+class Validator:
+    """
+    Validate commit messages according to chaos-hub team commit rules.
+
+    Attributes:
+        backend (backends.Backend): The imperative mood detection backend.
+        rules (list): The enabled rules.
+        cheap_rules (list): The enabled rules that don't require the model.
+        settings (dict): The repository settings.
+        fail_fast (bool): Stop at the first line with errors.
+        classifier (Classifier): The classifier of the generated messages.
+    """
+
+    def __init__(self, backend: backends.Backend = None, enabled_rules: list = None, settings: dict = None,
+                 fail_fast: bool = False):
+        """
+        Create a validator.
+
+        Raises:
+            ConfigError: If the rules or the message categories of the settings are invalid.
+        """
+        self.settings = dict(settings or {})
+        self.backend = backend or backends.get_backend(self.settings.get("backend"))
+        self.rules = rules.resolve_rules(self.settings.get("rules")) if enabled_rules is None else enabled_rules
+        self.cheap_rules = [rule for rule in self.rules if rule.cost == rules.COST_CHEAP]
+        self.fail_fast = fail_fast
+        self.classifier = Classifier(self.settings.get("categories"), self.settings.get("bot_authors"))
+
+    @property
+    def needs_backend(self) -> bool:
+        """
+        Check whether one of the enabled rules requires the backend.
+
+        Returns:
+            bool: True if the model of the backend is used.
+        """
+        return any("backend" in rule.requires for rule in self.rules)
+
+    def load(self):
+        """Load the model of the backend, if an enabled rule requires it."""
+        if self.needs_backend:
+            self.backend.load()
+
+    def preload(self):
+        """Start loading the model of the backend in the background, if an enabled rule requires it."""
+        if self.needs_backend:
+            self.backend.preload()
+
+    def check(self, msg: str, budget: Budget = None, author: str = None) -> list:
+        """
+        Check a commit message.
+
+        The generated messages(merges, reverts, fixups, bots) are checked according to the policy of their category.
+
+        Args:
+            msg (str): The commit message.
+            budget (Budget, optional): The latency budget, unbounded if None. Defaults to None.
+            author (str, optional): The author as `Name <email>`, to recognize the bots. Defaults to None.
+
+        Returns:
+            list: The violations(empty in a case of no errors).
+        """
+        policy = self.classifier.policy(msg, author)
+        if policy == POLICY_SKIP:
+            return []
+        enabled_rules = self.cheap_rules if policy == POLICY_CHEAP else self.rules
+        violations = self.check_subj_line(msg, budget, enabled_rules)
+        if not (self.fail_fast and violations):
+            violations += self.check_body(msg, budget, enabled_rules)
+        return violations
+
+    def check_subj_line(self, msg: str, budget: Budget = None, enabled_rules: list = None) -> list:
+        """
+        Check the subject line of a commit message.
+
+        Args:
+            msg (str): The commit message.
+            budget (Budget, optional): The latency budget, unbounded if None. Defaults to None.
+            enabled_rules (list, optional): The rules to run. Defaults to all the enabled rules.
+
+        Returns:
+            list: The violations(empty in a case of no errors).
+        """
+        subject = msg.splitlines()[0]
+        return self._check_line(subject, budget, enabled_rules)
+
+    def check_body(self, msg: str, budget: Budget = None, enabled_rules: list = None) -> list:
+        """
+        Check the body of a commit message.
+
+        The trailer block(e.g. `Signed-off-by:`, `Co-authored-by:`) at the end of the body isn't checked.
+
+        Args:
+            msg (str): The commit message.
+            budget (Budget, optional): The latency budget, unbounded if None. Defaults to None.
+            enabled_rules (list, optional): The rules to run. Defaults to all the enabled rules.
+
+        Returns:
+            list: The violations(empty in a case of no errors).
+        """
+        violations = []
+        lines = msg.splitlines()
+        if len(lines) > 1:
+            body = lines[1:find_trailers(lines)]
+            if lines[1].strip() != "":
+                violations.append(Violation("separator", f"\n{RED}\
+error:\tseparate the subject line from the message body with a blank line{OFF}\n"))
+            for line in body:
+                if self.fail_fast and violations:
+                    break
+                line = line.strip()
+                if line:
+                    line = remove_bullet(line)
+                    if line:
+                        violations += self._check_line(line, budget, enabled_rules)
+                    else:
+                        violations.append(Violation("empty-body", f"\n{RED}error:\tthe message body can't be empty{OFF}\n"))
+        return violations
+
+    def validate(self, msg: str, budget: Budget = None, author: str = None) -> str:
+        """
+        Validate a commit message.
+
+        Args:
+            msg (str): The commit message.
+            budget (Budget, optional): The latency budget, unbounded if None. Defaults to None.
+            author (str, optional): The author as `Name <email>`, to recognize the bots. Defaults to None.
+
+        Returns:
+            str: The detected errors(empty in a case of no errors).
+        """
+        return "".join(violation.text for violation in self.check(msg, budget, author))
+
+    def _check_line(self, line: str, budget: Budget = None, enabled_rules: list = None) -> list:
+        enabled_rules = self.rules if enabled_rules is None else enabled_rules
+        return [Violation(rule, text) for rule, text in
+                rules.run_rules(line, enabled_rules, self.backend, self.fail_fast, budget, self.settings)]
+
+
+def remove_bullet(body_line: str) -> str:
+    """Remove line bullet if exist.
+
+    Ex: get `* Fix bugs` return `Fix bugs`.
+
+    Args:
+        body_line (str): The single line of message body.
+
+    Returns:
+        str: The message without non-alpha characters at the beginning of the line.
+    """
+    content = ""
+    if body_line:
+        for i in range(len(body_line)):
+            if body_line[i].isalpha():
+                content = body_line[i:]
+                break
+    return content
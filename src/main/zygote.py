@@ -0,0 +1,160 @@
+"""Fork-server zygote for the hook runs.
+
+The zygote imports the hook, loads the tagger models and freezes its heap,
+then forks a fresh child for every hook run forwarded to its socket.
+A child inherits the warm heap copy-on-write, runs the hook in the working directory
+and the environment of the forwarding process, writes straight to its terminal and exits,
+so nothing is shared between the runs:
+
+    commit-msg-hook zygote --socket ~/.cache/commit-msg-hook/zygote.sock &
+    export COMMIT_MSG_HOOK_ZYGOTE=~/.cache/commit-msg-hook/zygote.sock
+"""
+
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+
+from .config import cache_dir
+
+SOCKET_FILE = "zygote.sock"
+# the header of a request: the arguments, the working directory and the environment
+MAX_HEADER = 1 << 20
+
+
+def default_socket() -> str:
+    """
+    Get the default path of the zygote socket.
+
+    Returns:
+        str: The `zygote.sock` file in the cache folder of the hook.
+    """
+    return os.path.join(cache_dir(), SOCKET_FILE)
+
+
+def request(path: str, argv: list) -> int:
+    """
+    Forward a hook run to the zygote.
+
+    The standard streams of the current process are passed to the child,
+    so the output goes straight to the terminal.
+
+    Args:
+        path (str): The path of the zygote socket.
+        argv (list): The command line arguments of the hook.
+
+    Returns:
+        int: The exit code of the run, None if the zygote isn't available.
+    """
+    if not hasattr(socket, "send_fds"):
+        return None
+    header = json.dumps({"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}).encode("utf-8")
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(os.path.expanduser(path))
+            socket.send_fds(client, [header], [0, 1, 2])
+            client.shutdown(socket.SHUT_WR)
+            reply = client.makefile("rb").readline()
+    except OSError:
+        return None
+    try:
+        return int(reply)
+    except ValueError:
+        return None
+
+
+def serve(path: str, backend_names: list):
+    """
+    Run the zygote.
+
+    Args:
+        path (str): The path of the socket to listen on.
+        backend_names (list): The backends to load before forking.
+    """
+    from . import backends, cli
+    for name in backend_names:
+        backends.get_backend(name).load()
+    # keep the warm heap out of the collector, so the children don't touch and copy its pages
+    gc.collect()
+    gc.freeze()
+    # the children are reaped by the kernel
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    path = os.path.expanduser(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if os.path.exists(path):
+        os.unlink(path)
+    old_umask = os.umask(0o177)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen(64)
+    try:
+        while True:
+            connection, _ = server.accept()
+            if os.fork() == 0:
+                server.close()
+                _run_child(connection, cli)
+            connection.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.unlink(path)
+
+
+def main(argv: list = None):
+    """
+    Extract arguments from command line and run the zygote.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to `sys.argv[1:]`.
+    """
+    from . import backends
+    parser = argparse.ArgumentParser(prog="commit-msg-hook zygote",
+                                     description="preload the hook and fork a child per hook run")
+    parser.add_argument("--socket", type=str, default=default_socket(), help="the path of the socket to listen on")
+    parser.add_argument("--backend", action="append", choices=sorted(backends.BACKENDS),
+                        help="the backend to preload, may be repeated(the default backend if not given)")
+    args = parser.parse_args(argv)
+    if not hasattr(os, "fork") or not hasattr(socket, "recv_fds"):
+        print("error: the zygote requires fork and unix sockets", file=sys.stderr)
+        sys.exit(1)
+    serve(args.socket, args.backend or [backends.DEFAULT_BACKEND])
+
+
+def _run_child(connection: socket.socket, cli):
+    code = 1
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        header, fds, _, _ = socket.recv_fds(connection, MAX_HEADER, 3)
+        data = header
+        while len(data) < MAX_HEADER:
+            chunk = connection.recv(MAX_HEADER)
+            if not chunk:
+                break
+            data += chunk
+        message = json.loads(data)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        os.chdir(message["cwd"])
+        os.environ.clear()
+        os.environ.update(message["env"])
+        os.environ.pop(cli.ZYGOTE_ENV, None)
+        try:
+            cli.main(message["argv"])
+            code = 0
+        except SystemExit as error:
+            code = error.code if isinstance(error.code, int) else (0 if error.code is None else 1)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        connection.sendall(f"{code}\n".encode("ascii"))
+    finally:
+        os._exit(code)
@@ -0,0 +1,75 @@
+"""The fixtures shared by the tests."""
+
+import os
+import subprocess
+
+import pytest
+
+IDENTITY = {
+    "GIT_AUTHOR_NAME": "Test Author", "GIT_AUTHOR_EMAIL": "author@example.com",
+    "GIT_COMMITTER_NAME": "Test Author", "GIT_COMMITTER_EMAIL": "author@example.com",
+}
+
+
+def git(cwd, *args) -> str:
+    """
+    Run git in a folder.
+
+    Args:
+        cwd (str): The folder.
+        *args: The git command and its arguments.
+
+    Returns:
+        str: The standard output.
+    """
+    return subprocess.run(["git", *args], cwd=str(cwd), check=True, stdout=subprocess.PIPE,
+                          universal_newlines=True).stdout
+
+
+@pytest.fixture(autouse=True)
+def isolated_env(tmp_path, monkeypatch):
+    """Keep the tests away from the git config, the cache and the zygote of the user."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    monkeypatch.delenv("GIT_DIR", raising=False)
+    monkeypatch.delenv("COMMIT_MSG_HOOK_ZYGOTE", raising=False)
+    for name, value in IDENTITY.items():
+        monkeypatch.setenv(name, value)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A new repository on the `main` branch."""
+    path = tmp_path / "repo"
+    path.mkdir()
+    git(path, "init", "-q")
+    git(path, "symbolic-ref", "HEAD", "refs/heads/main")
+    return path
+
+
+def commit(path, message: str) -> str:
+    """
+    Make an empty commit.
+
+    Args:
+        path (str): The repository.
+        message (str): The commit message.
+
+    Returns:
+        str: The object name of the commit.
+    """
+    git(path, "commit", "-q", "--allow-empty", "--cleanup=verbatim", "-m", message)
+    return git(path, "rev-parse", "HEAD").strip()
+
+
+def source_env() -> dict:
+    """
+    Get the environment to run the hook from the source tree in a subprocess.
+
+    Returns:
+        dict: The environment with the `src` folder on the python path.
+    """
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src, os.environ.get("PYTHONPATH")])))
@@ -0,0 +1,136 @@
+"""The tests of the incremental audit."""
+
+import subprocess
+import sys
+
+import pytest
+
+from main import history
+from main.audit import audit, store_key, summarize
+from main.backends import get_backend
+from main.store import ResultStore, fingerprint
+from main.validator import Validator
+
+from .conftest import commit, git, source_env
+
+# the commits of a chunk in the resume tests, so a run spans a few chunks
+CHUNK = 10
+# the audit killed in a process of its own after validating a number of messages(the first argument)
+KILLED_AUDIT = """import os, signal, sys
+from main import history
+from main.audit import audit
+from main.backends import get_backend
+from main.store import ResultStore
+from main.validator import Validator
+
+history.CHUNK_SIZE = {chunk}
+
+
+class KilledValidator(Validator):
+    def check(self, msg, budget=None, author=None):
+        with open("checked.txt", "a") as file:
+            file.write(msg.strip() + "\\n")
+        if sum(1 for _ in open("checked.txt")) == int(sys.argv[1]):
+            os.kill(os.getpid(), signal.SIGKILL)
+        return super().check(msg, budget, author)
+
+
+audit("main", KilledValidator(get_backend("lexicon")), ResultStore.for_repo(), None)
+"""
+
+
+class InterruptedValidator(Validator):
+    """A validator recording the checked messages, interrupted like by Ctrl-C after a number of them."""
+
+    def __init__(self, interrupt_after: int = None):
+        super().__init__(get_backend("lexicon"))
+        self.interrupt_after = interrupt_after
+        self.checked = []
+
+    def check(self, msg: str, budget=None, author: str = None) -> list:
+        if len(self.checked) == self.interrupt_after:
+            raise KeyboardInterrupt
+        self.checked.append(msg.strip())
+        return super().check(msg, budget, author)
+
+
+def make_history(repo, messages: list) -> list:
+    """Commit the messages in order, return the object names."""
+    return [commit(repo, message) for message in messages]
+
+
+def test_counts_cover_only_the_audited_ref(repo):
+    make_history(repo, ["Add the parser", "Fixed the lexer", "Update the docs"])
+    git(repo, "checkout", "-q", "-b", "side")
+    make_history(repo, ["Added a side feature", "Add the side tests"])
+    git(repo, "checkout", "-q", "main")
+    validator = Validator(get_backend("lexicon"))
+    with ResultStore.for_repo(str(repo / ".git")) as store:
+        audit("side", validator, store, str(repo / ".git"))
+        assert summarize("side", validator, store, str(repo / ".git"))[:2] == (5, 2)
+
+        report = audit("main", validator, store, str(repo / ".git"))
+
+        assert report["commits"] == 3
+        indexed, failed, by_rule = summarize("main", validator, store, str(repo / ".git"))
+        assert (indexed, failed) == (3, 1)
+        assert by_rule == {"imperative": 1}
+
+
+def test_counts_follow_a_rewritten_ref(repo):
+    base = make_history(repo, ["Add the parser", "Fixed the lexer"])[0]
+    validator = Validator(get_backend("lexicon"))
+    with ResultStore.for_repo(str(repo / ".git")) as store:
+        audit("main", validator, store, str(repo / ".git"))
+        git(repo, "reset", "-q", "--hard", base)
+        make_history(repo, ["Fix the lexer", "Add the tests"])
+
+        report = audit("main", validator, store, str(repo / ".git"))
+
+        assert report["commits"] == 3
+        assert summarize("main", validator, store, str(repo / ".git"))[:2] == (3, 0)
+
+
+def long_history(repo) -> list:
+    """Commit a history spanning a few chunks, return the messages."""
+    messages = [f"{'Add' if i % 3 else 'Added'} the feature {i}" for i in range(35)]
+    make_history(repo, messages)
+    return messages
+
+
+@pytest.mark.parametrize("interrupt_after", [5, 15, 20, 34])
+def test_resumed_audit_checks_every_commit_once(repo, monkeypatch, interrupt_after):
+    monkeypatch.setattr(history, "CHUNK_SIZE", CHUNK)
+    messages = long_history(repo)
+    first = InterruptedValidator(interrupt_after)
+    with ResultStore.for_repo(str(repo / ".git")) as store:
+        with pytest.raises(KeyboardInterrupt):
+            audit("main", first, store, str(repo / ".git"))
+
+        resumed = InterruptedValidator()
+        report = audit("main", resumed, store, str(repo / ".git"))
+
+        # the stored chunks aren't validated again, the one cut short is
+        checkpointed = interrupt_after // CHUNK * CHUNK
+        assert first.checked[:checkpointed] + resumed.checked == list(reversed(messages))
+        assert (report["commits"], report["failed"]) == (35, 12)
+        assert summarize("main", resumed, store, str(repo / ".git"))[:2] == (35, 12)
+
+
+def test_killed_audit_resumes_without_gaps_or_repeats(repo):
+    messages = long_history(repo)
+    script = repo / "killed_audit.py"
+    script.write_text(KILLED_AUDIT.format(chunk=CHUNK))
+
+    killed = subprocess.run([sys.executable, str(script), "25"], cwd=str(repo), env=source_env())
+    assert killed.returncode < 0
+    checked = (repo / "checked.txt").read_text().splitlines()
+
+    validator = InterruptedValidator()
+    with ResultStore.for_repo(str(repo / ".git")) as store:
+        report = audit("main", validator, store, str(repo / ".git"))
+
+        # the two committed chunks aren't validated again, the killed one is
+        assert checked[:20] + validator.checked == list(reversed(messages))
+        assert (report["commits"], report["failed"]) == (35, 12)
+        assert summarize("main", validator, store, str(repo / ".git"))[:2] == (35, 12)
@@ -0,0 +1,90 @@
+"""The tests of the classifier of the generated messages."""
+
+import pytest
+
+from main.backends import LexiconBackend
+from main.classify import Classifier
+from main.config import ConfigError
+from main.validator import Validator
+
+BOT = "dependabot[bot] <49699333+dependabot[bot]@users.noreply.github.com>"
+PERSON = "Test Author <author@example.com>"
+
+
+class UnusedBackend(LexiconBackend):
+    """The lexicon backend failing the test if the model is used."""
+
+    def tag(self, msg: str) -> list:
+        raise AssertionError("the model was used")
+
+
+def rules_failed(validator: Validator, msg: str, author: str = PERSON) -> set:
+    """Check a message, return the names of the failed rules."""
+    return {violation.rule for violation in validator.check(msg, author=author)}
+
+
+@pytest.mark.parametrize("msg, category", [
+    ("Merge branch 'feature' into main", "merge"),
+    ("Merge pull request #12 from org/feature", "merge"),
+    ("Merge remote-tracking branch 'origin/main'", "merge"),
+    ("Merge 1a2b3c4d into 5e6f7a8b", "merge"),
+    ('Revert "Add the parser"', "revert"),
+    ('Reapply "Add the parser"', "revert"),
+    ("fixup! Add the parser", "fixup"),
+    ("amend! Add the parser", "fixup"),
+    ("squash! Add the parser", "squash"),
+    ("Add the parser", None),
+    ("Merged the branches", None),
+    ("Reverted the parser", None),
+])
+def test_categories_by_subject(msg, category):
+    assert Classifier().classify(msg, PERSON) == category
+
+
+@pytest.mark.parametrize("author, category", [
+    (BOT, "bot"),
+    ("renovate <bot@renovateapp.com>", "bot"),
+    ("Release Robot <release-robot@example.com>", None),
+    (PERSON, None),
+    (None, None),
+])
+def test_bots_by_author(author, category):
+    assert Classifier().classify("Bump nltk from 3.7 to 3.8", author) == category
+
+
+def test_extra_bot_authors():
+    classifier = Classifier(bot_authors=[r"release-robot@"])
+
+    assert classifier.classify("Bump nltk from 3.7 to 3.8", "Release Robot <release-robot@example.com>") == "bot"
+
+
+def test_the_subject_wins_over_the_author():
+    assert Classifier().classify("Merge branch 'deps' into main", BOT) == "merge"
+
+
+@pytest.mark.parametrize("categories, bot_authors", [({"tags": "skip"}, None), ({"merge": "never"}, None),
+                                                     (None, ["(unclosed"])])
+def test_invalid_config(categories, bot_authors):
+    with pytest.raises(ConfigError):
+        Classifier(categories, bot_authors)
+
+
+def test_skip_policy_checks_nothing():
+    validator = Validator(UnusedBackend())
+
+    assert validator.check("Merge branch 'feature' into main.", author=PERSON) == []
+    assert validator.check("bump nltk from 3.7 to 3.8.", author=BOT) == []
+
+
+def test_cheap_policy_skips_the_rules_requiring_the_model():
+    validator = Validator(UnusedBackend(), settings={"categories": {"fixup": "cheap", "bot": "cheap"}})
+
+    assert rules_failed(validator, "fixup! added the parser.") == {"prefix", "ending"}
+    assert rules_failed(validator, "bump nltk from 3.7 to 3.8.", BOT) == {"prefix", "ending"}
+
+
+def test_full_policy_checks_like_any_message():
+    validator = Validator(LexiconBackend(), settings={"categories": {"revert": "full", "bot": "full"}})
+
+    assert rules_failed(validator, 'Revert "Add the parser"') == {"ending"}
+    assert rules_failed(validator, "Bumped nltk from 3.7 to 3.8", BOT) == {"imperative"}
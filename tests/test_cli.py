@@ -0,0 +1,84 @@
+"""The tests of the hook run on many message files."""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from main import lexicon
+from main.backends import LexiconBackend
+from main.cli import run_hooks
+from main.rules import Budget
+from main.validator import ANSI_ESCAPE, Validator
+
+from .conftest import source_env
+
+# the first message fails the cheap checks, so the fail-fast mode cancels the loading of the model
+MESSAGES = ["added the parser.", "Added the lexer", "Fixed the cache"]
+
+
+class SlowBackend(LexiconBackend):
+    """The lexicon backend loading its model in a few steps, slow enough to be cancelled.
+
+    Attributes:
+        loaded_by (str): The name of the thread that finished the loading.
+    """
+
+    loaded_by = None
+
+    def load_steps(self) -> list:
+        return [lambda: time.sleep(0.2), lambda: time.sleep(0.2), self._finish]
+
+    def _finish(self):
+        lexicon.load_lexicon()
+        self.loaded_by = threading.current_thread().name
+
+
+def message_files(tmp_path) -> list:
+    """Write the messages, a file each."""
+    paths = []
+    for i, message in enumerate(MESSAGES):
+        paths.append(tmp_path / f"message-{i}.txt")
+        paths[-1].write_text(message + "\n")
+    return [str(path) for path in paths]
+
+
+def errors_by_file(output: str, paths: list) -> list:
+    """Split the plain output of the hook into the errors of every file."""
+    output = ANSI_ESCAPE.sub("", output)
+    starts = [output.index(path) for path in paths]
+    return [output[start:end] for start, end in zip(starts, starts[1:] + [len(output)])]
+
+
+@pytest.mark.parametrize("budget_ms", [None, 5000])
+def test_fail_fast_keeps_the_imperative_check_of_the_later_messages(tmp_path, capsys, budget_ms):
+    paths = message_files(tmp_path)
+    validator = Validator(SlowBackend(), fail_fast=True)
+    validator.preload()
+
+    with pytest.raises(SystemExit) as exit_info:
+        run_hooks(paths, validator, Budget(budget_ms))
+
+    assert exit_info.value.code == 1
+    first, second, third = errors_by_file(capsys.readouterr().out, paths)
+    assert "imperative mood" not in first
+    assert "the word  Added  must be in imperative mood" in second
+    assert "the word  Fixed  must be in imperative mood" in third
+    # the cancelled loading is started again in the background, the budget still bounds the wait for it
+    assert validator.backend.loaded_by == "preload-lexicon"
+
+
+def test_hook_process_with_fail_fast_checks_every_message(tmp_path):
+    paths = message_files(tmp_path)
+
+    result = subprocess.run([sys.executable, "-m", "main", *paths, "--fail-fast", "--backend", "lexicon",
+                             "--budget-ms", "5000"], env=source_env(), stdout=subprocess.PIPE, universal_newlines=True)
+
+    assert result.returncode == 1
+    assert "3 of 3 commit messages failed" in result.stdout
+    assert "skipped" not in result.stdout
+    first, second, third = errors_by_file(result.stdout, paths)
+    assert "the word  Added  must be in imperative mood" in second
+    assert "the word  Fixed  must be in imperative mood" in third
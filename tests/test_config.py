@@ -0,0 +1,29 @@
+"""The tests of the repository configuration."""
+
+import pytest
+
+from main.config import CONFIG_FILE, ConfigError, compile_policy
+
+
+def write_config(repo, content: str) -> str:
+    """Write the configuration file into the root folder, return its path."""
+    path = repo / CONFIG_FILE
+    path.write_text(content)
+    return str(path)
+
+
+def test_overrides_apply_to_their_paths(repo):
+    source = write_config(repo, 'min_words = 2\n\n[[overrides]]\npaths = ["services/payments/*"]\nmin_words = 3\n')
+
+    policy = compile_policy([source], str(repo))
+
+    assert policy.resolve(["docs/index.md"]) == {"min_words": 2}
+    assert policy.resolve(["services/payments/api.py"]) == {"min_words": 3}
+
+
+@pytest.mark.parametrize("overrides", ["overrides = [1]", 'overrides = ["services/*"]', "overrides = [[1, 2]]"])
+def test_an_override_must_be_a_table(repo, overrides):
+    source = write_config(repo, overrides + "\n")
+
+    with pytest.raises(ConfigError, match="array of tables"):
+        compile_policy([source], str(repo))
@@ -0,0 +1,127 @@
+"""The tests of the staged changes read from the index."""
+
+import os
+import subprocess
+
+import pytest
+
+from main import cli, git as hook_git, index
+from main.config import CONFIG_FILE
+
+from .conftest import commit, git
+
+
+def write(repo, path: str, content: str):
+    """Write a file into the working tree, creating its folders."""
+    path = repo / path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def diff_cached(repo) -> list:
+    """List the staged paths the way git does."""
+    return sorted(path for path in git(repo, "diff", "--cached", "--name-only", "-z").split("\0") if path)
+
+
+def make_tree(repo):
+    """Commit a few nested folders of files."""
+    for folder in ("docs", "services/payments", "services/search/api", "tools"):
+        for name in ("a.txt", "b.txt"):
+            write(repo, f"{folder}/{name}", f"{folder} {name}\n" * 20)
+    write(repo, "README.md", "readme\n")
+    git(repo, "add", "-A")
+    commit(repo, "Add the tree")
+
+
+def change_tree(repo):
+    """Stage every kind of change."""
+    write(repo, "services/payments/a.txt", "changed\n")
+    write(repo, "services/search/api/new.txt", "new\n")
+    git(repo, "rm", "-q", "tools/b.txt")
+    git(repo, "update-index", "--chmod=+x", "docs/a.txt")
+    os.symlink("README.md", str(repo / "link"))
+    write(repo, "unstaged.txt", "not added\n")
+    git(repo, "add", "services", "link")
+
+
+@pytest.mark.parametrize("version", ["2", "3", "4"])
+def test_staged_paths_match_git(repo, version):
+    git(repo, "config", "index.version", version)
+    make_tree(repo)
+    change_tree(repo)
+    write(repo, "docs/intent.txt", "intent\n")
+    git(repo, "add", "-N", "docs/intent.txt")
+    git(repo, "update-index", f"--index-version={version}")
+
+    assert index.staged_paths(str(repo / ".git")) == diff_cached(repo)
+    assert "services/payments/a.txt" in diff_cached(repo)
+
+
+def test_staged_paths_read_the_packed_objects(repo):
+    make_tree(repo)
+    for i in range(3):
+        write(repo, "services/payments/a.txt", f"version {i}\n")
+        git(repo, "commit", "-q", "-am", f"Change the payments {i}")
+    git(repo, "gc", "-q", "--aggressive")
+    assert not [name for name in os.listdir(str(repo / ".git/objects")) if len(name) == 2]
+    change_tree(repo)
+
+    assert index.staged_paths(str(repo / ".git")) == diff_cached(repo)
+
+
+def test_staged_paths_without_the_cached_trees(repo):
+    make_tree(repo)
+    change_tree(repo)
+    # reading the tree into the index drops its cached trees
+    git(repo, "read-tree", "HEAD")
+    git(repo, "add", "services")
+
+    assert index.staged_paths(str(repo / ".git")) == diff_cached(repo)
+
+
+def test_staged_paths_of_the_first_commit(repo):
+    write(repo, "docs/a.txt", "a\n")
+    git(repo, "add", "-A")
+
+    assert index.staged_paths(str(repo / ".git")) == ["docs/a.txt"]
+
+
+def test_staged_paths_of_a_linked_worktree(repo, tmp_path):
+    make_tree(repo)
+    git(repo, "pack-refs", "--all")
+    worktree = tmp_path / "worktree"
+    git(repo, "worktree", "add", "-q", "-b", "side", str(worktree))
+    write(worktree, "docs/b.txt", "changed\n")
+    git(worktree, "add", "docs")
+
+    assert index.staged_paths(hook_git.git_dir(str(worktree))) == ["docs/b.txt"]
+
+
+def test_commit_all_reads_the_temporary_index(repo):
+    make_tree(repo)
+    write(repo, "tools/a.txt", "changed\n")
+    hook = repo / ".git" / "hooks" / "commit-msg"
+    script = "import sys; from main import git; open(sys.argv[1] + '.paths', 'w').write(' '.join(git.staged_paths()))"
+    hook.write_text(f'#!/bin/sh\nexec "{__import__("sys").executable}" -c "{script}" "$1"\n')
+    hook.chmod(0o755)
+    env = dict(os.environ, PYTHONPATH=os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+    subprocess.run(["git", "commit", "-q", "-am", "Change the tools"], cwd=str(repo), env=env, check=True)
+
+    assert (repo / ".git" / "COMMIT_EDITMSG.paths").read_text() == "tools/a.txt"
+
+
+def test_overrides_are_resolved_without_running_git(repo, monkeypatch):
+    write(repo, CONFIG_FILE, 'min_words = 2\n\n[[overrides]]\npaths = ["services/payments/*"]\nmin_words = 3\n')
+    make_tree(repo)
+    write(repo, "services/payments/a.txt", "changed\n")
+    git(repo, "add", "-A")
+    monkeypatch.chdir(repo)
+
+    def no_fork(*args, **kwargs):
+        raise AssertionError("the commit-msg path ran a process")
+
+    monkeypatch.setattr(subprocess, "run", no_fork)
+    monkeypatch.setattr(subprocess, "Popen", no_fork)
+
+    assert cli.load_settings()["min_words"] == 3
@@ -0,0 +1,64 @@
+"""The tests of the messages of an interactive rebase."""
+
+import sys
+
+import pytest
+
+from main import rebase
+
+from .conftest import commit
+
+# an editor replaying the prepared edits in order and keeping the files it was opened on
+EDITOR = """import os, shutil, sys
+folder, path = sys.argv[1], sys.argv[2]
+step = len([name for name in os.listdir(folder) if name.startswith("seen")]) + 1
+shutil.copy(path, os.path.join(folder, f"seen{step}"))
+if os.path.exists(os.path.join(folder, f"edit{step}")):
+    shutil.copy(os.path.join(folder, f"edit{step}"), path)
+"""
+
+
+def scripted_editor(tmp_path, edits: dict) -> tuple:
+    """Prepare an editor replacing the file with the edits by the number of the call."""
+    folder = tmp_path / "editor"
+    folder.mkdir()
+    (folder / "editor.py").write_text(EDITOR)
+    for step, content in edits.items():
+        (folder / f"edit{step}").write_text(content)
+    return f'"{sys.executable}" "{folder / "editor.py"}" "{folder}"', folder
+
+
+def test_edits_are_kept_when_a_separator_is_lost(repo, tmp_path, monkeypatch):
+    commit(repo, "Add the base")
+    sha = commit(repo, "Add the parser")
+    todo = tmp_path / "git-rebase-todo"
+    todo.write_text(f"reword {sha[:7]} Add the parser\n")
+    # the todo list is kept, the separator of the message is deleted, then put back
+    command, folder = scripted_editor(tmp_path, {2: "Add the lexer\n", 3: f"### reword {sha[:7]}\nAdd the lexer\n"})
+    monkeypatch.chdir(repo)
+
+    with pytest.raises(SystemExit) as exit_info:
+        rebase.main([str(todo), "--editor", command, "--backend", "lexicon"])
+
+    assert exit_info.value.code == 0
+    reopened = (folder / "seen3").read_text()
+    assert reopened.startswith("# error: keep the ### lines")
+    assert "Add the lexer" in reopened
+    lines = todo.read_text().splitlines()
+    assert lines[0] == f"pick {sha[:7]} Add the parser"
+    assert lines[1].startswith("exec git commit --amend")
+    assert (todo.parent / rebase.MESSAGES_FOLDER / "1.txt").read_text() == "Add the lexer\n"
+
+
+def test_an_unfixed_separator_aborts_the_rebase(repo, tmp_path, monkeypatch):
+    sha = commit(repo, "Add the parser")
+    todo = tmp_path / "git-rebase-todo"
+    todo.write_text(f"reword {sha[:7]} Add the parser\n")
+    command, folder = scripted_editor(tmp_path, {2: "Add the lexer\n"})
+    monkeypatch.chdir(repo)
+
+    with pytest.raises(SystemExit) as exit_info:
+        rebase.main([str(todo), "--editor", command, "--backend", "lexicon"])
+
+    assert exit_info.value.code == 1
+    assert todo.read_text() == f"reword {sha[:7]} Add the parser\n"
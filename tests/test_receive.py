@@ -0,0 +1,67 @@
+"""The tests of the `pre-receive` hook."""
+
+import stat
+import subprocess
+import sys
+
+from main.backends import get_backend
+from main.receive import check_push
+from main.rules import Budget
+from main.validator import Validator
+
+from .conftest import commit, git, source_env
+
+
+def server_with_hook(tmp_path):
+    """Create a bare repository running the hook from the source tree."""
+    server = tmp_path / "server.git"
+    git(tmp_path, "init", "-q", "--bare", str(server))
+    hook = server / "hooks" / "pre-receive"
+    hook.write_text(f'#!/bin/sh\nexec "{sys.executable}" -m main pre-receive --backend lexicon\n')
+    hook.chmod(hook.stat().st_mode | stat.S_IEXEC)
+    return server
+
+
+def push(repo, server) -> subprocess.CompletedProcess:
+    """Push the `main` branch of a repository to the server."""
+    return subprocess.run(["git", "push", str(server), "main"], cwd=str(repo), env=source_env(),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def test_check_push_reports_a_punctuation_subject(repo, monkeypatch):
+    base = commit(repo, "Add the base")
+    wip = commit(repo, "--- wip")
+    fixed = commit(repo, "Fix the parser")
+    # the pushed commits aren't on any ref yet
+    git(repo, "update-ref", "refs/heads/main", base)
+    monkeypatch.chdir(repo)
+    validator = Validator(get_backend("lexicon"))
+
+    checked, failures, unchecked = check_push([(base, fixed, "refs/heads/main")], validator, Budget())
+
+    assert (checked, unchecked) == (2, 0)
+    assert [commit.sha for commit, _ in failures] == [wip]
+    assert "prefix" in {violation.rule for violation in failures[0][1]}
+
+
+def test_push_with_a_punctuation_subject_is_rejected_by_the_rules(repo, tmp_path):
+    server = server_with_hook(tmp_path)
+    commit(repo, "Add the base")
+    commit(repo, "--- wip thing")
+
+    result = push(repo, server)
+
+    assert result.returncode != 0
+    assert "Traceback" not in result.stderr
+    assert "1 of 2 new commits have invalid messages" in result.stderr
+    assert "--- wip thing" in result.stderr
+
+
+def test_push_of_valid_commits_is_accepted(repo, tmp_path):
+    server = server_with_hook(tmp_path)
+    tip = commit(repo, "Add the base")
+
+    result = push(repo, server)
+
+    assert result.returncode == 0, result.stderr
+    assert git(server, "rev-parse", "main").strip() == tip
@@ -0,0 +1,73 @@
+"""The tests of the results carried over to the rewritten commits."""
+
+import stat
+import subprocess
+import sys
+
+from main.audit import audit
+from main.backends import get_backend
+from main.rewrite import carry_over
+from main.store import ResultStore, fingerprint
+from main.validator import Validator
+
+from .conftest import commit, git, source_env
+
+
+def amend(repo, *args):
+    """Amend the last commit with a new file, so its object name changes even within the same second."""
+    (repo / "amended.txt").write_text(" ".join(args) + "\n")
+    git(repo, "add", "amended.txt")
+    subprocess.run(["git", "commit", "-q", "--amend", "--cleanup=verbatim", *args], cwd=str(repo), env=source_env(),
+                   check=True)
+    return git(repo, "rev-parse", "HEAD").strip()
+
+
+def indexed(repo, validator: Validator) -> ResultStore:
+    """Index the history of the `main` branch, return the store."""
+    store = ResultStore.for_repo(str(repo / ".git"))
+    audit("main", validator, store, str(repo / ".git"))
+    return store
+
+
+def test_amend_keeping_the_message_carries_the_result_over(repo):
+    commit(repo, "Add the base")
+    old = commit(repo, "Added the parser")
+    validator = Validator(get_backend("lexicon"))
+    with indexed(repo, validator) as store:
+        new = amend(repo, "--no-edit")
+
+        copied = carry_over([(old, new)], store, str(repo / ".git"))
+
+        assert copied == 1
+        results = store.get_many([old, new], fingerprint(validator))
+        assert results[new].violations == results[old].violations
+        assert [violation.rule for violation in results[new].violations] == ["imperative"]
+
+
+def test_amend_editing_the_message_doesnt_carry_the_result_over(repo):
+    commit(repo, "Add the base")
+    old = commit(repo, "Added the parser")
+    validator = Validator(get_backend("lexicon"))
+    with indexed(repo, validator) as store:
+        new = amend(repo, "-m", "Add the parser")
+
+        copied = carry_over([(old, new)], store, str(repo / ".git"))
+
+        assert copied == 0
+        assert list(store.get_many([old, new], fingerprint(validator))) == [old]
+
+
+def test_post_rewrite_hook_carries_the_results_of_an_amend(repo):
+    commit(repo, "Add the base")
+    old = commit(repo, "Added the parser")
+    hook = repo / ".git" / "hooks" / "post-rewrite"
+    hook.write_text(f'#!/bin/sh\nexec "{sys.executable}" -m main post-rewrite "$@"\n')
+    hook.chmod(hook.stat().st_mode | stat.S_IEXEC)
+    validator = Validator(get_backend("lexicon"))
+    indexed(repo, validator).close()
+
+    kept = amend(repo, "--no-edit")
+    edited = amend(repo, "-m", "Add the parser")
+
+    with ResultStore.for_repo(str(repo / ".git")) as store:
+        assert set(store.get_many([old, kept, edited], fingerprint(validator))) == {old, kept}
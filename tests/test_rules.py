@@ -0,0 +1,99 @@
+"""The tests of running the rules within the latency budget."""
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+from main import lexicon
+from main.backends import LexiconBackend
+from main.cli import run_hook
+from main.rules import Budget
+from main.validator import Validator
+
+from .conftest import source_env
+
+# the hook with a backend whose model can't be loaded, like NLTK missing
+BROKEN_HOOK = """import sys
+from main import backends, cli
+
+
+class BrokenBackend(backends.LexiconBackend):
+    name = "broken"
+
+    def load_steps(self):
+        return [self.fail]
+
+    def fail(self):
+        raise ImportError("No module named 'nltk'")
+
+
+backends.BACKENDS[BrokenBackend.name] = BrokenBackend
+cli.main(sys.argv[1:])
+"""
+
+
+class BrokenBackend(LexiconBackend):
+    """The lexicon backend failing to load its model."""
+
+    def load_steps(self) -> list:
+        return [self._fail]
+
+    def _fail(self):
+        raise ImportError("No module named 'nltk'")
+
+
+class SlowBackend(LexiconBackend):
+    """The lexicon backend taking a second to load its model."""
+
+    def load_steps(self) -> list:
+        return [lambda: time.sleep(1), lexicon.load_lexicon]
+
+
+@pytest.mark.parametrize("budget_ms", [None, 5000])
+def test_failed_model_load_fails_the_hook(budget_ms):
+    validator = Validator(BrokenBackend())
+    validator.preload()
+
+    with pytest.raises(ImportError):
+        run_hook("Add the parser", validator, Budget(budget_ms))
+
+
+@pytest.mark.parametrize("budget", [[], ["--budget-ms", "5000"]])
+def test_hook_process_fails_on_a_failed_model_load(tmp_path, budget):
+    message = tmp_path / "message.txt"
+    message.write_text("Add the parser\n")
+
+    result = subprocess.run([sys.executable, "-c", BROKEN_HOOK, str(message), "--backend", "broken"] + budget,
+                            env=source_env(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+    assert result.returncode != 0
+    assert "No module named 'nltk'" in result.stderr
+    assert "skipped" not in result.stdout
+
+
+def test_load_over_the_budget_skips_the_imperative_check(capsys):
+    validator = Validator(SlowBackend())
+    validator.preload()
+
+    with pytest.raises(SystemExit) as exit_info:
+        run_hook("Added the parser", validator, Budget(50))
+
+    assert exit_info.value.code == 0
+    output = capsys.readouterr().out
+    assert "the imperative check is skipped, it can't finish within the 50 ms budget" in output
+    assert "error" not in output
+
+
+def test_load_within_the_budget_runs_the_imperative_check(capsys):
+    validator = Validator(SlowBackend())
+    validator.preload()
+
+    with pytest.raises(SystemExit) as exit_info:
+        run_hook("Added the parser", validator, Budget(5000))
+
+    assert exit_info.value.code == 1
+    output = capsys.readouterr().out
+    assert "imperative mood" in output
+    assert "skipped" not in output
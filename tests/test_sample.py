@@ -0,0 +1,43 @@
+"""The tests of the sampled estimates."""
+
+from main.backends import get_backend
+from main.sample import allocate, estimate
+from main.validator import Validator
+
+from .conftest import commit
+
+
+def commit_authored(repo, monkeypatch, message: str, date: str) -> str:
+    """Make a commit authored at the date and committed now."""
+    monkeypatch.setenv("GIT_AUTHOR_DATE", date)
+    return commit(repo, message)
+
+
+def test_allocate_gives_every_stratum_an_item():
+    assert allocate(3, {"a": 100, "b": 1, "c": 1}) == {"a": 1, "b": 1, "c": 1}
+    assert allocate(12, {"a": 100, "b": 10, "c": 1}) == {"a": 9, "b": 2, "c": 1}
+    assert allocate(2, {"a": 100, "b": 1, "c": 1}) == {"a": 2, "b": 0, "c": 0}
+
+
+def test_strata_are_the_author_years(repo, monkeypatch):
+    for i in range(3):
+        commit_authored(repo, monkeypatch, f"Added feature {i}", "2020-06-01T12:00:00+00:00")
+    commit_authored(repo, monkeypatch, "Add the tests", "2024-06-01T12:00:00+00:00")
+
+    estimated = estimate(["HEAD"], 2, Validator(get_backend("lexicon")), git_dir=str(repo / ".git"),
+                         period="year", seed=1)
+
+    assert (estimated["commits"], estimated["sampled"]) == (4, 2)
+    assert estimated["failed"]["rate"] == 0.75
+
+
+def test_unsampled_strata_keep_the_rate(repo, monkeypatch):
+    for i in range(3):
+        commit_authored(repo, monkeypatch, f"Added feature {i}", "2020-06-01T12:00:00+00:00")
+    commit_authored(repo, monkeypatch, "Fixed the tests", "2024-06-01T12:00:00+00:00")
+
+    estimated = estimate(["HEAD"], 1, Validator(get_backend("lexicon")), git_dir=str(repo / ".git"),
+                         period="year", seed=1)
+
+    assert estimated["sampled"] == 1
+    assert estimated["failed"]["rate"] == 1.0
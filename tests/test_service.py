@@ -0,0 +1,109 @@
+"""The tests of the HTTP validation service."""
+
+import http.client
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from main import rules
+from main.backends import HeuristicBackend
+from main.service import Handler, Service
+
+
+class RecordingBackend(HeuristicBackend):
+    """The heuristic backend recording its batches, failing on the word `boom`.
+
+    A batch takes a while, so the calls made meanwhile are queued into the next one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def tag(self, msg: str) -> list:
+        if "boom" in msg:
+            raise RuntimeError("the tagger broke")
+        return super().tag(msg)
+
+    def tag_many(self, msgs: list) -> list:
+        self.batches.append(len(msgs))
+        time.sleep(0.05)
+        return super().tag_many(msgs)
+
+
+@pytest.fixture
+def service():
+    """A service on a free port, with the recording backend."""
+    backend = RecordingBackend()
+    service = Service(backend, rules.resolve_rules(), {})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), type("TestHandler", (Handler,), {"service": service}))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    service.port = server.server_address[1]
+    yield service
+    server.shutdown()
+    server.server_close()
+
+
+def request(service, method: str, path: str, body: dict = None) -> tuple:
+    """Send a request to the service, return the status and the body."""
+    connection = http.client.HTTPConnection("127.0.0.1", service.port, timeout=10)
+    try:
+        connection.request(method, path, json.dumps(body) if body is not None else None)
+        response = connection.getresponse()
+        data = response.read().decode("utf-8")
+    finally:
+        connection.close()
+    return response.status, data
+
+
+def test_validator_error_is_answered_and_counted(service):
+    status, body = request(service, "POST", "/validate", {"message": "boom the parser"})
+
+    assert status == 500
+    assert "the tagger broke" in json.loads(body)["error"]
+    _, metrics = request(service, "GET", "/metrics")
+    assert 'commit_msg_hook_requests_total{endpoint="/validate",status="500"} 1' in metrics
+
+
+def test_batch_is_tagged_together_with_the_authors(service):
+    messages = [f"Fix the parser {i}" for i in range(20)] + [
+        "Added a feature",
+        {"message": "Bumps the version", "author": "dependabot[bot] <bot@example.com>"},
+    ]
+
+    status, body = request(service, "POST", "/batch", {"messages": messages})
+
+    assert status == 200
+    results = json.loads(body)["results"]
+    assert [result["ok"] for result in results] == [True] * 20 + [False, True]
+    assert sum(service.backend.backend.batches) == 21
+    assert len(service.backend.backend.batches) < 21
+
+
+def test_batch_rejects_a_message_without_text(service):
+    status, body = request(service, "POST", "/batch", {"messages": [{"author": "A <a@example.com>"}]})
+
+    assert status == 400
+    assert json.loads(body)["error"] == "`message` must be a string"
+
+
+@pytest.mark.parametrize("length", ["-1", "abc", "1e3", "+5"])
+def test_invalid_content_length_is_rejected(service, length):
+    connection = http.client.HTTPConnection("127.0.0.1", service.port, timeout=5)
+    try:
+        connection.putrequest("POST", "/validate")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        response = connection.getresponse()
+        body = json.loads(response.read().decode("utf-8"))
+    finally:
+        connection.close()
+
+    assert response.status == 400
+    assert "Content-Length" in body["error"]
+    # the unread body must not be taken for the next request
+    assert response.will_close
@@ -0,0 +1,94 @@
+"""The tests of the sharded audits, every shard audited by a process in its own clone as a node."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from main.reports import merge
+
+from .conftest import commit, git, source_env
+
+SUBJECTS = ["Add the parser", "Added the lexer", "fix the cache", "Update docs.", "Fixes the config loader",
+            "Remove the unused option", "wip", "Refactor the store"]
+
+
+@pytest.fixture
+def history(repo):
+    """A repository with a history of valid and invalid messages."""
+    for i in range(64):
+        commit(repo, f"{SUBJECTS[i % len(SUBJECTS)]} {i}")
+    return repo
+
+
+def clone(repo, folder):
+    """Clone the repository to a node."""
+    git(repo.parent, "clone", "-q", str(repo), str(folder))
+    return folder
+
+
+def run_nodes(repo, tmp_path, shards: list) -> list:
+    """Audit the shards at once, each in a process and a clone of its own, return their reports."""
+    nodes = []
+    for i, shard in enumerate(shards):
+        folder = clone(repo, tmp_path / f"node-{i}")
+        report = tmp_path / f"report-{i}.json"
+        command = [sys.executable, "-m", "main", "audit", "main", "--backend", "lexicon", "--no-progress",
+                   "--report", str(report)] + (["--shard", shard] if shard else [])
+        nodes.append((subprocess.Popen(command, cwd=str(folder), env=source_env(), stdout=subprocess.DEVNULL), report))
+    reports = []
+    for process, report in nodes:
+        assert process.wait() == 0
+        reports.append(json.loads(report.read_text()))
+    return reports
+
+
+@pytest.mark.parametrize("shards", [["0/4", "1/4", "2/4", "3/4"], ["0/3", "2/3", "1/3"],
+                                    ["00-3f", "40-9f", "a0-ff"], ["0-7", "8-f"]])
+def test_merged_shards_match_a_single_node(history, tmp_path, shards):
+    single, = run_nodes(history, tmp_path / "single", [None])
+
+    merged = merge(run_nodes(history, tmp_path / "sharded", shards))
+
+    assert merged == single
+    assert merged["commits"] == 64
+    assert merged["shards"] is None
+    assert 10 < merged["failed"] < 64
+
+
+def test_merged_part_of_the_shards_keeps_them(history, tmp_path):
+    reports = run_nodes(history, tmp_path, ["1/4", "3/4"])
+
+    merged = merge(reports)
+
+    assert merged["shards"] == ["1/4", "3/4"]
+    assert merged["commits"] == reports[0]["commits"] + reports[1]["commits"] < 64
+
+
+@pytest.mark.parametrize("shards", [["0/4", "1/4", "1/4"], ["00-7f", "40-ff"], ["0-7", "7-f"], ["0/2", "0-7"]])
+def test_merge_rejects_overlapping_shards(history, tmp_path, shards):
+    reports = run_nodes(history, tmp_path, shards)
+
+    with pytest.raises(ValueError, match="overlap|can't be merged"):
+        merge(reports)
+
+
+def test_merge_rejects_reports_of_other_revisions(history, tmp_path):
+    first, = run_nodes(history, tmp_path / "before", ["0/2"])
+    commit(history, "Add the next feature")
+    second, = run_nodes(history, tmp_path / "after", ["1/2"])
+
+    with pytest.raises(ValueError, match="different revisions"):
+        merge([first, second])
+
+
+def test_merge_reports_command_rejects_a_bad_merge(history, tmp_path):
+    run_nodes(history, tmp_path, ["0/2", "0/2"])
+    command = [sys.executable, "-m", "main", "merge-reports", str(tmp_path / "report-0.json"),
+               str(tmp_path / "report-1.json")]
+
+    result = subprocess.run(command, env=source_env(), stdout=subprocess.PIPE, universal_newlines=True)
+
+    assert result.returncode == 2
+    assert "the shards overlap" in result.stdout
@@ -0,0 +1,75 @@
+"""The startup regression tests of the hook.
+
+The time to `main()` is measured as the overhead of a hook run over the bare interpreter,
+the best of a few runs, so the tests hold on a slow machine and fail on a regression
+like importing NLTK, `pkg_resources` or a heavy module on the startup path.
+"""
+
+import subprocess
+import sys
+import time
+
+from main.launcher import write_launcher
+
+from .conftest import source_env
+
+# the milliseconds a hook run may take over the bare interpreter, a few times the actual overhead
+STARTUP_BUDGET_MS = 200
+RUNS = 5
+# the modules the startup path imports only where they are used, if ever
+LAZY_MODULES = ("nltk", "pkg_resources", "importlib.metadata", "pkgutil", "subprocess", "json", "hashlib",
+                "sqlite3", "http", "multiprocessing", "concurrent")
+
+
+def best_time(command: list, cwd) -> float:
+    """Run a command a few times, return the best wall time in milliseconds."""
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=str(cwd), env=source_env(), check=True, stdout=subprocess.DEVNULL)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def imported_modules(command: list, cwd) -> set:
+    """Run a python command with `-X importtime`, return the names of the imported modules."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime"] + command, cwd=str(cwd), env=source_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True).stderr
+    return {line.rsplit("|", 1)[1].strip() for line in stderr.splitlines() if line.startswith("import time:")}
+
+
+def message_file(repo):
+    """Write a valid commit message into the repository."""
+    path = repo / "message.txt"
+    path.write_text("Add the parser\n")
+    return path
+
+
+def test_importing_the_cli_stays_lean(repo):
+    modules = imported_modules(["-c", "import main.cli"], repo)
+
+    assert "main.cli" in modules
+    assert [name for name in LAZY_MODULES if name in modules] == []
+
+
+def test_time_to_main_stays_within_the_budget(repo):
+    message = message_file(repo)
+    bare = best_time([sys.executable, "-c", "pass"], repo)
+
+    hook = best_time([sys.executable, "-m", "main", str(message), "--backend", "heuristic"], repo)
+
+    assert hook - bare < STARTUP_BUDGET_MS, f"python -m main took {hook:.0f}ms, the bare interpreter {bare:.0f}ms"
+
+
+def test_generated_launcher_starts_fast(repo, tmp_path):
+    message = message_file(repo)
+    launcher = tmp_path / "commit-msg-hook"
+    write_launcher(str(launcher))
+    bare = best_time([sys.executable, "-c", "pass"], repo)
+
+    hook = best_time([str(launcher), str(message), "--backend", "heuristic"], repo)
+
+    assert hook - bare < STARTUP_BUDGET_MS, f"the launcher took {hook:.0f}ms, the bare interpreter {bare:.0f}ms"
+    modules = imported_modules([str(launcher), str(message), "--backend", "heuristic"], repo)
+    assert "pkg_resources" not in modules and "importlib.metadata" not in modules
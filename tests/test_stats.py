@@ -0,0 +1,95 @@
+"""The tests of the space-saving sketch of the stats."""
+
+import random
+from collections import Counter
+
+import pytest
+
+from main.stats import SpaceSaving
+
+CAPACITY = 50
+
+
+def zipf_stream(size: int, seed: int) -> list:
+    """A stream of a few frequent items and a long tail of rare ones."""
+    generator = random.Random(seed)
+    return [f"word{int(generator.paretovariate(1.1))}" for _ in range(size)]
+
+
+def test_capacity_bounds_the_counters():
+    sketch = SpaceSaving(CAPACITY)
+    stream = [f"word{i}" for i in range(10 * CAPACITY)]
+
+    for item in stream:
+        sketch.add(item)
+
+    assert sketch.total == len(stream)
+    assert len(sketch.top(len(stream))) == CAPACITY
+
+
+def test_fewer_items_than_counters_are_exact():
+    sketch = SpaceSaving(CAPACITY)
+    generator = random.Random(1)
+    stream = [f"word{generator.randrange(CAPACITY)}" for _ in range(1000)]
+
+    for item in stream:
+        sketch.add(item)
+
+    assert sketch.top(CAPACITY) == [(item, count, 0) for item, count in
+                                    sorted(Counter(stream).items(), key=lambda pair: (-pair[1], pair[0]))]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_counts_are_within_their_error_bounds(seed):
+    sketch = SpaceSaving(CAPACITY)
+    stream = zipf_stream(20000, seed) + [f"rare{i}" for i in range(500)]
+    random.Random(seed).shuffle(stream)
+    exact = Counter(stream)
+
+    for item in stream:
+        sketch.add(item)
+
+    top = sketch.top(CAPACITY)
+    assert len(top) == CAPACITY
+    for item, count, error in top:
+        # never underestimated, overestimated by at most the recorded error
+        assert count - error <= exact[item] <= count
+        assert error <= len(stream) // CAPACITY
+    # an item more frequent than the total over the capacity is always kept
+    kept = {item for item, _, _ in top}
+    assert {item for item, count in exact.items() if count > len(stream) / CAPACITY} <= kept
+    # the top items of a skewed stream are ranked right
+    assert [item for item, _, _ in top[:3]] == [item for item, _ in exact.most_common(3)]
+
+
+def test_a_new_item_evicts_a_least_frequent_one():
+    sketch = SpaceSaving(2)
+    for item in ["a", "a", "a", "b", "b", "c"]:
+        sketch.add(item)
+
+    # `c` took over the counter of `b`, its count includes the 2 of `b` as the error
+    assert sketch.top() == [("a", 3, 0), ("c", 3, 2)]
+
+    sketch.add("d")
+
+    # the least frequent is `a` or `c`, both counted 3
+    top = sketch.top()
+    assert ("d", 4, 3) in top
+    assert len(top) == 2
+
+
+def test_evictions_match_a_brute_force_sketch():
+    sketch = SpaceSaving(8)
+    counts = {}
+    for item in zipf_stream(3000, seed=4):
+        sketch.add(item)
+        if item in counts:
+            counts[item] += 1
+        elif len(counts) < 8:
+            counts[item] = 1
+        else:
+            # evict any least frequent counter, the counts left are the same whichever is chosen
+            evicted = min(counts, key=counts.get)
+            counts[item] = counts.pop(evicted) + 1
+
+        assert sorted(count for _, count, _ in sketch.top(8)) == sorted(counts.values())
@@ -0,0 +1,75 @@
+"""The tests of the trailer block detection."""
+
+import pytest
+
+from main.backends import get_backend
+from main.trailers import find_trailers
+from main.validator import Validator
+
+
+def lines(message: str) -> list:
+    """Split a message into its lines."""
+    return message.split("\n")
+
+
+def test_block_after_a_blank_line():
+    message = lines("Add the parser\n\nExplain why it's needed.\n\nSigned-off-by: A <a@example.com>\nChange-Id: I12ab")
+
+    assert find_trailers(message) == 4
+
+
+def test_trailers_within_the_body_paragraph_are_not_a_block():
+    message = lines("Add the parser\n\nExplain why it's needed.\nChange-Id: I12ab")
+
+    assert find_trailers(message) == len(message)
+
+
+@pytest.mark.parametrize("generated", ["Signed-off-by: A <a@example.com>", "(cherry picked from commit 1234abcd)"])
+def test_a_quarter_of_trailers_with_a_generated_one_is_a_block(generated):
+    message = lines(f"Add the parser\n\nExplain why.\n\nfirst note\nsecond note\nthird note\n{generated}")
+
+    assert find_trailers(message) == 4
+
+
+def test_a_quarter_of_trailers_without_a_generated_one_is_not_a_block():
+    message = lines("Add the parser\n\nExplain why.\n\nfirst note\nsecond note\nthird note\nReviewed-by: A")
+
+    assert find_trailers(message) == len(message)
+
+
+def test_less_than_a_quarter_of_trailers_is_not_a_block():
+    message = lines("Add the parser\n\nExplain why.\n\nfirst\nsecond\nthird\nfourth\nSigned-off-by: A <a@example.com>")
+
+    assert find_trailers(message) == len(message)
+
+
+def test_continuation_lines_belong_to_their_trailer():
+    message = lines("Add the parser\n\nExplain why.\n\nCo-authored-by: A\n  <a@example.com>\n\tand B\nChange-Id: I12ab")
+
+    assert find_trailers(message) == 4
+
+
+def test_continuation_lines_without_a_trailer_above_are_not_trailers():
+    message = lines("Add the parser\n\nExplain why.\n\n  an indented note\nChange-Id: I12ab")
+
+    assert find_trailers(message) == len(message)
+
+
+def test_body_made_of_trailers():
+    message = lines("Add the parser\n\nSigned-off-by: A <a@example.com>\nChange-Id: I12ab\n\n")
+
+    assert find_trailers(message) == 2
+
+
+def test_the_title_is_never_a_block():
+    assert find_trailers(["Fixes: the parser"]) == 1
+    assert find_trailers(["Fixes: the parser", "Change-Id: I12ab"]) == 2
+
+
+def test_rules_skip_the_trailers():
+    validator = Validator(get_backend("lexicon"))
+    body = "Add the parser\n\nExplain why the parser is needed\nMention the lexer using it\nList the follow-up work"
+    trailers = "Fixes: #12."
+
+    assert validator.check(f"{body}\n\n{trailers}") == []
+    assert validator.check(f"{body}\n{trailers}") != []
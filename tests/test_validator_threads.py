@@ -0,0 +1,145 @@
+"""The tests of a validator shared by many threads.
+
+The rules and the lexicon and heuristic backends are pure Python and hold the GIL,
+so the throughput of a shared validator can't grow with the threads, the stress test
+only checks that it doesn't drop. The validator takes no lock while checking, which
+a tagger releasing the GIL(standing in for one in native code) shows by scaling with the threads.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from main import lexicon
+from main.backends import LexiconBackend
+from main.validator import Validator
+
+THREADS = 8
+THREAD_COUNTS = (1, 2, 4, 8)
+RUNS = 7
+# the share of the single-thread throughput a GIL bound validator keeps on more threads,
+# low enough for the noise of a loaded machine, high enough to catch a collapse of the throughput
+MIN_KEPT_THROUGHPUT = 0.6
+# the seconds a GIL-free tagging takes
+NATIVE_TAGGING = 0.002
+SUBJECTS = ["Add the parser", "Added the parser", "fix the lexer", "Fixes the lexer", "Update docs.",
+            "Refactoring the cache layer", "wip", "Bump nltk to 3.8", "Remove the unused option from the config"]
+BODIES = ["", "\n\nExplain why the change is needed.", "\nNo blank line before the body",
+          "\n\nAdded a body line in the past tense.\n\nSigned-off-by: Test Author <author@example.com>"]
+
+
+class CountingBackend(LexiconBackend):
+    """The lexicon backend counting the loadings of its model, slow to load to widen the race."""
+
+    def __init__(self):
+        self.loads = 0
+        self._count_lock = threading.Lock()
+        super().__init__()
+
+    def load_steps(self) -> list:
+        return [self._load_model]
+
+    def _load_model(self):
+        with self._count_lock:
+            self.loads += 1
+        time.sleep(0.2)
+        lexicon.load_lexicon()
+
+
+class NativeBackend(LexiconBackend):
+    """The lexicon backend releasing the GIL while tagging, like a tagger in native code."""
+
+    def tag(self, msg: str) -> list:
+        time.sleep(NATIVE_TAGGING)
+        return super().tag(msg)
+
+
+def messages() -> list:
+    """Every subject with every body, a few times over."""
+    return [subject + body for subject in SUBJECTS for body in BODIES] * 10
+
+
+def check(validator: Validator, message: str) -> list:
+    """Check a message, return its violations as plain data."""
+    return [(violation.rule, violation.text) for violation in validator.check(message)]
+
+
+def test_shared_validator_matches_a_single_thread():
+    expected = [check(Validator(LexiconBackend()), message) for message in messages()]
+    backend = CountingBackend()
+    validator = Validator(backend)
+    start = threading.Barrier(THREADS)
+
+    def run(part):
+        # the first calls of all the threads race for the model
+        start.wait()
+        return [check(validator, message) for message in messages()[part::THREADS]]
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        parts = list(pool.map(run, range(THREADS)))
+    results = [None] * len(expected)
+    for part, checked in enumerate(parts):
+        results[part::THREADS] = checked
+
+    assert results == expected
+    assert any(expected)
+    assert backend.loads == 1
+
+
+def test_concurrent_direct_loads_load_the_model_once():
+    backend = CountingBackend()
+    start = threading.Barrier(THREADS)
+
+    def run(_):
+        start.wait()
+        # the lexicon backend loads its model on the first tagging
+        return backend.tag("Added the parser")
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        tags = list(pool.map(run, range(THREADS)))
+
+    assert tags == [tags[0]] * THREADS
+    assert backend.loads == 1
+
+
+def throughputs(validator: Validator, checked: list) -> dict:
+    """Check the messages on pools of every thread count, return the best messages per second of each.
+
+    The thread counts take turns in every run, so a slowdown of the machine hits all of them alike.
+    """
+    pools = {threads: ThreadPoolExecutor(threads) for threads in THREAD_COUNTS}
+    best = dict.fromkeys(THREAD_COUNTS, 0)
+    try:
+        for threads, pool in pools.items():
+            # start the threads of the pool before measuring
+            list(pool.map(time.sleep, [0] * threads))
+        for _ in range(RUNS):
+            for threads, pool in pools.items():
+                start = time.perf_counter()
+                list(pool.map(validator.check, checked))
+                best[threads] = max(best[threads], len(checked) / (time.perf_counter() - start))
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+    return best
+
+
+def test_throughput_does_not_drop_with_more_threads():
+    validator = Validator(LexiconBackend())
+    validator.load()
+
+    rates = throughputs(validator, messages() * 5)
+
+    for threads in THREAD_COUNTS[1:]:
+        assert rates[threads] >= rates[1] * MIN_KEPT_THROUGHPUT, rates
+
+
+def test_throughput_scales_with_a_tagger_releasing_the_gil():
+    validator = Validator(NativeBackend())
+    validator.load()
+    checked = [message for message in messages() if message.startswith("Add")][:THREADS * 8]
+
+    rates = throughputs(validator, checked)
+
+    for fewer, more in zip(THREAD_COUNTS, THREAD_COUNTS[1:]):
+        assert rates[more] > rates[fewer] * 1.5, rates